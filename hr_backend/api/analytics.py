@@ -0,0 +1,280 @@
+"""
+Set-based department and employee analytics shared by the department,
+employee and dashboard endpoints.
+
+Salary figures are based on each employee's most recent payroll record,
+read from the LatestPayroll snapshot (see api/snapshots.py); headcount growth
+and turnover come from the precomputed DepartmentMonthlyKPI rows (see
+api/kpis.py). Everything here runs in a constant number of queries, no matter
+how many departments or employees are involved. The response builders at the
+end (department_stats, company_analytics, employee_summary) take rows that were
+already fetched, so /api/dashboard/ can build all of them from one pass.
+"""
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from .models import Department, DepartmentMonthlyKPI, Employee
+
+OVERHEAD_MULTIPLIER = 1.5
+
+
+def annotated_departments():
+    """Departments with their manager and annotated employee_count / position_count"""
+    return Department.objects.select_related('manager').annotate(
+        employee_count=Count('employees', distinct=True),
+        position_count=Count('positions', distinct=True)
+    )
+
+
+def summarize_salaries(employee_count, salaries):
+    """Build salary statistics from a list of latest net salaries"""
+    salary_count = len(salaries)
+    total_salary = sum(salaries)
+    ordered = sorted(salaries)
+
+    return {
+        'employee_count': employee_count,
+        'salary_count': salary_count,
+        'total_salary': total_salary,
+        'average_salary': round(total_salary / salary_count, 2) if salary_count > 0 else 0,
+        'highest_salary': round(ordered[-1], 2) if ordered else 0,
+        'lowest_salary': round(ordered[0], 2) if ordered else 0,
+        'median_salary': round(ordered[salary_count // 2], 2) if ordered else 0,
+    }
+
+
+def salary_stats_from_rows(department_ids, rows):
+    """
+    Headcount and latest-salary statistics per department from
+    (department_id, latest net salary) rows in employee_id order.
+    """
+    department_ids = list(department_ids)
+    employee_counts = {dept_id: 0 for dept_id in department_ids}
+    salaries = {dept_id: [] for dept_id in department_ids}
+
+    for dept_id, net_salary in rows:
+        if dept_id not in employee_counts:
+            continue
+        employee_counts[dept_id] += 1
+        if net_salary is not None:
+            salaries[dept_id].append(net_salary)
+
+    return {
+        dept_id: summarize_salaries(employee_counts[dept_id], salaries[dept_id])
+        for dept_id in department_ids
+    }
+
+
+def department_salary_stats(department_ids):
+    """
+    Get headcount and latest-salary statistics for each department.
+    Returns a dict keyed by department_id; runs a single query.
+    """
+    department_ids = list(department_ids)
+    # Summing in primary key order keeps the float totals stable whichever index is used
+    rows = Employee.objects.filter(department_id__in=department_ids).order_by('employee_id').values_list(
+        'department_id', 'latest_payroll__net_salary'
+    )
+    return salary_stats_from_rows(department_ids, rows)
+
+
+def department_kpis(department_ids=None):
+    """
+    Get the latest monthly KPI row (up to the current month) for each department,
+    or for every department when department_ids is None.
+    Returns a dict keyed by department_id; runs a single query.
+    """
+    current_month = timezone.localdate().replace(day=1)
+    kpis = DepartmentMonthlyKPI.objects.filter(month__lte=current_month)
+    if department_ids is not None:
+        kpis = kpis.filter(department_id__in=list(department_ids))
+    latest = kpis.annotate(
+        row_number=Window(
+            expression=RowNumber(),
+            partition_by=[F('department_id')],
+            order_by=F('month').desc(),
+        )
+    ).filter(row_number=1).values('department_id', 'month', 'headcount_growth_percent', 'turnover_rate_percent')
+    return {row['department_id']: row for row in latest}
+
+
+def build_department_analytics(department, stats, kpis=None):
+    """Build the full analytics block for a single department"""
+    employee_count = stats['employee_count']
+    salary_count = stats['salary_count']
+    total_salary = stats['total_salary']
+
+    total_cost = round(total_salary * OVERHEAD_MULTIPLIER, 2)
+    cost_per_employee = round(total_cost / employee_count, 2) if employee_count > 0 else 0
+
+    # Precomputed KPIs; departments without KPI rows yet report 0
+    headcount_growth = kpis['headcount_growth_percent'] if kpis else 0
+    turnover_rate = kpis['turnover_rate_percent'] if kpis else 0
+
+    salary_coverage = round((salary_count / employee_count) * 100, 2) if employee_count > 0 else 0
+    budget_utilization = round((total_cost / department.budget) * 100, 2) if department.budget else 0
+
+    return {
+        'financial_metrics': {
+            'average_salary': stats['average_salary'],
+            'total_salary_cost': round(total_salary, 2),
+            'total_cost': total_cost,
+            'cost_per_employee': cost_per_employee,
+            'budget_utilization_percent': budget_utilization
+        },
+        'workforce_metrics': {
+            'total_employees': employee_count,
+            'employees_with_salary_data': salary_count,
+            'salary_data_coverage_percent': salary_coverage,
+            'headcount_growth_percent': headcount_growth,
+            'turnover_rate_percent': turnover_rate
+        },
+        'cost_breakdown': {
+            'base_salary_cost': round(total_salary, 2),
+            'overhead_multiplier': OVERHEAD_MULTIPLIER,
+            'overhead_cost': round(total_salary * (OVERHEAD_MULTIPLIER - 1), 2),
+            'cost_formula': 'Total Cost = (Sum of all salaries) × 1.5'
+        },
+        'salary_statistics': {
+            'highest_salary': stats['highest_salary'],
+            'lowest_salary': stats['lowest_salary'],
+            'median_salary': stats['median_salary']
+        }
+    }
+
+
+def build_department_summary(department, stats, kpis=None):
+    """Build the condensed analytics block used in company-wide listings"""
+    analytics = build_department_analytics(department, stats, kpis)
+    financial = analytics['financial_metrics']
+    workforce = analytics['workforce_metrics']
+
+    return {
+        'financial_metrics': {
+            'average_salary': financial['average_salary'],
+            'total_cost': financial['total_cost'],
+            'cost_per_employee': financial['cost_per_employee']
+        },
+        'workforce_metrics': {
+            'total_employees': workforce['total_employees'],
+            'headcount_growth_percent': workforce['headcount_growth_percent'],
+            'turnover_rate_percent': workforce['turnover_rate_percent']
+        }
+    }
+
+
+def department_stats(departments, department_data):
+    """
+    The /api/departments/stats/ response for departments annotated with
+    employee_count and position_count; department_data maps each department_id
+    to its DepartmentListSerializer data.
+    """
+    stats_data = []
+    total_employees = 0
+    total_budget = 0
+
+    for dept in departments:
+        employee_count = dept.employee_count
+        position_count = dept.position_count
+        avg_budget_per_employee = dept.budget / employee_count if dept.budget and employee_count > 0 else 0
+
+        stats_data.append({
+            'department': department_data[dept.pk],
+            'employee_count': employee_count,
+            'position_count': position_count,
+            'avg_budget_per_employee': round(avg_budget_per_employee, 2)
+        })
+
+        total_employees += employee_count
+        if dept.budget:
+            total_budget += dept.budget
+
+    return {
+        'department_stats': stats_data,
+        'summary': {
+            'total_departments': len(stats_data),
+            'total_employees': total_employees,
+            'total_budget': round(total_budget, 2),
+            'avg_employees_per_department': round(total_employees / len(stats_data), 2) if stats_data else 0
+        }
+    }
+
+
+def company_analytics(departments, department_data, salary_stats, kpis):
+    """The /api/departments/analytics_all/ response (see department_stats for department_data)"""
+    analytics_data = []
+    total_company_cost = 0
+    total_company_employees = 0
+
+    for dept in departments:
+        stats = salary_stats[dept.pk]
+        if stats['employee_count'] == 0:
+            continue
+
+        summary = build_department_summary(dept, stats, kpis.get(dept.pk))
+        total_company_cost += summary['financial_metrics']['total_cost']
+        total_company_employees += stats['employee_count']
+
+        analytics_data.append({
+            'department': department_data[dept.pk],
+            **summary
+        })
+
+    return {
+        'departments_analytics': analytics_data,
+        'company_summary': {
+            'total_departments_analyzed': len(analytics_data),
+            'total_company_cost': round(total_company_cost, 2),
+            'total_employees': total_company_employees,
+            'average_cost_per_employee': round(total_company_cost / total_company_employees, 2) if total_company_employees > 0 else 0,
+            'cost_breakdown_by_department': [
+                {
+                    'department': dept['department']['department_name'],
+                    'cost': dept['financial_metrics']['total_cost'],
+                    'percentage_of_total': round((dept['financial_metrics']['total_cost'] / total_company_cost) * 100, 2) if total_company_cost > 0 else 0
+                }
+                for dept in analytics_data
+            ]
+        }
+    }
+
+
+def employee_summary(rows, today=None):
+    """
+    The /api/employees/analytics_summary/ response from
+    (department name, employment status, hire date) rows, one per employee.
+    """
+    today = today or timezone.localdate()
+    total_employees = 0
+    tenure_days = 0
+    departments = {}
+    statuses = {}
+
+    for department_name, employment_status, hire_date in rows:
+        total_employees += 1
+        tenure_days += (today - hire_date).days
+        departments[department_name] = departments.get(department_name, 0) + 1
+        statuses[employment_status] = statuses.get(employment_status, 0) + 1
+
+    active_employees = statuses.get('ACTIVE', 0)
+    avg_tenure = round(tenure_days / 365.25 / total_employees, 1) if total_employees else 0
+
+    return {
+        'summary': {
+            'total_employees': total_employees,
+            'active_employees': active_employees,
+            'inactive_employees': total_employees - active_employees,
+            'average_tenure_years': avg_tenure
+        },
+        # Largest departments first, ties by name
+        'department_distribution': [
+            {'department__department_name': name, 'count': count}
+            for name, count in sorted(departments.items(), key=lambda item: (-item[1], item[0] or ''))
+        ],
+        'employment_status_breakdown': [
+            {'employment_status': status, 'count': count}
+            # Employees without a status first, as SQLite sorts NULL
+            for status, count in sorted(statuses.items(), key=lambda item: item[0] or '')
+        ]
+    }
@@ -0,0 +1,246 @@
+"""
+Batch create/update of employees (POST /api/employees/bulk/).
+
+Each row is validated field by field with EmployeeBulkRowSerializer; unique
+fields (email, employee_code) and references (employee_id, department,
+position, manager) are then checked for the whole batch with one set query
+per table instead of one query per row and field, and new managers for
+reporting cycles, within the batch and against the stored hierarchy. A valid batch is written
+with chunked bulk_create / bulk_update inside a single transaction; if any
+row fails validation nothing is written and every row's errors are reported.
+Afterwards only the touched departments' KPIs and reporting lines are synced.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import serializers
+
+from .cache import invalidate_on_commit
+from .models import Department, Employee, EmploymentStatusChange, Position
+from .orgchart import find_reporting_cycles
+from .serializers import EmployeeBulkRowSerializer
+from .snapshots import deferred_snapshot_sync, sync_snapshots
+
+# Keeps IN (...) lists well below SQLite's bound-parameter limit
+LOOKUP_CHUNK_SIZE = 500
+
+# Changes to these move an employee in or out of a department's KPIs (api/kpis.py)
+KPI_FIELDS = ('employment_status', 'department_id', 'hire_date')
+
+RELATED_MODELS = {
+    'department': Department,
+    'position': Position,
+    'manager': Employee,
+}
+
+UNIQUE_FIELD_MESSAGES = {
+    'email': "An employee with this email already exists.",
+    'employee_code': "An employee with this code already exists.",
+}
+
+
+def chunked(values, size=LOOKUP_CHUNK_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class EmployeeBatch:
+    """
+    Validate and save a list of employee rows.
+    Rows carrying an employee_id update that employee (only the given fields
+    change); all other rows create a new employee.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.errors = {}
+        self.validated = {}
+        self.instances = {}
+
+    @property
+    def max_rows(self):
+        return getattr(settings, 'BULK_WRITE_MAX_ROWS', 5000)
+
+    def add_error(self, index, field, message):
+        self.errors.setdefault(index, {}).setdefault(field, []).append(message)
+
+    def is_valid(self):
+        if not isinstance(self.rows, list):
+            self.add_error(None, 'non_field_errors', 'Expected a list of employee objects.')
+            return False
+        if len(self.rows) > self.max_rows:
+            self.add_error(None, 'non_field_errors', f'A batch may contain at most {self.max_rows} rows.')
+            return False
+
+        # Building a serializer's fields costs far more than validating a row, so reuse one per mode
+        row_serializers = {
+            False: EmployeeBulkRowSerializer(),
+            True: EmployeeBulkRowSerializer(partial=True)
+        }
+        for index, row in enumerate(self.rows):
+            if not isinstance(row, dict):
+                self.add_error(index, 'non_field_errors', 'Expected an employee object.')
+                continue
+            try:
+                self.validated[index] = row_serializers['employee_id' in row].run_validation(row)
+            except serializers.ValidationError as exc:
+                self.errors[index] = exc.detail
+
+        self.check_updated_employees()
+        self.check_unique_fields()
+        self.check_related_records()
+        self.check_reporting_lines()
+
+        # Rows that failed a batch check are not written either
+        for index in self.errors:
+            self.validated.pop(index, None)
+        return not self.errors
+
+    def check_updated_employees(self):
+        """Updated employees must exist and appear only once"""
+        rows_by_id = {}
+        for index, data in self.validated.items():
+            employee_id = data.get('employee_id')
+            if employee_id is None:
+                continue
+            if employee_id in rows_by_id:
+                self.add_error(index, 'employee_id', f'Employee {employee_id} is already updated by row {rows_by_id[employee_id]}.')
+            else:
+                rows_by_id[employee_id] = index
+
+        for chunk in chunked(rows_by_id):
+            self.instances.update(Employee.objects.in_bulk(chunk))
+        for employee_id, index in rows_by_id.items():
+            if employee_id not in self.instances:
+                self.add_error(index, 'employee_id', f'Invalid pk "{employee_id}" - object does not exist.')
+
+    def check_unique_fields(self):
+        """Unique fields may not repeat within the batch or belong to another stored employee"""
+        claimed = {field: {} for field in UNIQUE_FIELD_MESSAGES}
+        for index, data in self.validated.items():
+            for field, values in claimed.items():
+                value = data.get(field)
+                if value is None:
+                    continue
+                if value in values:
+                    self.add_error(index, field, f'Row {values[value]} already uses this value.')
+                else:
+                    values[value] = index
+
+        # One query per chunk finds every stored owner of the claimed values
+        emails = list(claimed['email'])
+        codes = list(claimed['employee_code'])
+        owners = {field: {} for field in UNIQUE_FIELD_MESSAGES}
+        for start in range(0, max(len(emails), len(codes)), LOOKUP_CHUNK_SIZE):
+            stored = Employee.objects.filter(
+                Q(email__in=emails[start:start + LOOKUP_CHUNK_SIZE]) |
+                Q(employee_code__in=codes[start:start + LOOKUP_CHUNK_SIZE])
+            ).values_list('employee_id', 'email', 'employee_code')
+            for employee_id, email, code in stored:
+                owners['email'][email] = employee_id
+                owners['employee_code'][code] = employee_id
+
+        for field, values in claimed.items():
+            for value, index in values.items():
+                owner = owners[field].get(value)
+                if owner is not None and owner != self.validated[index].get('employee_id'):
+                    self.add_error(index, field, UNIQUE_FIELD_MESSAGES[field])
+
+    def check_related_records(self):
+        """Department, position and manager ids must exist"""
+        for field, model in RELATED_MODELS.items():
+            referenced = {data[field] for data in self.validated.values() if data.get(field) is not None}
+            existing = set()
+            for chunk in chunked(referenced):
+                existing.update(model.objects.filter(pk__in=chunk).values_list('pk', flat=True))
+
+            for index, data in self.validated.items():
+                value = data.get(field)
+                if value is not None and value not in existing:
+                    self.add_error(index, field, f'Invalid pk "{value}" - object does not exist.')
+
+    def check_reporting_lines(self):
+        """New managers may not make an employee report to themselves, directly or through others"""
+        assignments = {
+            data['employee_id']: data['manager'] for data in self.validated.values()
+            if 'manager' in data and data.get('employee_id') in self.instances
+        }
+        rows_by_id = {data.get('employee_id'): index for index, data in self.validated.items()}
+        for employee_id in sorted(find_reporting_cycles(assignments)):
+            self.add_error(
+                rows_by_id[employee_id], 'manager',
+                'An employee cannot report to themselves or to someone who reports to them.'
+            )
+
+    def get_errors(self):
+        """Errors as a list of {'row': index, 'errors': {...}} in row order"""
+        return [
+            {'row': index, 'errors': errors}
+            for index, errors in sorted(self.errors.items(), key=lambda item: -1 if item[0] is None else item[0])
+        ]
+
+    @staticmethod
+    def model_attribute(field):
+        return f'{field}_id' if field in RELATED_MODELS else field
+
+    def save(self, batch_size=None):
+        """Write the validated rows; returns the created and updated employee ids"""
+        batch_size = batch_size or getattr(settings, 'BULK_WRITE_BATCH_SIZE', 500)
+        now = timezone.now()
+
+        new_employees = []
+        updated_employees = []
+        updated_fields = {'updated_date'}
+        status_changes = []
+        # What the snapshots need to catch up on (no payrolls are written here)
+        kpi_departments = set()
+        placements = []
+        for index, data in sorted(self.validated.items()):
+            values = {self.model_attribute(field): value for field, value in data.items() if field != 'employee_id'}
+            if 'employee_id' not in data:
+                new_employees.append(Employee(**values, created_date=now, updated_date=now))
+                continue
+
+            employee = self.instances[data['employee_id']]
+            if any(field in values and values[field] != getattr(employee, field) for field in KPI_FIELDS):
+                kpi_departments.update((employee.department_id, values.get('department_id', employee.department_id)))
+            if 'manager_id' in values and values['manager_id'] != employee.manager_id:
+                placements.append((employee.employee_id, values['manager_id']))
+            new_status = values.get('employment_status', employee.employment_status)
+            if new_status != employee.employment_status:
+                # bulk_update sends no signals, so log the transition the way api/signals.py would
+                status_changes.append(EmploymentStatusChange(
+                    employee=employee,
+                    old_status=employee.employment_status,
+                    new_status=new_status,
+                    changed_date=now
+                ))
+            for attribute, value in values.items():
+                setattr(employee, attribute, value)
+            employee.updated_date = now
+            updated_fields.update(values)
+            updated_employees.append(employee)
+
+        # Snapshots are brought up to date once the batch is written, for the touched rows only
+        with transaction.atomic():
+            with deferred_snapshot_sync(rebuild=False):
+                Employee.objects.bulk_create(new_employees, batch_size=batch_size)
+                if updated_employees:
+                    Employee.objects.bulk_update(updated_employees, sorted(updated_fields), batch_size=batch_size)
+                EmploymentStatusChange.objects.bulk_create(status_changes, batch_size=batch_size)
+                invalidate_on_commit(Employee)
+
+            kpi_departments.update(employee.department_id for employee in new_employees)
+            sync_snapshots(
+                kpi_departments,
+                [(employee.employee_id, employee.manager_id) for employee in new_employees] + placements
+            )
+
+        return {
+            'created': len(new_employees),
+            'updated': len(updated_employees),
+            'created_ids': [employee.employee_id for employee in new_employees],
+            'updated_ids': [employee.employee_id for employee in updated_employees]
+        }
@@ -0,0 +1,178 @@
+"""
+Response cache for the read-heavy analytics endpoints.
+
+Cached responses are keyed by endpoint, URL kwargs, query parameters and the
+current version of every model the endpoint depends on. Model versions are
+bumped by the post_save/post_delete handlers in api/signals.py (after the
+transaction commits), so a write only invalidates the endpoints that read
+that model; stale entries are never looked up again and simply expire.
+
+The backend is whichever cache alias ANALYTICS_CACHE_ALIAS names in
+settings.CACHES. Use a backend shared between processes (file-based, Redis,
+Memcached) so writes made by management commands invalidate the server's
+entries too. Actions served from the analytics replica (api/replica.py) add the
+replica's snapshot token to their key.
+
+JSON responses are cached as rendered bytes, already compressed in every
+supported encoding (api/compression.py), so a hit skips rendering and
+compression both. Other renderers (the browsable API) cache the response data.
+"""
+import hashlib
+import json
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.response import Response
+
+from .compression import accepted_encoding, add_timing, precompressed
+from .replica import routed_snapshot_token
+
+KEY_PREFIX = 'hr'
+
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+def get_cache():
+    return caches[getattr(settings, 'ANALYTICS_CACHE_ALIAS', 'default')]
+
+
+def _version_key(model):
+    return f'{KEY_PREFIX}:version:{model._meta.label_lower}'
+
+
+def model_versions(models):
+    """Current version token for each model, creating missing ones"""
+    cache = get_cache()
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # A time-based token never collides with versions used before an eviction
+            versions[key] = cache.get_or_set(key, time.time_ns(), timeout=None)
+    return [versions[key] for key in keys]
+
+
+def bump_model_versions(*models):
+    """Invalidate every cached response that depends on any of the given models"""
+    cache = get_cache()
+    token = time.time_ns()
+    cache.set_many({_version_key(model): token for model in models}, timeout=None)
+
+
+def invalidate_on_commit(*models):
+    """Bump model versions once the current transaction commits"""
+    transaction.on_commit(lambda: bump_model_versions(*models))
+
+
+def _record(endpoint, outcome):
+    with _stats_lock:
+        counters = _stats.setdefault(endpoint, {'hits': 0, 'misses': 0})
+        counters[outcome] += 1
+
+
+def cache_stats():
+    """Hit/miss counters for this process, per endpoint and in total"""
+    with _stats_lock:
+        endpoints = {endpoint: dict(counters) for endpoint, counters in _stats.items()}
+    hits = sum(counters['hits'] for counters in endpoints.values())
+    misses = sum(counters['misses'] for counters in endpoints.values())
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate_percent': round(hits / (hits + misses) * 100, 2) if hits + misses else 0,
+        'endpoints': endpoints
+    }
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def build_cache_key(endpoint, request, kwargs, versions):
+    params = sorted((key, sorted(values)) for key, values in request.query_params.lists())
+    media_type = getattr(request, 'accepted_media_type', None)
+    fingerprint = json.dumps([sorted(kwargs.items()), params, media_type, versions], default=str)
+    digest = hashlib.md5(fingerprint.encode('utf-8')).hexdigest()
+    return f'{KEY_PREFIX}:response:{endpoint}:{digest}'
+
+
+def render_entry(view, request, data):
+    """
+    Cache entry for response data: for JSON, the rendered body in every encoding;
+    for other renderers, the data itself.
+    """
+    renderer = request.accepted_renderer
+    if renderer.format != 'json':
+        return {'data': data}
+
+    started = time.perf_counter()
+    content = renderer.render(data, request.accepted_media_type, view.get_renderer_context())
+    metrics = getattr(request, 'metrics', None)
+    if metrics is not None:
+        metrics.serialization_time += time.perf_counter() - started
+
+    started = time.perf_counter()
+    bodies = precompressed(content)
+    add_timing(request, started)
+
+    content_type = renderer.media_type
+    if renderer.charset:
+        content_type = f'{content_type}; charset={renderer.charset}'
+    return {'content_type': content_type, 'bodies': bodies}
+
+
+def entry_response(request, entry):
+    """Response for a cache entry, in the encoding the client prefers"""
+    if 'data' in entry:
+        return Response(entry['data'])
+
+    bodies = entry['bodies']
+    encoding = accepted_encoding(request, [encoding for encoding in bodies if encoding != 'identity'])
+    response = HttpResponse(bodies[encoding or 'identity'], content_type=entry['content_type'])
+    if encoding is not None:
+        response['Content-Encoding'] = encoding
+    if len(bodies) > 1:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def cached_response(*models, timeout=None):
+    """
+    Cache a viewset action's successful response (see the module docstring).
+    `models` are the models the response is computed from.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            cache = get_cache()
+            endpoint = f'{self.basename}-{view_method.__name__}'
+            # Responses read from the analytics replica also depend on its snapshot
+            versions = model_versions(models) + [routed_snapshot_token()]
+            key = build_cache_key(endpoint, request, kwargs, versions)
+
+            entry = cache.get(key)
+            if entry is not None:
+                _record(endpoint, 'hits')
+                response = entry_response(request, entry)
+                response['X-Cache'] = 'HIT'
+                return response
+
+            _record(endpoint, 'misses')
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                entry = render_entry(self, request, response.data)
+                cache_timeout = timeout if timeout is not None else getattr(settings, 'ANALYTICS_CACHE_TIMEOUT', 600)
+                cache.set(key, entry, cache_timeout)
+                response = entry_response(request, entry)
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
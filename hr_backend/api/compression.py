@@ -0,0 +1,142 @@
+"""
+gzip / Brotli content encoding (CompressionMiddleware).
+
+JSON, CSV and NDJSON responses are compressed for clients that accept it,
+in the best encoding both sides support: Brotli when the optional `brotli`
+package is installed, gzip otherwise. Streaming responses (the /api/export/
+endpoints) are compressed chunk by chunk as they are sent.
+
+Cached analytics responses (api/cache.py) are stored already rendered and
+compressed in every encoding with precompressed(); a cache hit sends the
+stored bytes as they are, and the middleware leaves responses that already
+carry a Content-Encoding alone.
+"""
+import gzip
+import re
+import time
+import zlib
+
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip is offered
+    brotli = None
+
+# Bodies shorter than this are sent as they are (as Django's GZipMiddleware does)
+MIN_SIZE = 200
+COMPRESSIBLE_TYPES = re.compile(r'^(application/(json|x-ndjson)|text/)', re.IGNORECASE)
+
+# Levels for responses compressed while the client waits, and for payloads
+# compressed once and served many times (precompressed). Brotli quality 10 and
+# up is over ten times slower than 9 for a few percent smaller output.
+GZIP_LEVEL, GZIP_STORED_LEVEL = 6, 9
+BROTLI_QUALITY, BROTLI_STORED_QUALITY = 5, 9
+
+
+def available_encodings():
+    """Supported content codings, most preferred first"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def compress(content, encoding, stored=False):
+    if encoding == 'br':
+        return brotli.compress(content, quality=BROTLI_STORED_QUALITY if stored else BROTLI_QUALITY)
+    return gzip.compress(content, compresslevel=GZIP_STORED_LEVEL if stored else GZIP_LEVEL, mtime=0)
+
+
+def compress_stream(chunks, encoding):
+    """Compress a streaming body, flushing after every chunk so rows reach the client as they are produced"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            compressed = compressor.process(chunk) + compressor.flush()
+            if compressed:
+                yield compressed
+        yield compressor.finish()
+        return
+
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def precompressed(content):
+    """{encoding: body} for every supported encoding, plus 'identity' for the uncompressed body"""
+    bodies = {'identity': content}
+    if len(content) >= MIN_SIZE:
+        bodies.update((encoding, compress(content, encoding, stored=True)) for encoding in available_encodings())
+    return bodies
+
+
+def accepted_encoding(request, encodings=None):
+    """The most preferred of `encodings` the request's Accept-Encoding allows, None for identity"""
+    accepted = {}
+    for coding in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        name, _, parameters = coding.strip().partition(';')
+        quality = 1.0
+        match = re.search(r'q\s*=\s*([0-9.]+)', parameters)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                continue
+        accepted[name.strip().lower()] = quality
+
+    candidates = [
+        encoding for encoding in (encodings or available_encodings())
+        if accepted.get(encoding, accepted.get('*', 0)) > 0
+    ]
+    if not candidates:
+        return None
+    # Highest q-value first; ties go to the server's preference order
+    return max(candidates, key=lambda encoding: accepted.get(encoding, accepted.get('*', 0)))
+
+
+def add_timing(request, started):
+    """Count the time since `started` as compression time of the request (api/instrumentation.py)"""
+    metrics = getattr(request, 'metrics', None)
+    if metrics is not None:
+        metrics.compression_time += time.perf_counter() - started
+
+
+class CompressionMiddleware:
+    """Compress response bodies (see the module docstring); install it right after RequestMetricsMiddleware"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.has_header('Content-Encoding') or not COMPRESSIBLE_TYPES.match(response.get('Content-Type', '')):
+            return response
+        if not response.streaming and len(response.content) < MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = accepted_encoding(request)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            # Compressed while it is sent, after the request is measured
+            response.streaming_content = compress_stream(response.streaming_content, encoding)
+            del response['Content-Length']
+        else:
+            started = time.perf_counter()
+            compressed = compress(response.content, encoding)
+            add_timing(request, started)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # A strong ETag would claim byte equality with the uncompressed body
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = f'W/{etag}'
+        response['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,68 @@
+"""
+ETag / Last-Modified support for polled read endpoints.
+
+Validators are derived from the per-model version tokens kept by api/cache.py
+(bumped on every committed write), so a conditional GET is answered with 304
+before any queryset, serializer or analytics code runs. Version tokens are
+time.time_ns() values, which also makes them usable as Last-Modified.
+"""
+import hashlib
+import json
+from datetime import datetime, time as dt_time, timezone as dt_timezone
+from functools import wraps
+
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .cache import model_versions
+
+
+def compute_validators(endpoint, request, kwargs, models, daily=False):
+    """Return (etag, last_modified timestamp) for a request"""
+    versions = model_versions(models)
+    params = sorted((key, sorted(values)) for key, values in request.query_params.lists())
+    fingerprint = [endpoint, sorted(kwargs.items()), params, getattr(request, 'accepted_media_type', None), versions]
+    last_modified = max(versions) // 1_000_000_000
+
+    if daily:
+        # Output depends on the current date (tenure, current-month KPIs)
+        today = timezone.localdate()
+        fingerprint.append(today.isoformat())
+        midnight = timezone.make_aware(datetime.combine(today, dt_time.min))
+        last_modified = max(last_modified, int(midnight.astimezone(dt_timezone.utc).timestamp()))
+
+    digest = hashlib.md5(json.dumps(fingerprint, default=str).encode('utf-8')).hexdigest()
+    return f'W/"{digest}"', last_modified
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Let clients keep the body but revalidate on every use
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def conditional_get(*models, daily=False):
+    """
+    Answer If-None-Match / If-Modified-Since for a viewset action.
+    `models` are the models the response is computed from; pass daily=True
+    when the output also changes with the date.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            endpoint = f'{self.basename}-{view_method.__name__}'
+            etag, last_modified = compute_validators(endpoint, request, kwargs, models, daily=daily)
+
+            not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if not_modified is not None:
+                return set_validators(not_modified, etag, last_modified)
+
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                set_validators(response, etag, last_modified)
+            return response
+        return wrapper
+    return decorator
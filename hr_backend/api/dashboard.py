@@ -0,0 +1,91 @@
+"""
+Data for /api/dashboard/: the department list, department stats,
+company-wide analytics and employee summary in one response.
+
+The four standalone endpoints each walk the departments and employees again.
+The dashboard reads everything it needs in three queries, run concurrently on
+worker threads, each with its own database connection:
+
+- departments with their manager and annotated employee / position counts;
+- one pass over all employees (department, status, hire date, latest net
+  salary), in employee_id order like department_salary_stats;
+- the latest KPI row per department.
+
+Every block is then built from those rows with the same builders the
+standalone endpoints use (api/analytics.py), so the figures match theirs.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from django.db import connections
+
+from .analytics import (
+    annotated_departments, company_analytics, department_kpis, department_stats, employee_summary,
+    salary_stats_from_rows
+)
+from .instrumentation import measured_queries
+from .models import Employee
+from .replica import routed_snapshot_token, use_analytics_replica
+from .serializers import DepartmentListSerializer
+
+
+def fetch_departments():
+    # Same order as /api/departments/
+    return list(annotated_departments().order_by('department_name'))
+
+
+def fetch_employee_rows():
+    return list(
+        Employee.objects.order_by('employee_id').values_list(
+            'department_id', 'employment_status', 'hire_date', 'latest_payroll__net_salary'
+        )
+    )
+
+
+def run_concurrently(request, *functions):
+    """
+    Call independent read-only functions on worker threads and return their
+    results in order. Inside a transaction the workers' connections could not
+    see its writes, so the functions then run one after another instead.
+    """
+    if any(connection.in_atomic_block for connection in connections.all(initialized_only=True)):
+        return [function() for function in functions]
+
+    metrics = getattr(request, 'metrics', None)
+    on_replica = routed_snapshot_token() is not None
+
+    def call(function):
+        try:
+            # Thread-local state does not follow the work: re-enter query measurement and replica routing
+            with use_analytics_replica() if on_replica else nullcontext(), \
+                    measured_queries(metrics) if metrics else nullcontext():
+                return function()
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=len(functions), thread_name_prefix='dashboard') as executor:
+        futures = [executor.submit(call, function) for function in functions]
+        return [future.result() for future in futures]
+
+
+def build_dashboard(request):
+    departments, employee_rows, latest_kpis = run_concurrently(
+        request, fetch_departments, fetch_employee_rows, department_kpis
+    )
+
+    department_ids = [dept.pk for dept in departments]
+    department_names = {dept.pk: dept.department_name for dept in departments}
+    # Serialized once, shared by the list, stats and analytics blocks
+    department_data = {dept.pk: DepartmentListSerializer(dept).data for dept in departments}
+    salary_stats = salary_stats_from_rows(
+        department_ids, ((dept_id, net_salary) for dept_id, _, _, net_salary in employee_rows)
+    )
+
+    return {
+        'departments': [department_data[dept_id] for dept_id in department_ids],
+        'department_stats': department_stats(departments, department_data),
+        'department_analytics': company_analytics(departments, department_data, salary_stats, latest_kpis),
+        'employee_summary': employee_summary(
+            (department_names.get(dept_id), status, hire_date) for dept_id, status, hire_date, _ in employee_rows
+        )
+    }
@@ -0,0 +1,443 @@
+"""
+Vectorized synthetic HR data for `rebuild_hr_data`, `add_leave_and_benefits`
+and load testing.
+
+Every column of a batch is drawn at once with NumPy (salaries, dates,
+statuses, reviewer assignment); Faker only fills small pools of names,
+addresses and free text that rows sample from. Generators yield batches of
+row tuples in table column order, already in the database's storage format,
+and insert_rows() writes them with one executemany() per batch: Django's
+bulk_create caps SQLite statements at 999 parameters (about 100 rows), which
+is an order of magnitude slower for millions of rows.
+
+All randomness comes from the Generator passed in, so a seed reproduces the
+same dataset (relative to `today`).
+
+For large datasets the work is split into shards (a slice of a department's
+employees, a range of reviews or attendance rows) that run_shards() hands to
+a process pool. Each shard draws from its own child of the run's SeedSequence, so the
+output depends on the seed and the shard layout but not on the number of
+workers or the order they finish in. Workers only generate rows; the calling
+process is the single writer and inserts each shard's rows, in shard order,
+inside its own transaction.
+"""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from functools import lru_cache
+
+import django
+import numpy as np
+from django.db import connections
+from faker import Faker
+
+from .kpis import add_months, month_start
+
+DEFAULT_BATCH_SIZE = 50000
+
+EMPLOYMENT_STATUSES = np.array(['ACTIVE', 'ON_LEAVE'])
+EMPLOYMENT_STATUS_WEIGHTS = [0.8, 0.2]
+ATTENDANCE_STATUSES = np.array(['PRESENT', 'LATE', 'ABSENT'])
+ATTENDANCE_STATUS_WEIGHTS = [0.6, 0.2, 0.2]
+ATTENDANCE_REMARKS = [None, 'On time', 'Late arrival', 'Early departure']
+DEFAULT_SALARY_RANGE = (30000.0, 100000.0)
+
+EMPLOYEE_COLUMNS = [
+    'employee_id', 'employee_code', 'first_name', 'last_name', 'email', 'phone',
+    'date_of_birth', 'gender', 'address', 'hire_date', 'department', 'position',
+    'employment_status', 'created_date', 'updated_date',
+]
+ATTENDANCE_COLUMNS = [
+    'attendance_id', 'employee', 'date', 'check_in_time', 'check_out_time',
+    'total_hours', 'status', 'remarks', 'created_date',
+]
+PAYROLL_COLUMNS = [
+    'payroll_id', 'employee', 'pay_period_start', 'pay_period_end', 'basic_salary',
+    'overtime_hours', 'overtime_rate', 'allowances', 'deductions', 'tax_deduction',
+    'net_salary', 'pay_date', 'created_date',
+]
+REVIEW_COLUMNS = [
+    'review_id', 'employee', 'reviewer', 'review_period_start', 'review_period_end',
+    'goals_score', 'competency_score', 'overall_score', 'strengths',
+    'areas_for_improvement', 'development_plan', 'comments', 'review_date', 'created_date',
+]
+BENEFIT_COLUMNS = [
+    'employee', 'benefit_type', 'benefit_name', 'provider', 'coverage_amount',
+    'employee_contribution', 'company_contribution', 'start_date', 'end_date',
+    'is_active', 'created_date',
+]
+
+
+def make_rng(seed=None):
+    return np.random.default_rng(seed)
+
+
+def shard_seeds(seed, count):
+    """Independent, reproducible seed sequences for `count` shards"""
+    return np.random.SeedSequence(seed).spawn(count)
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+@lru_cache(maxsize=4)
+def text_pools(seed=None, size=500):
+    """
+    Faker-generated values that generated rows sample from. Cached, so each
+    worker process builds the pools of a seed once however many shards it runs.
+    """
+    fake = Faker()
+    if seed is not None:
+        fake.seed_instance(seed)
+    return {
+        'first_name_male': [fake.first_name_male() for _ in range(size)],
+        'first_name_female': [fake.first_name_female() for _ in range(size)],
+        'last_name': [fake.last_name() for _ in range(size)],
+        'phone': [fake.phone_number()[:20] for _ in range(size)],
+        'address': [fake.address() for _ in range(size)],
+        'strengths': [fake.text(max_nb_chars=200) for _ in range(size)],
+        'areas_for_improvement': [fake.text(max_nb_chars=150) for _ in range(size)],
+        'development_plan': [fake.text(max_nb_chars=200) for _ in range(size)],
+        'comments': [fake.text(max_nb_chars=200) for _ in range(size)],
+    }
+
+
+def sample(rng, pool, count):
+    """`count` values drawn from a list with replacement"""
+    values = np.empty(len(pool), dtype=object)
+    values[:] = pool
+    return values[rng.integers(0, len(pool), count)]
+
+
+def date_strings(dates):
+    return np.datetime_as_string(dates, unit='D').tolist()
+
+
+def datetime_strings(datetimes, unit='s'):
+    """UTC datetime64 values in the 'YYYY-MM-DD HH:MM:SS' form Django stores"""
+    return np.char.replace(np.datetime_as_string(datetimes, unit=unit), 'T', ' ').tolist()
+
+
+def days_before(today, rng, max_days, count):
+    """Random dates between `today - max_days` and `today`"""
+    return np.datetime64(today, 'D') - rng.integers(0, max_days + 1, count).astype('timedelta64[D]')
+
+
+def batched_ranges(total, batch_size):
+    for start in range(0, total, batch_size):
+        yield start, min(start + batch_size, total)
+
+
+class EmployeeFrame:
+    """Column arrays of the generated employees that the other tables are built from"""
+
+    def __init__(self, employee_ids, position_ids, min_salary, max_salary):
+        self.employee_ids = employee_ids
+        self.position_ids = position_ids
+        self.min_salary = min_salary
+        self.max_salary = max_salary
+
+    def __len__(self):
+        return len(self.employee_ids)
+
+
+def generate_employees(departments, rng, pools, today, now, first_id=1):
+    """
+    Employees for `departments`: a list of (department_id, employee_count,
+    [(position_id, min_salary, max_salary), ...]) tuples.
+    Returns (EmployeeFrame, rows).
+    """
+    department_ids = []
+    position_ids = []
+    min_salary = []
+    max_salary = []
+    for department_id, count, positions in departments:
+        choice = rng.integers(0, len(positions), count)
+        department_ids.append(np.full(count, department_id))
+        position_ids.append(np.array([position[0] for position in positions])[choice])
+        min_salary.append(np.array([position[1] or np.nan for position in positions], dtype=float)[choice])
+        max_salary.append(np.array([position[2] or np.nan for position in positions], dtype=float)[choice])
+
+    department_ids = np.concatenate(department_ids) if department_ids else np.array([], dtype=int)
+    position_ids = np.concatenate(position_ids) if position_ids else np.array([], dtype=int)
+    total = len(department_ids)
+    employee_ids = np.arange(first_id, first_id + total)
+
+    genders = np.where(rng.random(total) < 0.5, 'MALE', 'FEMALE')
+    first_names = np.where(
+        genders == 'MALE',
+        sample(rng, pools['first_name_male'], total),
+        sample(rng, pools['first_name_female'], total)
+    )
+    last_names = sample(rng, pools['last_name'], total)
+    # 22 to 65 years old, hired within the last 5 years
+    birth_dates = days_before(today, rng, 43 * 365, total) - np.timedelta64(22 * 365, 'D')
+    hire_dates = days_before(today, rng, 5 * 365, total)
+    statuses = rng.choice(EMPLOYMENT_STATUSES, total, p=EMPLOYMENT_STATUS_WEIGHTS)
+
+    rows = list(zip(
+        employee_ids.tolist(),
+        [f'EMP{employee_id:04d}' for employee_id in employee_ids.tolist()],
+        first_names.tolist(),
+        last_names.tolist(),
+        [f'{first.lower()}.{last.lower()}.{employee_id}@company.com'
+         for first, last, employee_id in zip(first_names.tolist(), last_names.tolist(), employee_ids.tolist())],
+        sample(rng, pools['phone'], total).tolist(),
+        date_strings(birth_dates),
+        genders.tolist(),
+        sample(rng, pools['address'], total).tolist(),
+        date_strings(hire_dates),
+        department_ids.tolist(),
+        position_ids.tolist(),
+        statuses.tolist(),
+        [now] * total,
+        [now] * total,
+    ))
+    frame = EmployeeFrame(
+        employee_ids,
+        position_ids,
+        np.concatenate(min_salary) if min_salary else np.array([]),
+        np.concatenate(max_salary) if max_salary else np.array([]),
+    )
+    return frame, rows
+
+
+def generate_attendance(employee_ids, count, rng, today, now, months=6, utc_offset=timedelta(0),
+                        first_id=1, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield batches of `count` attendance rows for random employees over the last `months` months"""
+    span_days = (today - add_months(month_start(today), -months)).days
+    offset = np.timedelta64(int(utc_offset.total_seconds()), 's')
+
+    for start, stop in batched_ranges(count, batch_size):
+        size = stop - start
+        dates = days_before(today, rng, span_days, size)
+        # Check in between 8:00 and 10:59 local time, work 7 to 10 hours
+        check_in = (
+            dates.astype('datetime64[s]')
+            + rng.integers(8 * 3600 // 60, 11 * 3600 // 60, size).astype('timedelta64[m]')
+            - offset
+        )
+        hours = rng.uniform(7, 10, size)
+        check_out = check_in.astype('datetime64[us]') + (hours * 3600e6).astype('timedelta64[us]')
+
+        yield list(zip(
+            range(first_id + start, first_id + stop),
+            employee_ids[rng.integers(0, len(employee_ids), size)].tolist(),
+            date_strings(dates),
+            datetime_strings(check_in),
+            datetime_strings(check_out, unit='us'),
+            np.round(hours, 2).tolist(),
+            rng.choice(ATTENDANCE_STATUSES, size, p=ATTENDANCE_STATUS_WEIGHTS).tolist(),
+            sample(rng, ATTENDANCE_REMARKS, size).tolist(),
+            [now] * size,
+        ))
+
+
+def generate_payroll(employees, months, rng, today, now, first_id=1, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield batches of monthly payroll rows for every employee, newest month first"""
+    total = len(employees)
+    low = np.where(np.isnan(employees.min_salary) | np.isnan(employees.max_salary), DEFAULT_SALARY_RANGE[0], employees.min_salary)
+    high = np.where(np.isnan(employees.min_salary) | np.isnan(employees.max_salary), DEFAULT_SALARY_RANGE[1], employees.max_salary)
+    current_month = month_start(today)
+
+    next_id = first_id
+    for month_offset in range(months):
+        pay_date = add_months(current_month, -month_offset)
+        pay_date_string = pay_date.isoformat()
+        period_end_string = pay_date.replace(day=28).isoformat()
+
+        for start, stop in batched_ranges(total, batch_size):
+            size = stop - start
+            base_salary = low[start:stop] + rng.random(size) * (high[start:stop] - low[start:stop])
+            basic_salary = base_salary * 0.7
+            allowances = base_salary * 0.2
+            overtime_hours = rng.uniform(0, 20, size)
+            overtime_rate = 1.5 * (basic_salary / 160)  # 1.5x hourly rate (160 hours/month)
+            deductions = base_salary * rng.uniform(0.05, 0.15, size)
+            tax_deduction = basic_salary * rng.uniform(0.10, 0.20, size)
+            net_salary = basic_salary + allowances + overtime_hours * overtime_rate - deductions - tax_deduction
+
+            yield list(zip(
+                range(next_id, next_id + size),
+                employees.employee_ids[start:stop].tolist(),
+                [pay_date_string] * size,
+                [period_end_string] * size,
+                np.round(basic_salary, 2).tolist(),
+                np.round(overtime_hours, 2).tolist(),
+                np.round(overtime_rate, 2).tolist(),
+                np.round(allowances, 2).tolist(),
+                np.round(deductions, 2).tolist(),
+                np.round(tax_deduction, 2).tolist(),
+                np.round(net_salary, 2).tolist(),
+                [pay_date_string] * size,
+                [now] * size,
+            ))
+            next_id += size
+
+
+def generate_reviews(employee_ids, rng, pools, today, now, reviewer_ids=None, first_id=1,
+                     batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Yield batches of one annual review per employee, each by a different random
+    employee from `reviewer_ids` (sorted, containing every reviewed employee;
+    defaults to the employees themselves).
+    """
+    if reviewer_ids is None:
+        reviewer_ids = employee_ids
+    total = len(reviewer_ids)
+    for start, stop in batched_ranges(len(employee_ids), batch_size):
+        size = stop - start
+        review_dates = days_before(today, rng, 365, size)
+        goals = np.round(rng.uniform(2.0, 5.0, size), 1)
+        competency = np.round(rng.uniform(2.0, 5.0, size), 1)
+        # Shifting each employee's position by 1..n-1 picks any other employee in O(1)
+        positions = np.searchsorted(reviewer_ids, employee_ids[start:stop])
+        reviewers = (positions + rng.integers(1, total, size)) % total if total > 1 else positions
+
+        yield list(zip(
+            range(first_id + start, first_id + stop),
+            employee_ids[start:stop].tolist(),
+            reviewer_ids[reviewers].tolist(),
+            date_strings(review_dates - np.timedelta64(365, 'D')),
+            date_strings(review_dates),
+            goals.tolist(),
+            competency.tolist(),
+            np.round((goals + competency) / 2, 1).tolist(),
+            sample(rng, pools['strengths'], size).tolist(),
+            sample(rng, pools['areas_for_improvement'], size).tolist(),
+            sample(rng, pools['development_plan'], size).tolist(),
+            sample(rng, pools['comments'], size).tolist(),
+            date_strings(review_dates),
+            [now] * size,
+        ))
+
+
+def generate_benefits(employee_ids, benefit_types, rng, today, now):
+    """
+    3 to 5 distinct benefits from `benefit_types` for each employee; `now` is a
+    UTC datetime64. Rows leave benefit_id to the database.
+    """
+    total = len(employee_ids)
+    type_count = len(benefit_types)
+    counts = rng.integers(min(3, type_count), min(5, type_count) + 1, total)
+    # A random permutation of the types per employee, of which the first `count` are kept
+    order = np.argsort(rng.random((total, type_count)), axis=1)
+    chosen = order[np.arange(type_count) < counts[:, None]]
+    owners = np.repeat(employee_ids, counts)
+    size = len(chosen)
+
+    def column(key):
+        return np.array([benefit[key] for benefit in benefit_types])[chosen]
+
+    start_dates = days_before(today, rng, 729, size) - np.timedelta64(1, 'D')
+    # 10% of benefits have an end date, 1 to 3 years after they start
+    ends = rng.random(size) < 0.1
+    end_dates = start_dates + rng.integers(365, 1096, size).astype('timedelta64[D]')
+    end_strings = np.where(ends, np.datetime_as_string(end_dates, unit='D'), None)
+    is_active = ~ends | (end_dates > np.datetime64(today, 'D'))
+    created = np.datetime64(now, 'us') - rng.integers(1, 31, size).astype('timedelta64[D]')
+
+    return list(zip(
+        owners.tolist(),
+        column('type').tolist(),
+        column('name').tolist(),
+        column('provider').tolist(),
+        np.round(column('coverage_amount') * rng.uniform(0.9, 1.1, size), 2).tolist(),
+        np.round(column('employee_contribution') * rng.uniform(0.8, 1.2, size), 2).tolist(),
+        np.round(column('company_contribution') * rng.uniform(0.9, 1.1, size), 2).tolist(),
+        date_strings(start_dates),
+        end_strings.tolist(),
+        is_active.tolist(),
+        datetime_strings(created, unit='us'),
+    ))
+
+
+def department_shard(task):
+    """Worker: a slice of one department's employees with their payroll"""
+    rng = make_rng(task['seed'])
+    employees, employee_rows = generate_employees(
+        [task['department']], rng, text_pools(task['pool_seed']), task['today'], task['now'],
+        first_id=task['first_id']
+    )
+    payroll = generate_payroll(
+        employees, task['months'], rng, task['today'], task['now'], first_id=task['payroll_first_id']
+    )
+    return {
+        'department_id': task['department'][0],
+        'employees': employee_rows,
+        'payroll': [row for batch in payroll for row in batch]
+    }
+
+
+def review_shard(task):
+    """Worker: reviews for one range of employee ids, by reviewers from another"""
+    employee_ids = np.arange(*task['employee_range'])
+    batches = generate_reviews(
+        employee_ids, make_rng(task['seed']), text_pools(task['pool_seed']), task['today'], task['now'],
+        reviewer_ids=np.arange(*task['reviewer_range']), first_id=task['employee_range'][0],
+        batch_size=len(employee_ids) or 1
+    )
+    return [row for batch in batches for row in batch]
+
+
+def attendance_shard(task):
+    """Worker: one range of attendance rows"""
+    batches = generate_attendance(
+        np.arange(*task['employee_range']), task['count'], make_rng(task['seed']),
+        task['today'], task['now'], months=task['months'], utc_offset=task['utc_offset'],
+        first_id=task['first_id'], batch_size=task['count'] or 1
+    )
+    return [row for batch in batches for row in batch]
+
+
+def benefit_shard(task):
+    """Worker: benefits for a slice of employees"""
+    return generate_benefits(
+        np.array(task['employee_ids']), task['benefit_types'], make_rng(task['seed']),
+        task['today'], task['now']
+    )
+
+
+def run_shards(function, tasks, workers=None):
+    """
+    Yield function(task) for every task, in task order.
+    With more than one worker the tasks run in a process pool; at most two
+    per worker are in flight, so finished shards never pile up in memory
+    ahead of the writer consuming them.
+    """
+    workers = workers or default_workers()
+    if workers == 1:
+        for task in tasks:
+            yield function(task)
+        return
+
+    # Workers started with 'spawn' need Django's app registry before importing the models
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=django.setup)
+    pending = deque()
+    try:
+        for task in tasks:
+            pending.append(executor.submit(function, task))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def insert_rows(model, columns, batches, using='default'):
+    """INSERT row tuples (in `columns` order) with one executemany() per batch"""
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    column_names = ', '.join(quote(model._meta.get_field(name).column) for name in columns)
+    placeholders = ', '.join(['%s'] * len(columns))
+    sql = f'INSERT INTO {quote(model._meta.db_table)} ({column_names}) VALUES ({placeholders})'
+
+    total = 0
+    with connection.cursor() as cursor:
+        for rows in batches:
+            cursor.executemany(sql, rows)
+            total += len(rows)
+    return total
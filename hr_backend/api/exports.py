@@ -0,0 +1,185 @@
+"""
+Streaming NDJSON / CSV exports of the large tables.
+
+Rows are read with values_list(...).iterator(chunk_size) and encoded on the
+fly, so no model instances are built and memory stays flat however many rows
+are exported. Each dataset can be narrowed with ?from= / ?to= (ISO dates on
+its date column), ?employee= and ?department=.
+"""
+import csv
+import json
+from datetime import date, datetime
+
+from django.conf import settings
+from django.db import models
+from django.utils.dateparse import parse_date
+
+from .models import Attendance, Employee, Payroll
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+# Dataset name -> model, (column, lookup) pairs, date column for ?from=/?to=, employee lookup prefix
+EXPORT_DATASETS = {
+    'employees': {
+        'model': Employee,
+        'columns': [
+            ('employee_id', 'employee_id'),
+            ('employee_code', 'employee_code'),
+            ('first_name', 'first_name'),
+            ('last_name', 'last_name'),
+            ('email', 'email'),
+            ('phone', 'phone'),
+            ('gender', 'gender'),
+            ('hire_date', 'hire_date'),
+            ('department_id', 'department_id'),
+            ('position_id', 'position_id'),
+            ('manager_id', 'manager_id'),
+            ('employment_status', 'employment_status'),
+        ],
+        'date_field': 'hire_date',
+        'employee_prefix': '',
+    },
+    'payroll': {
+        'model': Payroll,
+        'columns': [
+            ('payroll_id', 'payroll_id'),
+            ('employee_id', 'employee_id'),
+            ('employee_code', 'employee__employee_code'),
+            ('pay_period_start', 'pay_period_start'),
+            ('pay_period_end', 'pay_period_end'),
+            ('basic_salary', 'basic_salary'),
+            ('overtime_hours', 'overtime_hours'),
+            ('overtime_rate', 'overtime_rate'),
+            ('allowances', 'allowances'),
+            ('deductions', 'deductions'),
+            ('tax_deduction', 'tax_deduction'),
+            ('net_salary', 'net_salary'),
+            ('pay_date', 'pay_date'),
+        ],
+        'date_field': 'pay_period_end',
+        'employee_prefix': 'employee__',
+    },
+    'attendance': {
+        'model': Attendance,
+        'columns': [
+            ('attendance_id', 'attendance_id'),
+            ('employee_id', 'employee_id'),
+            ('employee_code', 'employee__employee_code'),
+            ('date', 'date'),
+            ('check_in_time', 'check_in_time'),
+            ('check_out_time', 'check_out_time'),
+            ('total_hours', 'total_hours'),
+            ('status', 'status'),
+            ('remarks', 'remarks'),
+        ],
+        'date_field': 'date',
+        'employee_prefix': 'employee__',
+    },
+}
+
+
+class ExportError(ValueError):
+    """Invalid export request parameters"""
+
+
+def export_rows(dataset, params):
+    """Filtered, primary-key ordered values_list queryset for a dataset"""
+    spec = EXPORT_DATASETS[dataset]
+    model = spec['model']
+    queryset = model.objects.all()
+
+    for param, lookup in (('from', 'gte'), ('to', 'lte')):
+        value = params.get(param)
+        if value:
+            try:
+                parsed = parse_date(value)
+            except ValueError:
+                parsed = None
+            if parsed is None:
+                raise ExportError(f"'{param}' must be a date in YYYY-MM-DD format")
+            queryset = queryset.filter(**{f"{spec['date_field']}__{lookup}": parsed})
+
+    prefix = spec['employee_prefix']
+    for param, lookup in (('employee', f'{prefix}employee_id'), ('department', f'{prefix}department_id')):
+        value = params.get(param)
+        if value:
+            if not value.isdigit():
+                raise ExportError(f"'{param}' must be an id")
+            queryset = queryset.filter(**{lookup: int(value)})
+
+    lookups = [lookup for _, lookup in spec['columns']]
+    return queryset.order_by(model._meta.pk.name).values_list(*lookups)
+
+
+def export_columns(dataset):
+    return [column for column, _ in EXPORT_DATASETS[dataset]['columns']]
+
+
+def _datetime_positions(dataset):
+    """Indexes of DateTimeField columns, which are written in ISO 8601 like dates"""
+    spec = EXPORT_DATASETS[dataset]
+    positions = []
+    for index, (_, lookup) in enumerate(spec['columns']):
+        if '__' not in lookup and isinstance(spec['model']._meta.get_field(lookup), models.DateTimeField):
+            positions.append(index)
+    return positions
+
+
+def _encode_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+class _LineBuffer:
+    """File-like object handing back what csv.writer writes instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+def stream_ndjson(dataset, rows, chunk_size=None):
+    """Yield the rows as NDJSON, one object per line, a chunk of lines at a time"""
+    chunk_size = chunk_size or getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+    columns = export_columns(dataset)
+    encode = json.JSONEncoder(default=_encode_value, separators=(',', ':')).encode
+
+    lines = []
+    for row in rows.iterator(chunk_size=chunk_size):
+        lines.append(encode(dict(zip(columns, row))))
+        if len(lines) >= chunk_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def stream_csv(dataset, rows, chunk_size=None):
+    """Yield the rows as CSV with a header line, a chunk of lines at a time"""
+    chunk_size = chunk_size or getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+    writer = csv.writer(_LineBuffer())
+    datetime_positions = _datetime_positions(dataset)
+
+    yield writer.writerow(export_columns(dataset))
+    lines = []
+    for row in rows.iterator(chunk_size=chunk_size):
+        if datetime_positions:
+            row = list(row)
+            for index in datetime_positions:
+                if row[index] is not None:
+                    row[index] = row[index].isoformat()
+        lines.append(writer.writerow(row))
+        if len(lines) >= chunk_size:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+EXPORT_STREAMS = {
+    'ndjson': stream_ndjson,
+    'csv': stream_csv,
+}
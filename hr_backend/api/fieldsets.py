@@ -0,0 +1,174 @@
+"""
+Sparse fieldsets for the employee and department endpoints.
+
+`?fields=employee_id,full_name,email` renders only the listed fields,
+`?omit=address,recent_attendance` renders all fields but the listed ones
+(both take comma-separated top-level field names; `fields` wins when both are
+given). The fieldset narrows the query as well as the output:
+
+- columns are restricted with only() to the ones the remaining fields read;
+- only the relations a remaining nested serializer renders are joined with
+  select_related();
+- history prefetches and the analytics blocks the views add next to the
+  serializer data are skipped when their fields are left out.
+
+Serializers opt in through SparseFieldsetSerializer. Model fields and nested
+serializers are mapped to columns automatically; every SerializerMethodField
+has to say which model fields it reads in Meta.field_sources ([] for values
+that come from annotations or prefetches).
+"""
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from rest_framework import serializers
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+
+def _names(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def requested_fieldset(query_params, available):
+    """
+    Field names to render, in `available` order, or None when the request
+    does not ask for a sparse fieldset. Unknown names are a validation error.
+    """
+    fields = query_params.get(FIELDS_PARAM)
+    omit = query_params.get(OMIT_PARAM)
+    if fields is None and omit is None:
+        return None
+
+    param, names = (FIELDS_PARAM, _names(fields)) if fields is not None else (OMIT_PARAM, _names(omit))
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise serializers.ValidationError({
+            param: f'Unknown field(s): {", ".join(unknown)}. Available: {", ".join(available)}'
+        })
+    if param == FIELDS_PARAM:
+        return [name for name in available if name in names]
+    return [name for name in available if name not in names]
+
+
+def is_model_path(model, path):
+    """Whether a `__`-separated lookup path names a field of `model` (annotations do not)"""
+    for part in path.split('__'):
+        if model is None:
+            return False
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return False
+        model = field.related_model
+    return True
+
+
+class SparseFieldsetSerializer:
+    """
+    Serializer mixin: `fields=` drops every other field, sparse_queryset()
+    loads just the columns and relations the remaining fields read.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def column_lookups(cls, serializer, prefix=''):
+        """(columns, relations) the fields of a serializer instance read, relative to its model"""
+        model = serializer.Meta.model
+        field_sources = getattr(serializer.Meta, 'field_sources', {})
+        columns, relations = set(), set()
+
+        for name, field in serializer.fields.items():
+            if name in field_sources:
+                lookups = field_sources[name]
+            elif isinstance(field, serializers.ListSerializer):
+                # Nested collections are prefetched by the view
+                continue
+            elif isinstance(field, serializers.BaseSerializer):
+                relation = field.source.replace('.', '__')
+                nested_columns, nested_relations = cls.column_lookups(field, f'{prefix}{relation}__')
+                columns |= nested_columns | {f'{prefix}{relation}'}
+                relations |= nested_relations | {f'{prefix}{relation}'}
+                continue
+            elif isinstance(field, serializers.SerializerMethodField):
+                raise ImproperlyConfigured(
+                    f'{type(serializer).__name__}.Meta.field_sources has no entry for the method field {name!r}'
+                )
+            else:
+                lookups = [field.source.replace('.', '__')]
+
+            for lookup in lookups:
+                if is_model_path(model, lookup):
+                    columns.add(f'{prefix}{lookup}')
+        return columns, relations
+
+    @classmethod
+    def sparse_queryset(cls, queryset, fields, extra_columns=()):
+        """
+        Restrict `queryset` to what rendering `fields` reads, plus `extra_columns`
+        (cursor ordering, columns the view itself uses). Joins only the relations
+        the remaining nested serializers render.
+        """
+        columns, relations = cls.column_lookups(cls(fields=fields))
+        columns |= set(extra_columns)
+        return queryset.select_related(None).select_related(*sorted(relations)).only(*sorted(columns))
+
+
+class SparseFieldsetViewMixin:
+    """
+    Viewset mixin applying ?fields= / ?omit= to the serializer of the
+    `sparse_actions`. `sparse_extra_fields` names, per action, the blocks the
+    action adds next to the serializer data (e.g. 'analytics'), mapped to the
+    model fields computing them reads.
+    """
+    sparse_actions = ('list', 'retrieve')
+    sparse_extra_fields = {}
+
+    def get_fieldset(self, serializer_class=None):
+        """
+        Requested field names (serializer fields and extra blocks) for the action's
+        serializer, or for `serializer_class` in custom actions; None when not sparse.
+        """
+        fieldsets = self.__dict__.setdefault('_fieldsets', {})
+        if serializer_class is None:
+            if self.action not in self.sparse_actions:
+                return None
+            serializer_class = self.get_serializer_class()
+        if serializer_class not in fieldsets:
+            extra_fields = self.sparse_extra_fields.get(self.action, {})
+            available = list(serializer_class().fields) + list(extra_fields)
+            fieldsets[serializer_class] = requested_fieldset(self.request.query_params, available)
+        return fieldsets[serializer_class]
+
+    def renders(self, name):
+        """Whether the response includes the field or block `name`"""
+        fieldset = self.get_fieldset()
+        return fieldset is None or name in fieldset
+
+    def serializer_fieldset(self, serializer_class=None):
+        """The requested serializer fields, without the extra blocks"""
+        fieldset = self.get_fieldset(serializer_class)
+        if fieldset is None:
+            return None
+        extra_fields = self.sparse_extra_fields.get(self.action, {})
+        return [name for name in fieldset if name not in extra_fields]
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.serializer_fieldset()
+        if fields is not None:
+            kwargs.setdefault('fields', fields)
+        return super().get_serializer(*args, **kwargs)
+
+    def sparse_queryset(self, queryset, serializer_class=None, extra_columns=()):
+        """Narrow `queryset` to the requested fieldset; unchanged when none was requested"""
+        fieldset = self.get_fieldset(serializer_class)
+        if fieldset is None:
+            return queryset
+        for name, columns in self.sparse_extra_fields.get(self.action, {}).items():
+            if name in fieldset:
+                extra_columns = [*extra_columns, *columns]
+        serializer_class = serializer_class or self.get_serializer_class()
+        return serializer_class.sparse_queryset(queryset, self.serializer_fieldset(serializer_class), extra_columns)
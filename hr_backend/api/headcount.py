@@ -0,0 +1,201 @@
+"""
+Headcount history time series from the per-department CSV files (sample/*.csv).
+
+Every file is loaded into one department x month matrix (pandas), aligned on
+a continuous monthly axis spanning all files. Months a department has no
+figure for are NaN, so departments covering different month ranges line up
+correctly. Per-department statistics (first and last figures, growth, peak,
+average) and company-wide monthly totals are computed as vectorized NumPy
+operations over the matrix:
+
+- a department's figures start and end at its own first and last month on
+  record; growth is last over first;
+- monthly totals add up the departments reporting that month; months no
+  department reports are left out.
+
+cached_headcount_history() builds the department_headcount_history.json document
+written by generate_headcount_json.py and served by /api/headcount/history/.
+"""
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .kpis import SAMPLE_HEADCOUNT_FILES, default_sample_dir
+
+MONTH_FORMAT = '%m/%Y'
+
+DEPARTMENT_NAMES = {
+    'COM': 'Compliance',
+    'COP': 'Corporate',
+    'FIN': 'Finance & Accounting',
+    'HR': 'Human Resources',
+    'IT': 'Information Technology',
+    'OPS': 'Operations',
+    'RB': 'Retail Banking',
+    'RM': 'Risk Management',
+    'TO': 'Transformation Office',
+    'TM': 'Treasury & Markets',
+}
+
+
+def headcount_files(sample_dir=None):
+    """[(department code, department name, path)] for every headcount CSV, by file name"""
+    codes = {file_name: code for code, file_name in SAMPLE_HEADCOUNT_FILES.items()}
+    files = []
+    for path in sorted(Path(sample_dir or default_sample_dir()).glob('*.csv')):
+        code = codes.get(path.name)
+        if code is None:
+            files.append((path.stem[:3].upper(), path.stem.title(), path))
+        else:
+            files.append((code, DEPARTMENT_NAMES[code], path))
+    return files
+
+
+def read_headcount_series(path):
+    """A month/year,headcount CSV as a Series indexed by monthly Period (the last row wins for repeated months)"""
+    frame = pd.read_csv(path, dtype={'month/year': str, 'headcount': 'int64'})
+    months = pd.PeriodIndex(pd.to_datetime(frame['month/year'], format=MONTH_FORMAT).dt.to_period('M'))
+    series = pd.Series(frame['headcount'].to_numpy(), index=months)
+    return series.groupby(level=0).last()
+
+
+def load_headcount_matrix(files):
+    """
+    Department x month float matrix (NaN where a department has no figure),
+    indexed by department code, over every month from the earliest to the latest.
+    """
+    series = {code: read_headcount_series(path) for code, _, path in files}
+    series = {code: values for code, values in series.items() if len(values)}
+    if not series:
+        return pd.DataFrame(dtype=float)
+
+    first_month = min(values.index.min() for values in series.values())
+    last_month = max(values.index.max() for values in series.values())
+    months = pd.period_range(first_month, last_month, freq='M')
+    return pd.DataFrame(
+        {code: values.reindex(months) for code, values in series.items()}, index=months, dtype=float
+    ).T
+
+
+def department_statistics(matrix):
+    """
+    Per-department figures as arrays aligned with the matrix rows. Every row
+    must have at least one figure.
+    """
+    values = matrix.to_numpy()
+    present = ~np.isnan(values)
+    month_count = values.shape[1]
+    rows = np.arange(values.shape[0])
+
+    first = present.argmax(axis=1)
+    last = month_count - 1 - present[:, ::-1].argmax(axis=1)
+    starting = values[rows, first]
+    ending = values[rows, last]
+    data_points = present.sum(axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = np.where((data_points >= 2) & (starting != 0), (ending - starting) / starting * 100, 0.0)
+
+    return {
+        'first': first,
+        'last': last,
+        'starting': starting,
+        'ending': ending,
+        'data_points': data_points,
+        'growth_percent': growth,
+        'average': np.nanmean(values, axis=1),
+        'peak': np.nanmax(values, axis=1),
+        # First month at the peak
+        'peak_index': np.nanargmax(values, axis=1),
+    }
+
+
+def monthly_totals(matrix):
+    """{month: total headcount of the departments reporting it}"""
+    totals = matrix.sum(axis=0, min_count=1).dropna()
+    return {month.strftime(MONTH_FORMAT): int(total) for month, total in totals.items()}
+
+
+def summary_entry(name, headcount, total):
+    return {
+        'name': name,
+        'headcount': headcount,
+        'percentage_of_total': round(headcount / total * 100, 2) if total else 0
+    }
+
+
+def build_headcount_history(files):
+    """The headcount history document for a list of headcount_files() entries"""
+    names = {code: name for code, name, _ in files}
+    matrix = load_headcount_matrix(files)
+    labels = [month.strftime(MONTH_FORMAT) for month in matrix.columns]
+    departments = {}
+
+    if len(matrix):
+        stats = department_statistics(matrix)
+        values = matrix.to_numpy()
+        for row, code in enumerate(matrix.index):
+            present = ~np.isnan(values[row])
+            starting = int(stats['starting'][row])
+            ending = int(stats['ending'][row])
+            first_label = labels[stats['first'][row]]
+            last_label = labels[stats['last'][row]]
+            departments[names[code]] = {
+                'department_code': code,
+                'current_headcount': ending,
+                'growth_rate_percent': round(float(stats['growth_percent'][row]), 2),
+                'average_headcount': round(float(stats['average'][row]), 1),
+                'peak_headcount': int(stats['peak'][row]),
+                'peak_month': labels[stats['peak_index'][row]],
+                'data_points': int(stats['data_points'][row]),
+                'historical_data': [
+                    {'month_year': labels[month], 'headcount': int(values[row, month])}
+                    for month in np.flatnonzero(present)
+                ],
+                'trends': {
+                    'starting_headcount': starting,
+                    'ending_headcount': ending,
+                    'total_growth': ending - starting,
+                    'period_covered': f"{first_label} to {last_label}"
+                }
+            }
+
+    current = {name: department['current_headcount'] for name, department in departments.items()}
+    total_current_headcount = sum(current.values())
+    largest = max(current, key=current.get) if current else None
+    smallest = min(current, key=current.get) if current else None
+
+    return {
+        'metadata': {
+            'generated_timestamp': datetime.now().isoformat(),
+            'data_source': 'CSV files from sample folder',
+            'total_departments': len(departments),
+            'data_period': f"{labels[0]} to {labels[-1]}" if labels else "N/A"
+        },
+        'summary': {
+            'total_current_headcount': total_current_headcount,
+            'average_headcount_per_department': round(total_current_headcount / len(departments), 1) if departments else 0,
+            'largest_department': summary_entry(largest, current[largest], total_current_headcount) if largest else None,
+            'smallest_department': summary_entry(smallest, current[smallest], total_current_headcount) if smallest else None
+        },
+        'departments': departments,
+        'monthly_totals': monthly_totals(matrix) if len(matrix) else {}
+    }
+
+
+@lru_cache(maxsize=8)
+def _cached_history(files, versions):
+    return build_headcount_history(list(files))
+
+
+def cached_headcount_history(sample_dir=None):
+    """
+    The headcount history document for the CSV files in `sample_dir` (sample/
+    by default). Kept in memory until one of the files changes.
+    """
+    files = tuple(headcount_files(sample_dir))
+    versions = tuple(path.stat().st_mtime_ns for _, _, path in files)
+    return _cached_history(files, versions)
@@ -0,0 +1,239 @@
+"""
+Per-request instrumentation (RequestMetricsMiddleware).
+
+Every request routed to a view is tagged with the action that served it
+(`DepartmentViewSet.retrieve`, `EmployeeViewSet.analytics_summary`, or the URL
+name of a plain view such as `export`) and measured: SQL queries and SQL time
+on every database alias, time spent rendering the response data
+(serialization), time spent compressing it (api/compression.py) and wall time. The measurements are
+
+- attached to the response as `X-Query-Count` and `Server-Timing` headers, and
+  as `response.metrics` for the test helpers in api/testing.py;
+- checked against settings.QUERY_BUDGETS: requests running more queries than
+  their action's budget are logged and counted;
+- aggregated per action for this process and served by /api/_metrics in the
+  Prometheus text format, with percentiles over the most recent requests.
+
+Queries a streaming response runs while it is being sent (the /api/export/
+endpoints) happen after the middleware returns and are not counted.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+# Recent requests per action kept for the percentiles
+SAMPLE_SIZE = 1000
+QUANTILES = (0.5, 0.9, 0.99)
+
+# RequestMetrics attribute, Prometheus metric name, help text
+MEASURES = (
+    ('wall_time', 'hr_request_duration_seconds', 'Wall time of the request'),
+    ('sql_time', 'hr_request_sql_seconds', 'Time spent executing SQL queries'),
+    ('queries', 'hr_request_sql_queries', 'SQL queries executed'),
+    ('serialization_time', 'hr_request_serialization_seconds', 'Time spent rendering the response data'),
+    ('compression_time', 'hr_request_compression_seconds', 'Time spent compressing the response body'),
+)
+
+_metrics_lock = threading.Lock()
+_metrics = {}
+
+
+def query_budget(action):
+    """Most queries `action` may run (settings.QUERY_BUDGETS), None if unbudgeted"""
+    return getattr(settings, 'QUERY_BUDGETS', {}).get(action)
+
+
+def action_name(request):
+    """ViewSet.action for viewset routes, the URL name for other views, None when nothing matched"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None
+    view = match.func
+    actions = getattr(view, 'actions', None)
+    if actions:
+        method = request.method.lower()
+        return f"{view.cls.__name__}.{actions.get(method, method)}"
+    return match.view_name
+
+
+class RequestMetrics:
+    """Measurements of one request; also the execute_wrapper() counting its queries"""
+
+    def __init__(self):
+        # Worker threads may run queries for the same request (see measured_queries)
+        self._lock = threading.Lock()
+        self.action = None
+        self.queries = 0
+        self.statements = []
+        self.sql_time = 0.0
+        self.serialization_time = 0.0
+        self.compression_time = 0.0
+        self.wall_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.sql_time += elapsed
+                self.queries += 1
+                self.statements.append(sql)
+
+    @property
+    def query_budget(self):
+        return query_budget(self.action)
+
+    @property
+    def over_budget(self):
+        budget = self.query_budget
+        return budget is not None and self.queries > budget
+
+
+@contextmanager
+def measured_queries(metrics):
+    """Count the queries this thread runs on any database alias into `metrics`"""
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(metrics))
+        yield
+
+
+def record_request(metrics):
+    with _metrics_lock:
+        entry = _metrics.get(metrics.action)
+        if entry is None:
+            entry = _metrics[metrics.action] = {
+                'count': 0,
+                'over_budget': 0,
+                'sums': {attribute: 0 for attribute, _, _ in MEASURES},
+                'samples': {attribute: deque(maxlen=SAMPLE_SIZE) for attribute, _, _ in MEASURES},
+            }
+        entry['count'] += 1
+        entry['over_budget'] += metrics.over_budget
+        for attribute, _, _ in MEASURES:
+            value = getattr(metrics, attribute)
+            entry['sums'][attribute] += value
+            entry['samples'][attribute].append(value)
+
+
+def reset_request_metrics():
+    with _metrics_lock:
+        _metrics.clear()
+
+
+def percentile(sorted_values, quantile):
+    """Nearest-rank percentile of a sorted, non-empty list"""
+    return sorted_values[min(len(sorted_values) - 1, int(quantile * len(sorted_values)))]
+
+
+def request_metrics():
+    """Per-action counts, sums and percentiles for this process"""
+    with _metrics_lock:
+        entries = {
+            action: (entry['count'], entry['over_budget'], dict(entry['sums']),
+                     {attribute: sorted(samples) for attribute, samples in entry['samples'].items()})
+            for action, entry in _metrics.items()
+        }
+    return {
+        action: {
+            'count': count,
+            'over_budget': over_budget,
+            'query_budget': query_budget(action),
+            **{
+                attribute: {
+                    'sum': sums[attribute],
+                    'quantiles': {quantile: percentile(samples[attribute], quantile) for quantile in QUANTILES},
+                }
+                for attribute, _, _ in MEASURES
+            }
+        }
+        for action, (count, over_budget, sums, samples) in entries.items()
+    }
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus():
+    """request_metrics() in the Prometheus text exposition format"""
+    actions = sorted(request_metrics().items())
+    lines = []
+    for attribute, name, description in MEASURES:
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} summary']
+        for action, entry in actions:
+            label = f'action="{_label(action)}"'
+            for quantile, value in entry[attribute]['quantiles'].items():
+                lines.append(f'{name}{{{label},quantile="{quantile}"}} {value:g}')
+            lines.append(f'{name}_sum{{{label}}} {entry[attribute]["sum"]:g}')
+            lines.append(f'{name}_count{{{label}}} {entry["count"]}')
+
+    lines += [
+        '# HELP hr_request_query_budget Most SQL queries the action may run (settings.QUERY_BUDGETS)',
+        '# TYPE hr_request_query_budget gauge',
+    ]
+    lines += [
+        f'hr_request_query_budget{{action="{_label(action)}"}} {entry["query_budget"]}'
+        for action, entry in actions if entry['query_budget'] is not None
+    ]
+    lines += [
+        '# HELP hr_request_query_budget_exceeded_total Requests that ran more SQL queries than their budget',
+        '# TYPE hr_request_query_budget_exceeded_total counter',
+    ]
+    lines += [
+        f'hr_request_query_budget_exceeded_total{{action="{_label(action)}"}} {entry["over_budget"]}'
+        for action, entry in actions if entry['query_budget'] is not None
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+class RequestMetricsMiddleware:
+    """Measure every request (see the module docstring); install it first in MIDDLEWARE"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = request.metrics = RequestMetrics()
+        started = time.perf_counter()
+        with measured_queries(metrics):
+            response = self.get_response(request)
+        metrics.wall_time = time.perf_counter() - started
+
+        metrics.action = action_name(request)
+        if metrics.action is not None:
+            record_request(metrics)
+            if metrics.over_budget:
+                logger.warning(
+                    '%s ran %d SQL queries, over its budget of %d (%s)',
+                    metrics.action, metrics.queries, metrics.query_budget, request.get_full_path()
+                )
+
+        response['X-Query-Count'] = str(metrics.queries)
+        response['Server-Timing'] = (
+            f'sql;dur={metrics.sql_time * 1000:.2f}, '
+            f'serialize;dur={metrics.serialization_time * 1000:.2f}, '
+            f'compress;dur={metrics.compression_time * 1000:.2f}, '
+            f'total;dur={metrics.wall_time * 1000:.2f}'
+        )
+        response.metrics = metrics
+        return response
+
+    def process_template_response(self, request, response):
+        # Runs right before a DRF Response renders its data; time the rendering
+        started = time.perf_counter()
+
+        def rendered(response):
+            request.metrics.serialization_time += time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
@@ -0,0 +1,239 @@
+"""
+Deterministic department KPIs: monthly headcount, growth and turnover.
+
+DepartmentMonthlyKPI holds one row per department and month. Headcount comes
+from imported history (sample/*.csv, source='CSV') for the months it covers
+and from employee records otherwise: an employee counts from their hire month
+until the month they moved to a leaving status (EmploymentStatusChange log).
+A department's series is recomputed whenever one of its employees changes
+(see api/signals.py), and only the months whose figures moved are written;
+`rebuild_department_kpis` rewrites every row.
+
+- headcount_growth_percent: change against the same month a year earlier,
+  or against the earliest month on record when there is less history
+- turnover_rate_percent: leavers over the trailing 12 months divided by the
+  average headcount over those months
+"""
+import csv
+from collections import Counter
+from datetime import date, datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .cache import invalidate_on_commit
+from .models import Department, DepartmentMonthlyKPI, Employee, EmploymentStatusChange
+
+LEAVING_STATUSES = ('TERMINATED', 'INACTIVE')
+GROWTH_WINDOW_MONTHS = 12
+TURNOVER_WINDOW_MONTHS = 12
+
+# DepartmentMonthlyKPI columns computed by department_series()
+KPI_COLUMNS = ('headcount', 'hires', 'leavers', 'headcount_growth_percent', 'turnover_rate_percent', 'source')
+
+# Headcount history files shipped in sample/, by department code
+SAMPLE_HEADCOUNT_FILES = {
+    'COM': 'compliance.csv',
+    'COP': 'coporate.csv',
+    'FIN': 'finance_accounting.csv',
+    'HR': 'human_resource.csv',
+    'IT': 'it_digital.csv',
+    'OPS': 'operations.csv',
+    'RB': 'retail_banking.csv',
+    'RM': 'risk_management.csv',
+    'TO': 'transformation_office.csv',
+    'TM': 'treasury_markets.csv',
+}
+
+
+def default_sample_dir():
+    return Path(settings.BASE_DIR).parent / 'sample'
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    years, month_index = divmod(month.month - 1 + count, 12)
+    return date(month.year + years, month_index + 1, 1)
+
+
+def month_range(first, last):
+    months = []
+    month = first
+    while month <= last:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def read_headcount_csv(file_path):
+    """Read a month/year,headcount CSV into {month: headcount}"""
+    headcounts = {}
+    with open(file_path, 'r', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            month = datetime.strptime(row['month/year'], '%m/%Y').date()
+            headcounts[month] = int(row['headcount'])
+    return headcounts
+
+
+def employee_movements(department_id):
+    """Count hires and departures per month for the department's employees"""
+    employees = Employee.objects.filter(department_id=department_id).values_list(
+        'employee_id', 'hire_date', 'employment_status', 'updated_date'
+    )
+    departures = dict(
+        EmploymentStatusChange.objects.filter(
+            employee__department_id=department_id, new_status__in=LEAVING_STATUSES
+        ).values('employee_id').annotate(last_change=Max('changed_date')).values_list('employee_id', 'last_change')
+    )
+    return count_movements(employees, departures)
+
+
+def count_movements(employees, departures):
+    """
+    Hires and leavers per month from (employee_id, hire_date, employment_status,
+    updated_date) rows and {employee_id: last change to a leaving status}
+    """
+    hires = Counter()
+    leavers = Counter()
+    for employee_id, hire_date, status, updated_date in employees:
+        hires[month_start(hire_date)] += 1
+        if status in LEAVING_STATUSES:
+            # Without a logged transition, the last update is the best departure date we have
+            left_at = departures.get(employee_id) or updated_date
+            leavers[month_start(left_at.date() if left_at else hire_date)] += 1
+    return hires, leavers
+
+
+def compute_department_series(department_id, csv_headcounts=None, today=None):
+    """Build the monthly KPI rows (as dicts) for one department"""
+    hires, leavers = employee_movements(department_id)
+    return department_series(hires, leavers, csv_headcounts, today)
+
+
+def department_series(hires, leavers, csv_headcounts=None, today=None):
+    """Monthly KPI rows (as dicts) from monthly hire and leaver counts and imported headcounts"""
+    csv_headcounts = csv_headcounts or {}
+    current_month = month_start(today or timezone.localdate())
+
+    known_months = list(hires) + list(csv_headcounts)
+    if not known_months:
+        return []
+
+    last_month = max([current_month] + list(csv_headcounts))
+    rows = []
+    hired_total = 0
+    left_total = 0
+    for month in month_range(min(known_months), last_month):
+        hired_total += hires[month]
+        left_total += leavers[month]
+
+        if month in csv_headcounts:
+            # Imported history only has totals, so movements are the net monthly change
+            headcount = csv_headcounts[month]
+            previous = rows[-1]['headcount'] if rows else headcount
+            month_hires = max(headcount - previous, 0)
+            month_leavers = max(previous - headcount, 0)
+            source = 'CSV'
+        else:
+            headcount = hired_total - left_total
+            month_hires = hires[month]
+            month_leavers = leavers[month]
+            source = 'EMPLOYEES'
+
+        rows.append({
+            'month': month,
+            'headcount': headcount,
+            'hires': month_hires,
+            'leavers': month_leavers,
+            'source': source
+        })
+
+    for index, row in enumerate(rows):
+        base = rows[max(index - GROWTH_WINDOW_MONTHS, 0)]['headcount']
+        row['headcount_growth_percent'] = round((row['headcount'] - base) / base * 100, 2) if index > 0 and base > 0 else 0
+
+        window = rows[max(index - TURNOVER_WINDOW_MONTHS + 1, 0):index + 1]
+        average_headcount = sum(r['headcount'] for r in window) / len(window)
+        window_leavers = sum(r['leavers'] for r in window)
+        row['turnover_rate_percent'] = round(window_leavers / average_headcount * 100, 2) if average_headcount > 0 else 0
+
+    return rows
+
+
+def imported_headcounts(department_id):
+    """Previously imported CSV headcounts for a department"""
+    return dict(
+        DepartmentMonthlyKPI.objects.filter(department_id=department_id, source='CSV').values_list('month', 'headcount')
+    )
+
+
+def replace_department_kpis(department_id, csv_headcounts):
+    rows = compute_department_series(department_id, csv_headcounts)
+    now = timezone.now()
+    with transaction.atomic():
+        DepartmentMonthlyKPI.objects.filter(department_id=department_id).delete()
+        DepartmentMonthlyKPI.objects.bulk_create([
+            DepartmentMonthlyKPI(department_id=department_id, updated_date=now, **row) for row in rows
+        ])
+        invalidate_on_commit(DepartmentMonthlyKPI)
+    return len(rows)
+
+
+def refresh_department_kpis(department_id):
+    """
+    Recompute one department's KPI rows, keeping its imported history.
+    The series is compared with the stored rows and only the months that
+    differ are written: a hire or departure changes the rows from its month
+    onward, most other updates none.
+    """
+    if department_id is None:
+        return 0
+    stored = {kpi.month: kpi for kpi in DepartmentMonthlyKPI.objects.filter(department_id=department_id)}
+    csv_headcounts = {month: kpi.headcount for month, kpi in stored.items() if kpi.source == 'CSV'}
+    rows = compute_department_series(department_id, csv_headcounts)
+
+    now = timezone.now()
+    created = []
+    changed = []
+    for row in rows:
+        kpi = stored.pop(row['month'], None)
+        if kpi is None:
+            created.append(DepartmentMonthlyKPI(department_id=department_id, updated_date=now, **row))
+        elif any(getattr(kpi, column) != row[column] for column in KPI_COLUMNS):
+            for column in KPI_COLUMNS:
+                setattr(kpi, column, row[column])
+            kpi.updated_date = now
+            changed.append(kpi)
+    # Whatever is left is before the first hire now on record
+    removed = [kpi.pk for kpi in stored.values()]
+
+    if created or changed or removed:
+        with transaction.atomic():
+            DepartmentMonthlyKPI.objects.filter(pk__in=removed).delete()
+            DepartmentMonthlyKPI.objects.bulk_update(changed, KPI_COLUMNS + ('updated_date',))
+            DepartmentMonthlyKPI.objects.bulk_create(created)
+            invalidate_on_commit(DepartmentMonthlyKPI)
+    return len(rows)
+
+
+def rebuild_department_kpis(csv_dir=None):
+    """
+    Recompute KPI rows for every department.
+    With csv_dir, headcount history is (re)imported from the sample CSV files;
+    otherwise previously imported history is kept.
+    """
+    total_rows = 0
+    for department_id, department_code in Department.objects.values_list('department_id', 'department_code'):
+        csv_headcounts = imported_headcounts(department_id)
+        if csv_dir is not None and department_code in SAMPLE_HEADCOUNT_FILES:
+            file_path = Path(csv_dir) / SAMPLE_HEADCOUNT_FILES[department_code]
+            if file_path.exists():
+                csv_headcounts = read_headcount_csv(file_path)
+        total_rows += replace_department_kpis(department_id, csv_headcounts)
+    return total_rows
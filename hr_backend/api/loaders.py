@@ -0,0 +1,457 @@
+"""
+Bulk loading of HR exports in the sample/ formats (load_hr_data).
+
+A directory may hold departments, employees, payroll and attendance records
+as JSON arrays (`<dataset>*.json`) or one object per line
+(`<dataset>*.ndjson`), plus the per-department headcount CSVs named in
+kpis.SAMPLE_HEADCOUNT_FILES. Records are read one at a time (JSON arrays are
+decoded incrementally, never loaded whole) and written in chunks:
+
+- the export's string ids (EMP001, ENG, SWE_SR) are resolved to primary keys
+  with one query per chunk and referenced table;
+- rows are upserted with bulk_create(update_conflicts=True) on their natural
+  key (department_code, position_code, employee_code, or external_id for
+  payroll and attendance), so loading the same files again updates the rows
+  instead of duplicating them.
+
+Memory therefore depends on the chunk size, not on the size of the files.
+"""
+import json
+from datetime import date, timedelta
+from itertools import islice
+from pathlib import Path
+
+from django.db import IntegrityError, connection
+from django.utils import timezone
+
+from .kpis import SAMPLE_HEADCOUNT_FILES, add_months, read_headcount_csv
+from .models import Attendance, Department, DepartmentMonthlyKPI, Employee, Payroll, Position
+
+DEFAULT_CHUNK_SIZE = 2000
+READ_SIZE = 1 << 16
+
+# Datasets in load order: each one only references datasets loaded before it
+DATASETS = ('departments', 'employees', 'payroll', 'attendance')
+
+EMPLOYMENT_STATUSES = {
+    'active': 'ACTIVE',
+    'inactive': 'INACTIVE',
+    'leave': 'ON_LEAVE',
+    'on leave': 'ON_LEAVE',
+    'on_leave': 'ON_LEAVE',
+    'terminated': 'TERMINATED',
+}
+GENDERS = {
+    'male': 'MALE',
+    'female': 'FEMALE',
+}
+
+
+class LoadError(ValueError):
+    """A record that cannot be loaded"""
+
+
+def iter_json_array(file, read_size=READ_SIZE):
+    """Yield the elements of a top-level JSON array, decoding one element at a time"""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    eof = False
+    started = False
+    separators = ' \t\r\n'
+
+    def fill():
+        nonlocal buffer, position, eof
+        chunk = file.read(read_size)
+        buffer = buffer[position:] + chunk
+        position = 0
+        eof = not chunk
+
+    while True:
+        while position < len(buffer) and buffer[position] in separators:
+            position += 1
+        if position == len(buffer):
+            if eof:
+                raise LoadError('Unexpected end of file in JSON array')
+            fill()
+            continue
+
+        if not started:
+            if buffer[position] != '[':
+                raise LoadError('Expected a JSON array')
+            started = True
+            separators += ','
+            position += 1
+            continue
+        if buffer[position] == ']':
+            return
+
+        try:
+            value, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError as exc:
+            if eof:
+                raise LoadError(f'Invalid JSON: {exc}') from None
+            # The element continues past the buffer
+            fill()
+            continue
+        following = end
+        while following < len(buffer) and buffer[following] in ' \t\r\n':
+            following += 1
+        if following == len(buffer) or buffer[following] not in ',]':
+            if not eof:
+                # A number may have been cut short by the read; decode it again with more input
+                fill()
+                continue
+            raise LoadError("Expected ',' or ']' after an array element")
+        yield value
+        position = end
+
+
+def iter_ndjson(file):
+    """Yield one JSON value per non-blank line"""
+    for line_number, line in enumerate(file, start=1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as exc:
+                raise LoadError(f'Invalid JSON on line {line_number}: {exc}') from None
+
+
+def iter_records(path):
+    with open(path, 'r', encoding='utf-8') as file:
+        records = iter_ndjson(file) if path.suffix == '.ndjson' else iter_json_array(file)
+        yield from records
+
+
+def dataset_files(directory, dataset):
+    """`<dataset>*.json` and `<dataset>*.ndjson` files in a directory, in name order"""
+    directory = Path(directory)
+    return sorted(list(directory.glob(f'{dataset}*.json')) + list(directory.glob(f'{dataset}*.ndjson')))
+
+
+def chunked(records, size):
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_month(value):
+    """First day of the month of a 'YYYYMM' time id"""
+    value = str(value)
+    if len(value) != 6 or not value.isdigit():
+        raise LoadError(f"Invalid month '{value}', expected YYYYMM")
+    return date(int(value[:4]), int(value[4:]), 1)
+
+
+def parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise LoadError(f"Invalid date '{value}', expected YYYY-MM-DD") from None
+
+
+def required(record, key):
+    value = record.get(key)
+    if value in (None, ''):
+        raise LoadError(f"Missing '{key}'")
+    return value
+
+
+def number(record, key):
+    value = record.get(key)
+    if value in (None, ''):
+        return 0.0
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise LoadError(f"'{key}' must be a number") from None
+
+
+def lookup_ids(model, code_field, codes):
+    """{code: primary key} for the given codes"""
+    return dict(model.objects.filter(**{f'{code_field}__in': set(codes)}).values_list(code_field, 'pk'))
+
+
+class HRDataLoader:
+    """
+    Load one or more export directories; `counts` collects rows written and
+    records skipped per dataset.
+    """
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE, stdout=None):
+        self.chunk_size = chunk_size
+        self.stdout = stdout
+        self.now = timezone.now()
+        self.counts = {}
+        # (employee_code, manager_code) pairs whose manager was not loaded yet
+        self.pending_managers = []
+        quote = connection.ops.quote_name
+        self.manager_sql = (
+            f"UPDATE {quote(Employee._meta.db_table)} SET {quote(Employee._meta.get_field('manager').column)} = %s "
+            f"WHERE {quote(Employee._meta.pk.column)} = %s"
+        )
+
+    def count(self, key, value=1):
+        self.counts[key] = self.counts.get(key, 0) + value
+
+    def load_directory(self, directory, datasets=DATASETS):
+        for dataset in DATASETS:
+            if dataset not in datasets:
+                continue
+            if dataset == 'departments':
+                self.load_headcount_csvs(directory)
+            for path in dataset_files(directory, dataset):
+                self.load_file(dataset, path)
+        self.resolve_pending_managers()
+
+    def load_file(self, dataset, path):
+        load_chunk = getattr(self, f'load_{dataset}')
+        loaded = 0
+        try:
+            for chunk in chunked(iter_records(path), self.chunk_size):
+                load_chunk(chunk)
+                loaded += len(chunk)
+        except (LoadError, IntegrityError) as exc:
+            raise LoadError(f'{path.name}, records {loaded + 1}-{loaded + self.chunk_size}: {exc}') from None
+        if self.stdout:
+            self.stdout.write(f"✓ Loaded {loaded} {dataset} records from {path.name}")
+
+    def department_ids(self, codes):
+        """Department ids by code; departments not loaded yet are created under their code"""
+        ids = lookup_ids(Department, 'department_code', codes)
+        missing = set(codes) - set(ids)
+        if missing:
+            Department.objects.bulk_create(
+                [Department(department_code=code, department_name=code, created_date=self.now) for code in sorted(missing)],
+                ignore_conflicts=True
+            )
+            ids.update(lookup_ids(Department, 'department_code', missing))
+            self.count('departments_created', len(missing))
+        return ids
+
+    def upsert_kpi_headcounts(self, headcounts):
+        """Store {(department_id, month): headcount} as imported ('CSV') KPI history"""
+        DepartmentMonthlyKPI.objects.bulk_create(
+            [
+                DepartmentMonthlyKPI(department_id=department_id, month=month, headcount=headcount, source='CSV', updated_date=self.now)
+                for (department_id, month), headcount in headcounts.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['department', 'month'],
+            update_fields=['headcount', 'source', 'updated_date']
+        )
+        self.count('headcount_months', len(headcounts))
+
+    def load_departments(self, records):
+        names = {}
+        headcounts = {}
+        for record in records:
+            code = str(required(record, 'Department_id'))
+            names[code] = record.get('Department_name') or code
+            if record.get('Timeid') and record.get('Num_employee') is not None:
+                headcounts[(code, parse_month(record['Timeid']))] = int(record['Num_employee'])
+
+        Department.objects.bulk_create(
+            [Department(department_code=code, department_name=name, created_date=self.now) for code, name in names.items()],
+            update_conflicts=True,
+            unique_fields=['department_code'],
+            update_fields=['department_name']
+        )
+        self.count('departments', len(names))
+
+        ids = lookup_ids(Department, 'department_code', names)
+        self.upsert_kpi_headcounts({(ids[code], month): headcount for (code, month), headcount in headcounts.items()})
+
+    def load_headcount_csvs(self, directory):
+        """Monthly headcount history from the per-department CSV files"""
+        files = {code: Path(directory) / name for code, name in SAMPLE_HEADCOUNT_FILES.items()}
+        files = {code: path for code, path in files.items() if path.exists()}
+        if not files:
+            return
+        ids = self.department_ids(list(files))
+        for code, path in files.items():
+            self.upsert_kpi_headcounts({(ids[code], month): headcount for month, headcount in read_headcount_csv(path).items()})
+            if self.stdout:
+                self.stdout.write(f"✓ Loaded headcount history from {path.name}")
+
+    def position_ids(self, positions):
+        """Position ids by code for {code: department_id}; unknown positions are created under their code"""
+        ids = lookup_ids(Position, 'position_code', positions)
+        missing = set(positions) - set(ids)
+        if missing:
+            Position.objects.bulk_create(
+                [
+                    Position(
+                        position_code=code,
+                        position_title=code.replace('_', ' ').title(),
+                        department_id=positions[code],
+                        created_date=self.now
+                    )
+                    for code in sorted(missing)
+                ],
+                ignore_conflicts=True
+            )
+            ids.update(lookup_ids(Position, 'position_code', missing))
+            self.count('positions_created', len(missing))
+        return ids
+
+    def load_employees(self, records):
+        department_ids = self.department_ids({str(required(record, 'Department_id')) for record in records})
+        position_ids = self.position_ids({
+            str(record['Position_code']): department_ids[str(record['Department_id'])]
+            for record in records if record.get('Position_code')
+        })
+
+        # Rows are grouped by the fields their record provides, so that an
+        # update never overwrites stored values with placeholders
+        groups = {}
+        for record in records:
+            code = str(required(record, 'Employee_id'))
+            values = {
+                'hire_date': parse_date(required(record, 'Hire_date')),
+                'department_id': department_ids[str(record['Department_id'])],
+                'updated_date': self.now,
+            }
+            if record.get('Position_code'):
+                values['position_id'] = position_ids[str(record['Position_code'])]
+            if record.get('Employment_status'):
+                status = EMPLOYMENT_STATUSES.get(str(record['Employment_status']).lower())
+                if status is None:
+                    raise LoadError(f"Unknown employment status '{record['Employment_status']}'")
+                values['employment_status'] = status
+            if record.get('Gender'):
+                values['gender'] = GENDERS.get(str(record['Gender']).lower(), 'OTHER')
+            for key, field in (('First_name', 'first_name'), ('Last_name', 'last_name'), ('Email', 'email'), ('Phone', 'phone')):
+                if record.get(key):
+                    values[field] = record[key]
+            if record.get('Date_of_birth'):
+                values['date_of_birth'] = parse_date(record['Date_of_birth'])
+            if record.get('Manager_id'):
+                self.pending_managers.append((code, str(record['Manager_id'])))
+
+            # The export has no names or emails; new employees are created with placeholders
+            employee = Employee(
+                employee_code=code,
+                first_name=values.get('first_name', 'Employee'),
+                last_name=values.get('last_name', code),
+                email=values.get('email', f'{code.lower()}@company.com'),
+                created_date=self.now,
+                **{field: value for field, value in values.items() if field not in ('first_name', 'last_name', 'email')}
+            )
+            groups.setdefault(tuple(sorted(values)), []).append(employee)
+
+        for fields, employees in groups.items():
+            Employee.objects.bulk_create(
+                employees,
+                update_conflicts=True,
+                unique_fields=['employee_code'],
+                update_fields=list(fields)
+            )
+        self.count('employees', len(records))
+
+        if len(self.pending_managers) >= self.chunk_size:
+            self.resolve_pending_managers(final=False)
+
+    def resolve_pending_managers(self, final=True):
+        """Link employees to managers loaded by now; with `final`, give up on the rest"""
+        pending = self.pending_managers
+        self.pending_managers = []
+        for chunk in chunked(pending, self.chunk_size):
+            ids = lookup_ids(Employee, 'employee_code', {code for pair in chunk for code in pair})
+            linked = []
+            for employee_code, manager_code in chunk:
+                if manager_code in ids:
+                    linked.append((ids[manager_code], ids[employee_code]))
+                elif final:
+                    self.count('unknown_managers')
+                else:
+                    self.pending_managers.append((employee_code, manager_code))
+            # One parameterized UPDATE per row; bulk_update's CASE expression grows with the chunk
+            with connection.cursor() as cursor:
+                cursor.executemany(self.manager_sql, linked)
+
+    def employee_ids(self, records, key):
+        """Employee ids by code for the records' `key`; records of unknown employees are counted and dropped"""
+        ids = lookup_ids(Employee, 'employee_code', {str(required(record, key)) for record in records})
+        known = [record for record in records if str(record[key]) in ids]
+        self.count('unknown_employees', len(records) - len(known))
+        return ids, known
+
+    def load_payroll(self, records):
+        ids, records = self.employee_ids(records, 'Employee_id')
+        payrolls = []
+        for record in records:
+            period_start = parse_month(required(record, 'Timeid'))
+            period_end = add_months(period_start, 1) - timedelta(days=1)
+            basic_salary = number(record, 'Base_salary')
+            # The model has no overtime pay or bonus columns, so both count as allowances
+            allowances = number(record, 'Allowance') + number(record, 'Overtime') + number(record, 'Bonus')
+            deductions = number(record, 'Deduction')
+            payrolls.append(Payroll(
+                external_id=str(required(record, 'Payroll_id')),
+                employee_id=ids[str(record['Employee_id'])],
+                pay_period_start=period_start,
+                pay_period_end=period_end,
+                basic_salary=basic_salary,
+                allowances=allowances,
+                deductions=deductions,
+                net_salary=basic_salary + allowances - deductions,
+                pay_date=period_end,
+                created_date=self.now
+            ))
+
+        Payroll.objects.bulk_create(
+            payrolls,
+            update_conflicts=True,
+            unique_fields=['external_id'],
+            update_fields=[
+                'employee', 'pay_period_start', 'pay_period_end', 'basic_salary', 'allowances',
+                'deductions', 'net_salary', 'pay_date'
+            ]
+        )
+        self.count('payroll', len(payrolls))
+
+    def load_attendance(self, records):
+        """
+        Monthly attendance summaries become one record per weekday of the
+        month: the first Absence_days are ABSENT, the next Late_days LATE and
+        the rest PRESENT, with Hours_worked spread evenly over the days worked.
+        """
+        ids, records = self.employee_ids(records, 'Employee_id')
+        rows = []
+        for record in records:
+            month = parse_month(required(record, 'Time_id'))
+            days = [
+                month + timedelta(days=offset)
+                for offset in range((add_months(month, 1) - month).days)
+                if (month + timedelta(days=offset)).weekday() < 5
+            ]
+            absent = min(int(number(record, 'Absence_days')), len(days))
+            late = min(int(number(record, 'Late_days')), len(days) - absent)
+            worked = len(days) - absent
+            hours = round(number(record, 'Hours_worked') / worked, 2) if worked else None
+
+            for index, day in enumerate(days):
+                if index < absent:
+                    status, total_hours = 'ABSENT', None
+                else:
+                    status, total_hours = ('LATE' if index < absent + late else 'PRESENT'), hours
+                rows.append(Attendance(
+                    external_id=f"{required(record, 'Attendance_id')}-{day:%d}",
+                    employee_id=ids[str(record['Employee_id'])],
+                    date=day,
+                    total_hours=total_hours,
+                    status=status,
+                    created_date=self.now
+                ))
+
+        Attendance.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['external_id'],
+            update_fields=['employee', 'date', 'total_hours', 'status']
+        )
+        self.count('attendance', len(rows))
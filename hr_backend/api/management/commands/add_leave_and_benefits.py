@@ -1,13 +1,15 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 from django.utils import timezone
-from faker import Faker
 import random
-from datetime import datetime, timedelta, date
+from datetime import timedelta, date
 
-from api.models import Employee, LeaveRequest, EmployeeBenefit
+import numpy as np
 
-fake = Faker()
+from api.datagen import (
+    BENEFIT_COLUMNS, benefit_shard, default_workers, insert_rows, run_shards, shard_seeds
+)
+from api.models import Employee, LeaveRequest, EmployeeBenefit
 
 class Command(BaseCommand):
     help = 'Add leave requests and employee benefits to the HR database'
@@ -69,6 +71,9 @@ class Command(BaseCommand):
         }
     ]
     
+    # Employees per benefit generation shard
+    BENEFIT_SHARD_SIZE = 10000
+    
     def add_arguments(self, parser):
         parser.add_argument(
             '--leave-only',
@@ -85,8 +90,23 @@ class Command(BaseCommand):
             action='store_true',
             help='Skip confirmation prompt',
         )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=None,
+            help='Random seed for reproducible leave requests and benefits',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=default_workers(),
+            help='Worker processes generating benefits (default: number of CPUs)',
+        )
     
     def handle(self, *args, **options):
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+        
         if not options['skip_confirmation']:
             confirm = input(
                 "This will add leave requests and employee benefits to the database. "
@@ -96,11 +116,15 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.WARNING('Operation cancelled.'))
                 return
         
+        self.seed = options['seed']
+        self.workers = options['workers']
+        random.seed(self.seed)
+        
         with transaction.atomic():
             self.stdout.write("Starting to add leave requests and benefits...")
             
-            # Get all employees
-            employees = list(Employee.objects.all())
+            # Get all employees (only the fields used to pick and link records)
+            employees = list(Employee.objects.only('employee_id', 'employment_status', 'manager_id'))
             if not employees:
                 self.stdout.write(self.style.ERROR('No employees found in database!'))
                 return
@@ -149,7 +173,7 @@ class Command(BaseCommand):
             status = random.choices(['Approved', 'Pending', 'Rejected'], weights=[70, 20, 10])[0]
             
             # Get approver (manager or random active employee)
-            approver = employee.manager if employee.manager else random.choice(active_employees)
+            approver_id = employee.manager_id if employee.manager_id else random.choice(active_employees).employee_id
             approved_date = start_date - timedelta(days=random.randint(1, 30)) if status == 'Approved' else None
             
             leave_request = LeaveRequest(
@@ -161,7 +185,7 @@ class Command(BaseCommand):
                 days_requested=days_requested,
                 reason=f"Personal {leave_type.lower()} request",
                 status=status,
-                approved_by=approver if status == 'Approved' else None,
+                approved_by_id=approver_id if status == 'Approved' else None,
                 approved_date=approved_date,
                 created_date=timezone.now() - timedelta(days=random.randint(1, 30))
             )
@@ -211,53 +235,27 @@ class Command(BaseCommand):
         self.stdout.write("Creating employee benefits...")
         
         # Get all active employees
-        active_employees = [emp for emp in employees if emp.employment_status == 'ACTIVE']
-        
-        benefits = []
-        benefit_id_counter = EmployeeBenefit.objects.count() + 1
-        
-        for employee in active_employees:
-            # Each employee gets 3-5 random benefits
-            num_benefits = random.randint(3, 5)
-            selected_benefits = random.sample(self.BENEFIT_TYPES, num_benefits)
-            
-            for benefit_info in selected_benefits:
-                # Random start date (within the last 2 years)
-                start_date = date.today() - timedelta(days=random.randint(1, 730))
-                
-                # Some benefits might have end dates (10% chance)
-                end_date = None
-                is_active = True
-                if random.random() < 0.1:
-                    end_date = start_date + timedelta(days=random.randint(365, 1095))
-                    is_active = end_date > date.today()
-                
-                # Add some variation to contribution amounts
-                employee_contribution = benefit_info['employee_contribution'] * random.uniform(0.8, 1.2)
-                company_contribution = benefit_info['company_contribution'] * random.uniform(0.9, 1.1)
-                coverage_amount = benefit_info['coverage_amount'] * random.uniform(0.9, 1.1) if benefit_info['coverage_amount'] > 0 else 0
-                
-                benefit = EmployeeBenefit(
-                    benefit_id=benefit_id_counter,
-                    employee=employee,
-                    benefit_type=benefit_info['type'],
-                    benefit_name=benefit_info['name'],
-                    provider=benefit_info['provider'],
-                    coverage_amount=round(coverage_amount, 2),
-                    employee_contribution=round(employee_contribution, 2),
-                    company_contribution=round(company_contribution, 2),
-                    start_date=start_date,
-                    end_date=end_date,
-                    is_active=is_active,
-                    created_date=timezone.now() - timedelta(days=random.randint(1, 30))
-                )
-                benefits.append(benefit)
-                benefit_id_counter += 1
+        active_ids = [emp.employee_id for emp in employees if emp.employment_status == 'ACTIVE']
         
-        # Bulk create benefits
-        EmployeeBenefit.objects.bulk_create(benefits)
-        self.stdout.write(f"✓ Created {len(benefits)} employee benefits")
-        return len(benefits)
+        # Workers generate the benefits of a slice of employees each; this process writes them in order
+        shards = [
+            active_ids[start:start + self.BENEFIT_SHARD_SIZE]
+            for start in range(0, len(active_ids), self.BENEFIT_SHARD_SIZE)
+        ]
+        now = np.datetime64(timezone.now().replace(tzinfo=None), 'us')
+        tasks = [
+            {
+                'employee_ids': employee_ids,
+                'benefit_types': self.BENEFIT_TYPES,
+                'today': date.today(),
+                'now': now,
+                'seed': seed
+            }
+            for employee_ids, seed in zip(shards, shard_seeds(self.seed, len(shards)))
+        ]
+        created = insert_rows(EmployeeBenefit, BENEFIT_COLUMNS, run_shards(benefit_shard, tasks, self.workers))
+        self.stdout.write(f"✓ Created {created} employee benefits")
+        return created
     
     def show_statistics(self):
         """Show statistics about the data added"""
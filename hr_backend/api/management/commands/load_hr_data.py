@@ -0,0 +1,66 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.cache import invalidate_on_commit
+from api.kpis import default_sample_dir
+from api.loaders import DATASETS, DEFAULT_CHUNK_SIZE, HRDataLoader, LoadError
+from api.models import Attendance, Department, DepartmentMonthlyKPI, Employee, Payroll, Position
+from api.snapshots import deferred_snapshot_sync
+
+
+class Command(BaseCommand):
+    help = 'Load departments, employees, payroll and attendance exports (sample/ format) into the HR database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'directories',
+            nargs='*',
+            help='Directories holding the export files (default: the bundled sample/ directory)',
+        )
+        parser.add_argument(
+            '--only',
+            nargs='+',
+            choices=DATASETS,
+            help='Load only these datasets',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f'Records read and upserted per batch (default: {DEFAULT_CHUNK_SIZE})',
+        )
+
+    def handle(self, *args, **options):
+        directories = [Path(directory) for directory in options['directories']] or [default_sample_dir()]
+        for directory in directories:
+            if not directory.is_dir():
+                raise CommandError(f"Directory '{directory}' does not exist")
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+
+        loader = HRDataLoader(chunk_size=options['chunk_size'], stdout=self.stdout)
+        datasets = options['only'] or DATASETS
+
+        try:
+            with transaction.atomic(), deferred_snapshot_sync():
+                for directory in directories:
+                    self.stdout.write(f"Loading {directory}...")
+                    loader.load_directory(directory, datasets)
+                invalidate_on_commit(Department, Position, Employee, Payroll, Attendance, DepartmentMonthlyKPI)
+        except LoadError as exc:
+            raise CommandError(str(exc)) from None
+
+        counts = loader.counts
+        for key in ('unknown_employees', 'unknown_managers'):
+            if counts.get(key):
+                self.stdout.write(self.style.WARNING(f"Skipped {counts[key]} records referencing {key.replace('unknown_', 'unknown ')}"))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Successfully loaded {counts.get('departments', 0)} departments, "
+                f"{counts.get('employees', 0)} employees, {counts.get('payroll', 0)} payroll records "
+                f"and {counts.get('attendance', 0)} attendance records!"
+            )
+        )
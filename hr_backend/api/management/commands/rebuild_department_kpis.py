@@ -0,0 +1,33 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.kpis import default_sample_dir, rebuild_department_kpis
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the monthly department KPI table (headcount, growth, turnover)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--csv-dir',
+            help='Import headcount history from the per-department CSV files in this directory',
+        )
+        parser.add_argument(
+            '--import-sample',
+            action='store_true',
+            help='Import headcount history from the bundled sample/ directory',
+        )
+    
+    def handle(self, *args, **options):
+        csv_dir = options['csv_dir']
+        if options['import_sample']:
+            csv_dir = default_sample_dir()
+        if csv_dir is not None and not Path(csv_dir).is_dir():
+            raise CommandError(f"CSV directory '{csv_dir}' does not exist")
+        
+        self.stdout.write("Rebuilding department KPIs...")
+        row_count = rebuild_department_kpis(csv_dir=csv_dir)
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully rebuilt {row_count} monthly department KPI rows!')
+        )
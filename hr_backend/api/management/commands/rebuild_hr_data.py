@@ -1,22 +1,24 @@
-from django.core.management.base import BaseCommand
-from django.db import transaction
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
 from django.utils import timezone
-from faker import Faker
-import random
-from datetime import datetime, timedelta
-from decimal import Decimal
 
 from api.models import (
-    Department, Employee, Position, Attendance, 
-    Payroll, PerformanceReview, TrainingRecord
+    Department, Employee, Attendance, Payroll, PerformanceReview, TrainingRecord,
+    LeaveRequest, EmployeeBenefit, EmploymentStatusChange, LatestPayroll, OrgChartNode
 )
+from api.cache import invalidate_on_commit
+from api.datagen import (
+    ATTENDANCE_COLUMNS, DEFAULT_BATCH_SIZE, EMPLOYEE_COLUMNS, PAYROLL_COLUMNS, REVIEW_COLUMNS,
+    attendance_shard, batched_ranges, default_workers, department_shard, insert_rows,
+    review_shard, run_shards, shard_seeds
+)
+from api.snapshots import deferred_snapshot_sync
 
-fake = Faker()
 
 class Command(BaseCommand):
     help = 'Rebuild HR database with new employee data based on department structure'
-    
-    # Department data with employee counts
+
+    # Department data with employee counts (at --scale 1)
     DEPARTMENT_DATA = {
         'Compliance': {'code': 'COM', 'employee_count': 110, 'budget': 400000.0, 'location': 'Floor 1'},
         'Coporate': {'code': 'COP', 'employee_count': 38, 'budget': 350000.0, 'location': 'Floor 4'},
@@ -29,15 +31,63 @@ class Command(BaseCommand):
         'Transformation Office': {'code': 'TO', 'employee_count': 40, 'budget': 300000.0, 'location': 'Floor 2'},
         'Treasury & Markets': {'code': 'TM', 'employee_count': 90, 'budget': 450000.0, 'location': 'Floor 5'},
     }
-    
+
+    # Attendance records per unit of --scale
+    ATTENDANCE_PER_SCALE = 1000
+
     def add_arguments(self, parser):
         parser.add_argument(
             '--skip-confirmation',
             action='store_true',
             help='Skip confirmation prompt',
         )
-    
+        parser.add_argument(
+            '--scale',
+            type=float,
+            default=1.0,
+            help='Multiply employee and attendance counts (default: 1)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=None,
+            help='Random seed for a reproducible dataset',
+        )
+        parser.add_argument(
+            '--months',
+            type=int,
+            default=3,
+            help='Months of payroll history (default: 3); attendance spans at least 6 months',
+        )
+        parser.add_argument(
+            '--attendance',
+            type=int,
+            default=None,
+            help='Number of attendance records (default: 1000 x scale)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Rows generated and inserted per batch (default: {DEFAULT_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=default_workers(),
+            help='Worker processes generating rows (default: number of CPUs)',
+        )
+
     def handle(self, *args, **options):
+        if options['scale'] <= 0:
+            raise CommandError('--scale must be positive')
+        if options['months'] < 1:
+            raise CommandError('--months must be at least 1')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        if options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+
         if not options['skip_confirmation']:
             confirm = input(
                 "This will DELETE ALL existing employees, attendance, payroll, and performance data. "
@@ -46,51 +96,74 @@ class Command(BaseCommand):
             if confirm.lower() != 'yes':
                 self.stdout.write(self.style.WARNING('Operation cancelled.'))
                 return
-        
-        with transaction.atomic():
-            self.stdout.write("Starting database rebuild...")
-            
+
+        self.scale = options['scale']
+        self.months = options['months']
+        self.batch_size = options['batch_size']
+        self.workers = options['workers']
+        self.seed = options['seed']
+        # Each kind of shard draws from its own branch of the seed
+        self.department_seeds, self.review_seeds, self.attendance_seeds = shard_seeds(self.seed, 3)
+        self.today = timezone.localdate()
+        # Rows are written raw, so datetimes go in the database's storage format
+        self.now = connection.ops.adapt_datetimefield_value(timezone.now())
+
+        attendance_count = options['attendance']
+        if attendance_count is None:
+            attendance_count = round(self.ATTENDANCE_PER_SCALE * self.scale)
+
+        # Bulk writes skip per-row signals; the payroll snapshot is rebuilt once on exit
+        with transaction.atomic(), deferred_snapshot_sync():
+            self.stdout.write(f"Starting database rebuild with {self.workers} worker process(es)...")
+
             # Step 1: Clear existing data
             self.clear_existing_data()
-            
-            # Step 2: Create employees for each department
-            employees = self.create_employees()
-            
-            # Step 3: Create 1000 attendance records
-            self.create_attendance_records(employees)
-            
-            # Step 4: Create payroll records for each employee
-            self.create_payroll_records(employees)
-            
-            # Step 5: Create performance reviews for each employee
-            self.create_performance_reviews(employees)
-            
+
+            # Step 2: Create employees for each department, with their payroll records
+            employee_count = self.create_employees()
+
+            # Step 3: Create performance reviews for each employee
+            self.create_performance_reviews(employee_count)
+
+            # Step 4: Create attendance records
+            self.create_attendance_records(employee_count, attendance_count)
+
+            # Bulk inserts send no model signals, so expire cached analytics explicitly
+            invalidate_on_commit(Department, Employee, Attendance, Payroll, PerformanceReview)
+
             self.stdout.write(
                 self.style.SUCCESS(
-                    f'Successfully rebuilt HR database with {len(employees)} employees!'
+                    f'Successfully rebuilt HR database with {employee_count} employees!'
                 )
             )
-    
+
     def clear_existing_data(self):
         """Clear existing employee-related data"""
         self.stdout.write("Clearing existing data...")
-        
-        # Clear in order to respect foreign key constraints
-        TrainingRecord.objects.all().delete()
-        PerformanceReview.objects.all().delete()
-        Payroll.objects.all().delete()
-        Attendance.objects.all().delete()
-        Employee.objects.all().delete()
-        
+
+        # Raw deletes: QuerySet.delete() would load every row to run cascades and signals.
+        # Tables referencing employees go first to respect foreign key constraints.
+        for model in (
+            TrainingRecord, PerformanceReview, Payroll, Attendance, LeaveRequest,
+            EmployeeBenefit, EmploymentStatusChange, LatestPayroll, OrgChartNode
+        ):
+            queryset = model.objects.all()
+            queryset._raw_delete(queryset.db)
+        Department.objects.exclude(manager=None).update(manager=None)
+        queryset = Employee.objects.all()
+        queryset._raw_delete(queryset.db)
+
         self.stdout.write("✓ Cleared existing data")
-    
+
     def create_employees(self):
-        """Create employees for each department according to specified counts"""
-        self.stdout.write("Creating employees...")
-        
-        employees = []
-        employee_id_counter = 1
-        
+        """
+        Create employees for each department according to specified counts,
+        with their payroll records
+        """
+        self.stdout.write("Creating employees and payroll records...")
+
+        departments = []
+        names = {}
         for dept_name, dept_info in self.DEPARTMENT_DATA.items():
             try:
                 department = Department.objects.get(department_name=dept_name)
@@ -99,192 +172,99 @@ class Command(BaseCommand):
                     self.style.WARNING(f"Department '{dept_name}' not found, skipping...")
                 )
                 continue
-            
+
             # Get positions for this department
-            positions = list(department.positions.all())
+            positions = list(department.positions.values_list('position_id', 'min_salary', 'max_salary'))
             if not positions:
                 self.stdout.write(
                     self.style.WARNING(f"No positions found for '{dept_name}', skipping...")
                 )
                 continue
-            
-            # Create employees for this department
-            for i in range(dept_info['employee_count']):
-                employee = self.create_single_employee(
-                    employee_id_counter, department, positions
-                )
-                employees.append(employee)
-                employee_id_counter += 1
-            
-            self.stdout.write(f"✓ Created {dept_info['employee_count']} employees for {dept_name}")
-        
-        return employees
-    
-    def create_single_employee(self, emp_id, department, positions):
-        """Create a single employee"""
-        position = random.choice(positions)
-        
-        # Generate employee data
-        gender = random.choice(['MALE', 'FEMALE'])
-        first_name = fake.first_name_male() if gender == 'MALE' else fake.first_name_female()
-        last_name = fake.last_name()
-        
-        # Create unique email by adding employee ID to ensure no duplicates
-        email = f"{first_name.lower()}.{last_name.lower()}.{emp_id}@company.com"
-        
-        employee = Employee.objects.create(
-            employee_id=emp_id,
-            employee_code=f"EMP{emp_id:04d}",
-            first_name=first_name,
-            last_name=last_name,
-            email=email,
-            phone=fake.phone_number()[:20],
-            date_of_birth=fake.date_of_birth(minimum_age=22, maximum_age=65),
-            gender=gender,
-            address=fake.address(),
-            hire_date=fake.date_between(start_date='-5y', end_date='today'),
-            department=department,
-            position=position,
-            employment_status=random.choice(['ACTIVE', 'ACTIVE', 'ACTIVE', 'ACTIVE', 'ON_LEAVE']),  # 80% active
-            created_date=timezone.now(),
-            updated_date=timezone.now()
-        )
-        
-        return employee
-    
-    def create_attendance_records(self, employees):
-        """Create 1000 attendance records"""
-        self.stdout.write("Creating 1000 attendance records...")
-        
-        attendance_records = []
-        for i in range(1000):
-            employee = random.choice(employees)
-            attendance_date = fake.date_between(start_date='-6m', end_date='today')
-            
-            # Generate realistic datetime for check-in (8-10 AM)
-            check_in_hour = random.randint(8, 10)
-            check_in_minute = random.randint(0, 59)
-            check_in_datetime = timezone.make_aware(
-                datetime.combine(attendance_date, datetime.min.time().replace(
-                    hour=check_in_hour, minute=check_in_minute
-                ))
-            )
-            
-            # Generate check-out time (7-10 hours later)
-            work_hours = random.uniform(7, 10)
-            check_out_datetime = check_in_datetime + timedelta(hours=work_hours)
-            
-            # Calculate total hours
-            total_hours = (check_out_datetime - check_in_datetime).total_seconds() / 3600
-            
-            attendance = Attendance(
-                attendance_id=i + 1,
-                employee=employee,
-                date=attendance_date,
-                check_in_time=check_in_datetime,
-                check_out_time=check_out_datetime,
-                total_hours=round(total_hours, 2),
-                status=random.choice(['PRESENT', 'PRESENT', 'PRESENT', 'LATE', 'ABSENT']),  # Mostly present
-                remarks=random.choice([None, 'On time', 'Late arrival', 'Early departure']),
-                created_date=timezone.now()
-            )
-            attendance_records.append(attendance)
-        
-        Attendance.objects.bulk_create(attendance_records)
-        self.stdout.write("✓ Created 1000 attendance records")
-    
-    def create_payroll_records(self, employees):
-        """Create payroll records for each employee"""
-        self.stdout.write(f"Creating payroll records for {len(employees)} employees...")
-        
-        payroll_records = []
-        payroll_id_counter = 1
-        
-        # Create 3 months of payroll for each employee
-        for month_offset in [0, 1, 2]:
-            pay_date = timezone.now().date().replace(day=1) - timedelta(days=30 * month_offset)
-            
-            for employee in employees:
-                # Base salary based on position salary range
-                if employee.position and employee.position.min_salary and employee.position.max_salary:
-                    base_salary = random.uniform(employee.position.min_salary, employee.position.max_salary)
-                else:
-                    base_salary = random.uniform(30000, 100000)  # Default range
-                
-                # Calculate components
-                basic_salary = base_salary * 0.7
-                allowances = base_salary * 0.2
-                overtime_hours = random.uniform(0, 20)  # 0-20 overtime hours
-                overtime_rate = 1.5 * (basic_salary / 160)  # 1.5x hourly rate (160 hours/month)
-                deductions = base_salary * random.uniform(0.05, 0.15)  # 5-15% deductions
-                tax_deduction = basic_salary * random.uniform(0.10, 0.20)  # 10-20% tax
-                
-                # Calculate net salary
-                total_overtime = overtime_hours * overtime_rate
-                gross_salary = basic_salary + allowances + total_overtime
-                total_deductions = deductions + tax_deduction
-                net_salary = gross_salary - total_deductions
-                
-                payroll = Payroll(
-                    payroll_id=payroll_id_counter,
-                    employee=employee,
-                    pay_period_start=pay_date,
-                    pay_period_end=pay_date.replace(day=28),  # End of month
-                    basic_salary=round(basic_salary, 2),
-                    overtime_hours=round(overtime_hours, 2),
-                    overtime_rate=round(overtime_rate, 2),
-                    allowances=round(allowances, 2),
-                    deductions=round(deductions, 2),
-                    tax_deduction=round(tax_deduction, 2),
-                    net_salary=round(net_salary, 2),
-                    pay_date=pay_date,
-                    created_date=timezone.now()
-                )
-                payroll_records.append(payroll)
-                payroll_id_counter += 1
-        
-        Payroll.objects.bulk_create(payroll_records)
-        self.stdout.write(f"✓ Created {len(payroll_records)} payroll records")
-    
-    def create_performance_reviews(self, employees):
+
+            employee_count = max(1, round(dept_info['employee_count'] * self.scale))
+            departments.append((department.department_id, employee_count, positions))
+            names[department.department_id] = dept_name
+
+        tasks = list(self.department_tasks(departments))
+        created = {department_id: 0 for department_id, _, _ in departments}
+        payroll_count = 0
+        # Workers generate the shards; this process is the only writer
+        for shard in run_shards(department_shard, tasks, self.workers):
+            insert_rows(Employee, EMPLOYEE_COLUMNS, [shard['employees']])
+            payroll_count += insert_rows(Payroll, PAYROLL_COLUMNS, [shard['payroll']])
+            created[shard['department_id']] += len(shard['employees'])
+
+        for department_id, count in created.items():
+            self.stdout.write(f"✓ Created {count} employees for {names[department_id]}")
+        self.stdout.write(f"✓ Created {payroll_count} payroll records ({self.months} months)")
+        return sum(created.values())
+
+    def department_tasks(self, departments):
+        """Shards of at most ~batch_size rows: slices of a department's employees"""
+        shard_size = max(1, self.batch_size // (self.months + 1))
+        slices = [
+            (department, start, min(start + shard_size, department[1]))
+            for department in departments
+            for start in range(0, department[1], shard_size)
+        ]
+
+        seeds = self.department_seeds.spawn(len(slices))
+        first_id = 1
+        for ((department_id, _, positions), start, stop), seed in zip(slices, seeds):
+            count = stop - start
+            yield {
+                'department': (department_id, count, positions),
+                'first_id': first_id,
+                'payroll_first_id': (first_id - 1) * self.months + 1,
+                'months': self.months,
+                'today': self.today,
+                'now': self.now,
+                'seed': seed,
+                'pool_seed': self.seed
+            }
+            first_id += count
+
+    def create_performance_reviews(self, employee_count):
         """Create performance reviews for each employee"""
-        self.stdout.write(f"Creating performance reviews for {len(employees)} employees...")
-        
-        review_records = []
-        review_id_counter = 1
-        
-        # Create annual reviews for each employee
-        for employee in employees:
-            # Annual review
-            review_date = fake.date_between(start_date='-1y', end_date='today')
-            
-            # Generate scores (1-5 scale)
-            goals_score = round(random.uniform(2.0, 5.0), 1)
-            competency_score = round(random.uniform(2.0, 5.0), 1)
-            overall_score = round((goals_score + competency_score) / 2, 1)
-            
-            # Select a reviewer (could be manager or senior employee)
-            possible_reviewers = [emp for emp in employees if emp != employee]
-            reviewer = random.choice(possible_reviewers) if possible_reviewers else employee
-            
-            review = PerformanceReview(
-                review_id=review_id_counter,
-                employee=employee,
-                reviewer=reviewer,
-                review_period_start=review_date - timedelta(days=365),
-                review_period_end=review_date,
-                goals_score=goals_score,
-                competency_score=competency_score,
-                overall_score=overall_score,
-                strengths=fake.text(max_nb_chars=200),
-                areas_for_improvement=fake.text(max_nb_chars=150),
-                development_plan=fake.text(max_nb_chars=200),
-                comments=fake.text(max_nb_chars=200),
-                review_date=review_date,
-                created_date=timezone.now()
-            )
-            review_records.append(review)
-            review_id_counter += 1
-        
-        PerformanceReview.objects.bulk_create(review_records)
-        self.stdout.write(f"✓ Created {len(review_records)} performance reviews") 
\ No newline at end of file
+        self.stdout.write(f"Creating performance reviews for {employee_count} employees...")
+
+        # Reviewers may be any employee, so reviews are written once every employee exists
+        ranges = list(batched_ranges(employee_count, self.batch_size))
+        tasks = [
+            {
+                'employee_range': (start + 1, stop + 1),
+                'reviewer_range': (1, employee_count + 1),
+                'today': self.today,
+                'now': self.now,
+                'seed': seed,
+                'pool_seed': self.seed
+            }
+            for (start, stop), seed in zip(ranges, self.review_seeds.spawn(len(ranges)))
+        ]
+        created = insert_rows(PerformanceReview, REVIEW_COLUMNS, run_shards(review_shard, tasks, self.workers))
+        self.stdout.write(f"✓ Created {created} performance reviews")
+
+    def create_attendance_records(self, employee_count, count):
+        """Create attendance records for random employees and days"""
+        self.stdout.write(f"Creating {count} attendance records...")
+
+        if not employee_count:
+            self.stdout.write(self.style.WARNING("No employees, skipping attendance..."))
+            return
+
+        ranges = list(batched_ranges(count, self.batch_size))
+        tasks = [
+            {
+                'employee_range': (1, employee_count + 1),
+                'count': stop - start,
+                'first_id': start + 1,
+                'months': max(6, self.months),
+                'utc_offset': timezone.localtime().utcoffset(),
+                'today': self.today,
+                'now': self.now,
+                'seed': seed
+            }
+            for (start, stop), seed in zip(ranges, self.attendance_seeds.spawn(len(ranges)))
+        ]
+        created = insert_rows(Attendance, ATTENDANCE_COLUMNS, run_shards(attendance_shard, tasks, self.workers))
+        self.stdout.write(f"✓ Created {created} attendance records")
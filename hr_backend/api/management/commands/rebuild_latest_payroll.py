@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from api.snapshots import rebuild_latest_payrolls
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the latest-payroll-per-employee snapshot table from payroll history'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of snapshot rows to insert per batch',
+        )
+    
+    def handle(self, *args, **options):
+        self.stdout.write("Rebuilding latest payroll snapshot...")
+        count = rebuild_latest_payrolls(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully rebuilt latest payroll snapshot for {count} employees!')
+        )
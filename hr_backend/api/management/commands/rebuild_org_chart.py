@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from api.orgchart import rebuild_org_chart
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the nested-set org chart table from employee manager links'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of org chart rows to insert per batch',
+        )
+    
+    def handle(self, *args, **options):
+        self.stdout.write("Rebuilding org chart...")
+        count = rebuild_org_chart(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully encoded the reporting lines of {count} employees!')
+        )
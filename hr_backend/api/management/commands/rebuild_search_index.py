@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.search import rebuild_search_index, search_index_supported
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the employee full-text search index (names, codes and emails)'
+    
+    def handle(self, *args, **options):
+        if not search_index_supported():
+            raise CommandError('The employee search index requires SQLite with FTS5')
+        
+        self.stdout.write("Rebuilding employee search index...")
+        with transaction.atomic():
+            count = rebuild_search_index()
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully indexed {count} employees!')
+        )
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.replica import refresh_snapshot, replica_alias, snapshot_path
+
+
+class Command(BaseCommand):
+    help = 'Copy the database into the analytics replica snapshot (HR_ANALYTICS_DB)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--every',
+            type=float,
+            default=None,
+            help='Keep running and refresh the snapshot every this many seconds',
+        )
+    
+    def handle(self, *args, **options):
+        alias = replica_alias()
+        if alias is None or snapshot_path(alias) is None:
+            raise CommandError(
+                'No SQLite analytics replica is configured; set HR_ANALYTICS_DB to the snapshot file'
+            )
+        if options['every'] is not None and options['every'] <= 0:
+            raise CommandError('--every must be a positive number of seconds')
+        
+        while True:
+            started = time.perf_counter()
+            path = refresh_snapshot(alias)
+            self.stdout.write(
+                self.style.SUCCESS(f'Successfully refreshed {path} in {time.perf_counter() - started:.2f}s!')
+            )
+            if options['every'] is None:
+                return
+            time.sleep(options['every'])
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+
+def populate_latest_payroll(apps, schema_editor):
+    """Backfill the snapshot from existing payroll history"""
+    Payroll = apps.get_model('api', 'Payroll')
+    LatestPayroll = apps.get_model('api', 'LatestPayroll')
+
+    ranked = Payroll.objects.annotate(
+        row_number=Window(
+            expression=RowNumber(),
+            partition_by=[F('employee_id')],
+            order_by=[F('pay_period_end').desc(), F('payroll_id').desc()],
+        )
+    ).filter(row_number=1).values_list('employee_id', 'payroll_id', 'pay_period_end', 'net_salary')
+
+    now = timezone.now()
+    LatestPayroll.objects.bulk_create(
+        [
+            LatestPayroll(
+                employee_id=employee_id,
+                payroll_id=payroll_id,
+                pay_period_end=pay_period_end,
+                net_salary=net_salary,
+                updated_date=now
+            )
+            for employee_id, payroll_id, pay_period_end, net_salary in ranked
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LatestPayroll',
+            fields=[
+                ('employee', models.OneToOneField(db_column='employee_id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='latest_payroll', serialize=False, to='api.employee')),
+                ('pay_period_end', models.DateField()),
+                ('net_salary', models.FloatField()),
+                ('updated_date', models.DateTimeField(blank=True, null=True)),
+                ('payroll', models.OneToOneField(db_column='payroll_id', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.payroll')),
+            ],
+            options={
+                'db_table': 'latest_payroll',
+            },
+        ),
+        migrations.RunPython(populate_latest_payroll, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['last_name', 'first_name', 'employee_id'], name='employee_name_idx'),
+        ),
+    ]
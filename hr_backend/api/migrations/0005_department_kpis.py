@@ -0,0 +1,133 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:59
+
+from collections import Counter
+from datetime import date
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+# A frozen copy of the api.kpis rules as they stood when this migration was written
+LEAVING_STATUSES = ('TERMINATED', 'INACTIVE')
+GROWTH_WINDOW_MONTHS = 12
+TURNOVER_WINDOW_MONTHS = 12
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    years, month_index = divmod(month.month - 1 + count, 12)
+    return date(month.year + years, month_index + 1, 1)
+
+
+def count_movements(employees):
+    """
+    Hires and leavers per month from (hire_date, employment_status, updated_date)
+    rows. No status transitions are logged yet (employment_status_changes is
+    created below), so the last update dates every departure.
+    """
+    hires = Counter()
+    leavers = Counter()
+    for hire_date, status, updated_date in employees:
+        hires[month_start(hire_date)] += 1
+        if status in LEAVING_STATUSES:
+            leavers[month_start(updated_date.date() if updated_date else hire_date)] += 1
+    return hires, leavers
+
+
+def department_series(hires, leavers, current_month):
+    """Monthly KPI rows (as dicts) from the first hire month through current_month"""
+    if not hires:
+        return []
+
+    rows = []
+    headcount = 0
+    month = min(hires)
+    while month <= current_month:
+        headcount += hires[month] - leavers[month]
+        rows.append({
+            'month': month,
+            'headcount': headcount,
+            'hires': hires[month],
+            'leavers': leavers[month],
+            'source': 'EMPLOYEES'
+        })
+        month = add_months(month, 1)
+
+    for index, row in enumerate(rows):
+        base = rows[max(index - GROWTH_WINDOW_MONTHS, 0)]['headcount']
+        row['headcount_growth_percent'] = round((row['headcount'] - base) / base * 100, 2) if index > 0 and base > 0 else 0
+
+        window = rows[max(index - TURNOVER_WINDOW_MONTHS + 1, 0):index + 1]
+        average_headcount = sum(r['headcount'] for r in window) / len(window)
+        window_leavers = sum(r['leavers'] for r in window)
+        row['turnover_rate_percent'] = round(window_leavers / average_headcount * 100, 2) if average_headcount > 0 else 0
+
+    return rows
+
+
+def populate_department_kpis(apps, schema_editor):
+    """Compute every department's monthly KPIs from the existing employees"""
+    Department = apps.get_model('api', 'Department')
+    Employee = apps.get_model('api', 'Employee')
+    DepartmentMonthlyKPI = apps.get_model('api', 'DepartmentMonthlyKPI')
+
+    now = timezone.now()
+    current_month = month_start(timezone.localdate())
+    snapshots = []
+    for department_id in Department.objects.values_list('department_id', flat=True):
+        employees = Employee.objects.filter(department_id=department_id).values_list(
+            'hire_date', 'employment_status', 'updated_date'
+        )
+        hires, leavers = count_movements(employees)
+        snapshots.extend(
+            DepartmentMonthlyKPI(department_id=department_id, updated_date=now, **row)
+            for row in department_series(hires, leavers, current_month)
+        )
+    DepartmentMonthlyKPI.objects.bulk_create(snapshots, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_employee_name_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DepartmentMonthlyKPI',
+            fields=[
+                ('kpi_id', models.AutoField(primary_key=True, serialize=False)),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('headcount', models.IntegerField()),
+                ('hires', models.IntegerField(default=0)),
+                ('leavers', models.IntegerField(default=0)),
+                ('headcount_growth_percent', models.FloatField(default=0)),
+                ('turnover_rate_percent', models.FloatField(default=0)),
+                ('source', models.CharField(choices=[('CSV', 'Imported headcount history'), ('EMPLOYEES', 'Derived from employee records')], default='EMPLOYEES', max_length=9)),
+                ('updated_date', models.DateTimeField(blank=True, null=True)),
+                ('department', models.ForeignKey(db_column='department_id', on_delete=django.db.models.deletion.CASCADE, related_name='monthly_kpis', to='api.department')),
+            ],
+            options={
+                'db_table': 'department_monthly_kpis',
+                'constraints': [models.UniqueConstraint(fields=('department', 'month'), name='department_month_kpi_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='EmploymentStatusChange',
+            fields=[
+                ('change_id', models.AutoField(primary_key=True, serialize=False)),
+                ('old_status', models.CharField(blank=True, choices=[('ACTIVE', 'Active'), ('INACTIVE', 'Inactive'), ('ON_LEAVE', 'On Leave'), ('TERMINATED', 'Terminated')], max_length=10, null=True)),
+                ('new_status', models.CharField(blank=True, choices=[('ACTIVE', 'Active'), ('INACTIVE', 'Inactive'), ('ON_LEAVE', 'On Leave'), ('TERMINATED', 'Terminated')], max_length=10, null=True)),
+                ('changed_date', models.DateTimeField()),
+                ('employee', models.ForeignKey(db_column='employee_id', on_delete=django.db.models.deletion.CASCADE, related_name='status_changes', to='api.employee')),
+            ],
+            options={
+                'db_table': 'employment_status_changes',
+                'indexes': [models.Index(fields=['employee', '-changed_date'], name='status_change_emp_date_idx')],
+            },
+        ),
+        migrations.RunPython(populate_department_kpis, migrations.RunPython.noop),
+    ]
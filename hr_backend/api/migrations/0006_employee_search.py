@@ -0,0 +1,65 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+# FTS5 name index kept in sync by triggers (see api/search.py)
+CREATE_SEARCH_SQL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS employee_search USING fts5(first_name, last_name, tokenize='unicode61 remove_diacritics 2')",
+    """CREATE TRIGGER IF NOT EXISTS employee_search_insert AFTER INSERT ON employees BEGIN
+        INSERT INTO employee_search(rowid, first_name, last_name) VALUES (new.employee_id, new.first_name, new.last_name);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS employee_search_delete AFTER DELETE ON employees BEGIN
+        DELETE FROM employee_search WHERE rowid = old.employee_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS employee_search_update AFTER UPDATE OF employee_id, first_name, last_name ON employees BEGIN
+        DELETE FROM employee_search WHERE rowid = old.employee_id;
+        INSERT INTO employee_search(rowid, first_name, last_name) VALUES (new.employee_id, new.first_name, new.last_name);
+    END""",
+    "INSERT INTO employee_search(rowid, first_name, last_name) SELECT employee_id, first_name, last_name FROM employees",
+]
+
+DROP_SEARCH_SQL = [
+    'DROP TRIGGER IF EXISTS employee_search_update',
+    'DROP TRIGGER IF EXISTS employee_search_delete',
+    'DROP TRIGGER IF EXISTS employee_search_insert',
+    'DROP TABLE IF EXISTS employee_search',
+]
+
+
+def create_search_index(apps, schema_editor):
+    """Create the index and its triggers, then index the existing employees"""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in CREATE_SEARCH_SQL:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in DROP_SEARCH_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_department_kpis'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.CreateModel(
+            name='EmployeeSearchEntry',
+            fields=[
+                ('employee', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='api.employee')),
+                ('first_name', models.CharField(max_length=50)),
+                ('last_name', models.CharField(max_length=50)),
+                ('document', models.TextField(db_column='employee_search')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'employee_search',
+                'managed': False,
+            },
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:10
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def compute_org_chart(pairs):
+    """
+    A frozen copy of api.orgchart.compute_org_chart as it stood when this
+    migration was written: (employee_id, manager_id) pairs to node dicts with
+    lft/rgt/depth, root, direct report count and height. Employees whose
+    manager is missing start a tree of their own, and reporting cycles are
+    broken at their lowest employee_id.
+    """
+    managers = dict(pairs)
+    children = defaultdict(list)
+    for employee_id, manager_id in sorted(managers.items()):
+        if manager_id is not None and manager_id in managers and manager_id != employee_id:
+            children[manager_id].append(employee_id)
+
+    roots = [employee_id for employee_id, manager_id in sorted(managers.items())
+             if manager_id is None or manager_id not in managers or manager_id == employee_id]
+
+    nodes = {}
+    counter = 0
+
+    def walk(root_id):
+        nonlocal counter
+        # Iterative DFS: (employee_id, depth, children already visited)
+        stack = [(root_id, 0, False)]
+        while stack:
+            employee_id, depth, visited = stack.pop()
+            if visited:
+                node = nodes[employee_id]
+                counter += 1
+                node['rgt'] = counter
+                node['height'] = max((nodes[child]['height'] + 1 for child in node['children']), default=0)
+                continue
+            if employee_id in nodes:
+                continue
+            counter += 1
+            reports = [child for child in children[employee_id] if child not in nodes]
+            nodes[employee_id] = {
+                'employee_id': employee_id,
+                'root_id': root_id,
+                'lft': counter,
+                'depth': depth,
+                'direct_reports': len(reports),
+                'children': reports
+            }
+            stack.append((employee_id, depth, True))
+            for child in reversed(reports):
+                stack.append((child, depth + 1, False))
+
+    for root_id in roots:
+        walk(root_id)
+    for employee_id in sorted(managers):
+        # Only members of a reporting cycle are still unvisited
+        if employee_id not in nodes:
+            walk(employee_id)
+
+    for node in nodes.values():
+        del node['children']
+    return list(nodes.values())
+
+
+def populate_org_chart(apps, schema_editor):
+    """Encode the existing management hierarchy"""
+    Employee = apps.get_model('api', 'Employee')
+    OrgChartNode = apps.get_model('api', 'OrgChartNode')
+
+    nodes = compute_org_chart(Employee.objects.values_list('employee_id', 'manager_id'))
+    OrgChartNode.objects.bulk_create([OrgChartNode(**node) for node in nodes], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_employee_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrgChartNode',
+            fields=[
+                ('employee', models.OneToOneField(db_column='employee_id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='org_node', serialize=False, to='api.employee')),
+                ('lft', models.IntegerField()),
+                ('rgt', models.IntegerField()),
+                ('depth', models.IntegerField(help_text='Levels below the top of the hierarchy (0 = no manager)')),
+                ('direct_reports', models.IntegerField(default=0)),
+                ('height', models.IntegerField(default=0, help_text='Levels of reports below this employee')),
+                ('root', models.ForeignKey(db_column='root_id', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.employee')),
+            ],
+            options={
+                'db_table': 'org_chart_nodes',
+                'indexes': [models.Index(fields=['lft', 'rgt'], name='org_node_interval_idx')],
+            },
+        ),
+        migrations.RunPython(populate_org_chart, migrations.RunPython.noop),
+    ]
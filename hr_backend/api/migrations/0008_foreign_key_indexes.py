@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:40
+
+from django.db import migrations
+
+# (index name, table, column) for every foreign key column of the bundled database
+# that has no index of its own
+FOREIGN_KEY_INDEXES = [
+    ('department_manager_idx', 'departments', 'manager_id'),
+    ('employee_manager_idx', 'employees', 'manager_id'),
+    ('employee_position_idx', 'employees', 'position_id'),
+    ('position_department_idx', 'positions', 'department_id'),
+    ('review_reviewer_idx', 'performance_reviews', 'reviewer_id'),
+    ('leave_employee_idx', 'leave_requests', 'employee_id'),
+    ('leave_approver_idx', 'leave_requests', 'approved_by'),
+    ('benefit_employee_idx', 'employee_benefits', 'employee_id'),
+    ('training_employee_idx', 'training_records', 'employee_id'),
+    ('training_program_idx', 'training_records', 'program_id'),
+]
+
+
+def create_missing_foreign_key_indexes(apps, schema_editor):
+    """
+    The bundled database was created outside of Django, without the indexes
+    `migrate` puts on foreign key columns. Deleting an employee then scans every
+    referencing table (employees.manager_id included) once per deleted row.
+    Index those columns, unless the column already leads an index (as it does
+    in databases built by `migrate`).
+    """
+    connection = schema_editor.connection
+    quote = schema_editor.quote_name
+    with connection.cursor() as cursor:
+        tables = set(connection.introspection.table_names(cursor))
+        for name, table, column in FOREIGN_KEY_INDEXES:
+            if table not in tables:
+                continue
+            constraints = connection.introspection.get_constraints(cursor, table)
+            if any(
+                (constraint['index'] or constraint['primary_key'] or constraint['unique'])
+                and constraint['columns'][:1] == [column]
+                for constraint in constraints.values()
+            ):
+                continue
+            schema_editor.execute(f'CREATE INDEX {quote(name)} ON {quote(table)} ({quote(column)})')
+
+
+def drop_foreign_key_indexes(apps, schema_editor):
+    """Drop the indexes create_missing_foreign_key_indexes created (the ones it skipped do not exist)"""
+    for name, _, _ in FOREIGN_KEY_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(name)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_org_chart'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_missing_foreign_key_indexes, drop_foreign_key_indexes),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_foreign_key_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='external_id',
+            field=models.CharField(blank=True, help_text='Id of the record in the export it was loaded from (load_hr_data)', max_length=64, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='payroll',
+            name='external_id',
+            field=models.CharField(blank=True, help_text='Id of the record in the export it was loaded from (load_hr_data)', max_length=64, null=True, unique=True),
+        ),
+    ]
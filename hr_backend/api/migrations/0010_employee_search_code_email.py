@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:10
+
+from django.db import migrations, models
+
+# FTS5 tables cannot gain columns, so the index and its triggers are recreated
+# with employee_code and email next to the names (see api/search.py)
+DROP_SEARCH_SQL = [
+    'DROP TRIGGER IF EXISTS employee_search_update',
+    'DROP TRIGGER IF EXISTS employee_search_delete',
+    'DROP TRIGGER IF EXISTS employee_search_insert',
+    'DROP TABLE IF EXISTS employee_search',
+]
+
+
+def create_search_sql(columns):
+    column_list = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE employee_search USING fts5({column_list}, tokenize='unicode61 remove_diacritics 2')",
+        f"""CREATE TRIGGER employee_search_insert AFTER INSERT ON employees BEGIN
+            INSERT INTO employee_search(rowid, {column_list}) VALUES (new.employee_id, {new_values});
+        END""",
+        """CREATE TRIGGER employee_search_delete AFTER DELETE ON employees BEGIN
+            DELETE FROM employee_search WHERE rowid = old.employee_id;
+        END""",
+        f"""CREATE TRIGGER employee_search_update AFTER UPDATE OF employee_id, {column_list} ON employees BEGIN
+            DELETE FROM employee_search WHERE rowid = old.employee_id;
+            INSERT INTO employee_search(rowid, {column_list}) VALUES (new.employee_id, {new_values});
+        END""",
+        f'INSERT INTO employee_search(rowid, {column_list}) SELECT employee_id, {column_list} FROM employees',
+    ]
+
+
+def recreate_search_index(columns):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in DROP_SEARCH_SQL + create_search_sql(columns):
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_external_ids'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            recreate_search_index(('first_name', 'last_name', 'employee_code', 'email')),
+            recreate_search_index(('first_name', 'last_name')),
+        ),
+        migrations.AddField(
+            model_name='employeesearchentry',
+            name='employee_code',
+            field=models.CharField(default='', max_length=20),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='employeesearchentry',
+            name='email',
+            field=models.CharField(default='', max_length=100),
+            preserve_default=False,
+        ),
+    ]
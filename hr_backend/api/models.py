@@ -76,6 +76,11 @@ class Employee(models.Model):
 
     class Meta:
         db_table = 'employees'
+        indexes = [
+            models.Index(fields=['department', 'last_name', 'first_name'], name='employee_dept_name_idx'),
+            models.Index(fields=['employment_status'], name='employee_status_idx'),
+            models.Index(fields=['last_name', 'first_name', 'employee_id'], name='employee_name_idx'),
+        ]
 
 
 class TrainingProgram(models.Model):
@@ -112,6 +117,7 @@ class Attendance(models.Model):
     total_hours = models.FloatField(null=True, blank=True)
     status = models.CharField(max_length=8, choices=STATUS_CHOICES, null=True, blank=True)
     remarks = models.CharField(max_length=200, null=True, blank=True)
+    external_id = models.CharField(max_length=64, unique=True, null=True, blank=True, help_text="Id of the record in the export it was loaded from (load_hr_data)")
     created_date = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
@@ -119,6 +125,9 @@ class Attendance(models.Model):
 
     class Meta:
         db_table = 'attendance'
+        indexes = [
+            models.Index(fields=['employee', '-date'], name='attendance_emp_date_idx'),
+        ]
 
 
 class LeaveRequest(models.Model):
@@ -170,6 +179,7 @@ class Payroll(models.Model):
     tax_deduction = models.FloatField(null=True, blank=True)
     net_salary = models.FloatField()
     pay_date = models.DateField(null=True, blank=True)
+    external_id = models.CharField(max_length=64, unique=True, null=True, blank=True, help_text="Id of the record in the export it was loaded from (load_hr_data)")
     created_date = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
@@ -177,6 +187,9 @@ class Payroll(models.Model):
 
     class Meta:
         db_table = 'payroll'
+        indexes = [
+            models.Index(fields=['employee', '-pay_period_end'], name='payroll_emp_period_idx'),
+        ]
 
 
 class PerformanceReview(models.Model):
@@ -200,6 +213,9 @@ class PerformanceReview(models.Model):
 
     class Meta:
         db_table = 'performance_reviews'
+        indexes = [
+            models.Index(fields=['employee', '-review_date'], name='review_emp_date_idx'),
+        ]
 
 
 class TrainingRecord(models.Model):
@@ -249,3 +265,107 @@ class EmployeeBenefit(models.Model):
 
     class Meta:
         db_table = 'employee_benefits'
+
+
+class LatestPayroll(models.Model):
+    """Denormalized snapshot of each employee's most recent payroll record"""
+    employee = models.OneToOneField(Employee, on_delete=models.CASCADE, primary_key=True, related_name='latest_payroll', db_column='employee_id')
+    payroll = models.OneToOneField(Payroll, on_delete=models.CASCADE, related_name='+', db_column='payroll_id')
+    pay_period_end = models.DateField()
+    net_salary = models.FloatField()
+    updated_date = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.employee_id} - {self.pay_period_end} ({self.net_salary})"
+
+    class Meta:
+        db_table = 'latest_payroll'
+
+
+class EmploymentStatusChange(models.Model):
+    """Log of employment status transitions, used to date departures for turnover"""
+    change_id = models.AutoField(primary_key=True)
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='status_changes', db_column='employee_id')
+    old_status = models.CharField(max_length=10, choices=Employee.EMPLOYMENT_STATUS_CHOICES, null=True, blank=True)
+    new_status = models.CharField(max_length=10, choices=Employee.EMPLOYMENT_STATUS_CHOICES, null=True, blank=True)
+    changed_date = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.employee_id}: {self.old_status} -> {self.new_status} ({self.changed_date})"
+
+    class Meta:
+        db_table = 'employment_status_changes'
+        indexes = [
+            models.Index(fields=['employee', '-changed_date'], name='status_change_emp_date_idx'),
+        ]
+
+
+class DepartmentMonthlyKPI(models.Model):
+    """Precomputed monthly headcount, growth and turnover figures per department"""
+    SOURCE_CHOICES = [
+        ('CSV', 'Imported headcount history'),
+        ('EMPLOYEES', 'Derived from employee records'),
+    ]
+
+    kpi_id = models.AutoField(primary_key=True)
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name='monthly_kpis', db_column='department_id')
+    month = models.DateField(help_text="First day of the month")
+    headcount = models.IntegerField()
+    hires = models.IntegerField(default=0)
+    leavers = models.IntegerField(default=0)
+    headcount_growth_percent = models.FloatField(default=0)
+    turnover_rate_percent = models.FloatField(default=0)
+    source = models.CharField(max_length=9, choices=SOURCE_CHOICES, default='EMPLOYEES')
+    updated_date = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.department_id} - {self.month:%m/%Y} ({self.headcount})"
+
+    class Meta:
+        db_table = 'department_monthly_kpis'
+        constraints = [
+            models.UniqueConstraint(fields=['department', 'month'], name='department_month_kpi_unique'),
+        ]
+
+
+class EmployeeSearchEntry(models.Model):
+    """Row of the employee_search FTS5 index, maintained by database triggers (see api/search.py)"""
+    employee = models.OneToOneField(Employee, on_delete=models.DO_NOTHING, primary_key=True, related_name='search_entry', db_column='rowid')
+    first_name = models.CharField(max_length=50)
+    last_name = models.CharField(max_length=50)
+    employee_code = models.CharField(max_length=20)
+    email = models.CharField(max_length=100)
+    # FTS5 hidden columns: the whole row (left-hand side of MATCH) and the bm25 score of the current match
+    document = models.TextField(db_column='employee_search')
+    rank = models.FloatField()
+
+    def __str__(self):
+        return f"{self.first_name} {self.last_name}"
+
+    class Meta:
+        managed = False
+        db_table = 'employee_search'
+
+
+class OrgChartNode(models.Model):
+    """Nested-set (Euler tour) position of an employee in the management hierarchy, see api/orgchart.py"""
+    employee = models.OneToOneField(Employee, on_delete=models.CASCADE, primary_key=True, related_name='org_node', db_column='employee_id')
+    root = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='+', db_column='root_id')
+    lft = models.IntegerField()
+    rgt = models.IntegerField()
+    depth = models.IntegerField(help_text="Levels below the top of the hierarchy (0 = no manager)")
+    direct_reports = models.IntegerField(default=0)
+    height = models.IntegerField(default=0, help_text="Levels of reports below this employee")
+
+    @property
+    def total_reports(self):
+        return (self.rgt - self.lft - 1) // 2
+
+    def __str__(self):
+        return f"{self.employee_id} [{self.lft}, {self.rgt}]"
+
+    class Meta:
+        db_table = 'org_chart_nodes'
+        indexes = [
+            models.Index(fields=['lft', 'rgt'], name='org_node_interval_idx'),
+        ]
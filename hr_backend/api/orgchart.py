@@ -0,0 +1,325 @@
+"""
+Management hierarchy encoded as nested sets (Euler tour intervals).
+
+OrgChartNode holds one row per employee with the [lft, rgt] interval of a
+depth-first walk over Employee.manager, numbered across the whole forest.
+Employee B reports (directly or not) to A exactly when
+A.lft < B.lft and B.rgt < A.rgt, so a subtree is one index range scan and its
+size is (rgt - lft - 1) / 2 without touching any other row.
+
+rebuild_org_chart() numbers the table from scratch out of the
+(employee_id, manager_id) pairs; bulk loads wrapped in deferred_snapshot_sync()
+call it once at the end. Single changes (see api/signals.py) are patched in
+place instead: move_org_node() takes the employee's interval out of the
+numbering, closes the gap and reopens one among the new manager's reports,
+so only the boundaries after the two positions shift and only the nodes on
+the two ancestor paths are recounted. Reports are kept in employee_id order,
+so the result is the numbering a rebuild would produce.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .cache import invalidate_on_commit
+from .models import Employee, OrgChartNode
+
+# Above this many reporting line changes at once, renumbering the whole table is cheaper
+INCREMENTAL_LIMIT = 10
+
+
+def compute_org_chart(pairs):
+    """
+    Turn (employee_id, manager_id) pairs into node dicts with lft/rgt/depth,
+    root, direct report count and height (levels below the employee).
+    Employees whose manager is missing start a tree of their own, and
+    reporting cycles are broken at their lowest employee_id. Trees are
+    numbered in the order of their top employee_id, as move_org_node()
+    places them.
+    """
+    managers = dict(pairs)
+    children = defaultdict(list)
+    for employee_id, manager_id in sorted(managers.items()):
+        if manager_id is not None and manager_id in managers and manager_id != employee_id:
+            children[manager_id].append(employee_id)
+
+    roots = [employee_id for employee_id, manager_id in sorted(managers.items())
+             if manager_id is None or manager_id not in managers or manager_id == employee_id]
+
+    reached = set()
+
+    def reach(root_id):
+        stack = [root_id]
+        while stack:
+            employee_id = stack.pop()
+            if employee_id not in reached:
+                reached.add(employee_id)
+                stack.extend(children[employee_id])
+
+    for root_id in roots:
+        reach(root_id)
+    for employee_id in sorted(managers):
+        # Only members of a reporting cycle, and the employees below them, are still unreached
+        if employee_id not in reached:
+            roots.append(employee_id)
+            reach(employee_id)
+
+    nodes = {}
+    counter = 0
+
+    def walk(root_id):
+        nonlocal counter
+        # Iterative DFS: (employee_id, depth, children already visited)
+        stack = [(root_id, 0, False)]
+        while stack:
+            employee_id, depth, visited = stack.pop()
+            if visited:
+                node = nodes[employee_id]
+                counter += 1
+                node['rgt'] = counter
+                node['height'] = max((nodes[child]['height'] + 1 for child in node['children']), default=0)
+                continue
+            if employee_id in nodes:
+                continue
+            counter += 1
+            reports = [child for child in children[employee_id] if child not in nodes]
+            nodes[employee_id] = {
+                'employee_id': employee_id,
+                'root_id': root_id,
+                'lft': counter,
+                'depth': depth,
+                'direct_reports': len(reports),
+                'children': reports
+            }
+            stack.append((employee_id, depth, True))
+            for child in reversed(reports):
+                stack.append((child, depth + 1, False))
+
+    for root_id in sorted(roots):
+        walk(root_id)
+
+    for node in nodes.values():
+        del node['children']
+    return list(nodes.values())
+
+
+def rebuild_org_chart(batch_size=1000):
+    """Rebuild the whole OrgChartNode table from Employee.manager"""
+    pairs = Employee.objects.values_list('employee_id', 'manager_id')
+    nodes = compute_org_chart(pairs.iterator(chunk_size=batch_size))
+
+    with transaction.atomic():
+        OrgChartNode.objects.all().delete()
+        OrgChartNode.objects.bulk_create([OrgChartNode(**node) for node in nodes], batch_size=batch_size)
+        invalidate_on_commit(OrgChartNode)
+    return len(nodes)
+
+
+def rebuild_org_chart_on_commit():
+    """Rebuild the table when the current transaction commits, once however often it is called"""
+    connection = transaction.get_connection()
+    if not any(callback is rebuild_org_chart for _, callback, _ in connection.run_on_commit):
+        transaction.on_commit(rebuild_org_chart)
+
+
+def _shift(position, amount):
+    """Move every boundary at or after `position` by `amount`"""
+    OrgChartNode.objects.filter(lft__gte=position).update(lft=F('lft') + amount)
+    OrgChartNode.objects.filter(rgt__gte=position).update(rgt=F('rgt') + amount)
+
+
+def _ancestors(root_id, lft, rgt):
+    """[(employee_id, depth)] of the nodes whose interval contains [lft, rgt]"""
+    return list(
+        OrgChartNode.objects.filter(root_id=root_id, lft__lt=lft, rgt__gt=rgt).values_list('employee_id', 'depth')
+    )
+
+
+def _detach(node):
+    """
+    Take node's subtree out of the numbering: its rows move to the negative
+    positions -size..-1, keeping their shape, and the gap is closed
+    """
+    size = node.rgt - node.lft + 1
+    OrgChartNode.objects.filter(lft__range=(node.lft, node.rgt)).update(
+        lft=F('lft') - node.rgt - 1, rgt=F('rgt') - node.rgt - 1
+    )
+    _shift(node.rgt + 1, -size)
+    return size
+
+
+def _insertion_point(employee_id, parent):
+    """Position of employee_id's subtree among its siblings, in the employee_id order rebuild_org_chart() uses"""
+    if parent is None:
+        siblings = OrgChartNode.objects.filter(depth=0, lft__gt=0)
+    else:
+        siblings = OrgChartNode.objects.filter(
+            root_id=parent.root_id, lft__gt=parent.lft, lft__lt=parent.rgt, depth=parent.depth + 1
+        )
+    following = siblings.filter(employee_id__gt=employee_id).order_by('employee_id').values_list('lft', flat=True).first()
+    if following is not None:
+        return following
+    if parent is not None:
+        return parent.rgt
+    return (OrgChartNode.objects.filter(rgt__gt=0).aggregate(end=Max('rgt'))['end'] or 0) + 1
+
+
+def _refresh_heights(employee_ids):
+    """Recount `height` of the given nodes from the deepest node in their interval"""
+    deepest = OrgChartNode.objects.filter(
+        lft__gt=OuterRef('lft'), lft__lt=OuterRef('rgt')
+    ).order_by('-depth').values('depth')[:1]
+    OrgChartNode.objects.filter(employee_id__in=employee_ids).update(
+        height=Coalesce(Subquery(deepest), F('depth')) - F('depth')
+    )
+
+
+def _has_broken_cycle(root_ids):
+    """
+    Whether any of these tree tops has a manager: rebuild_org_chart() broke a
+    reporting cycle stored in Employee there, so patching the tree in place
+    would drift from what a rebuild produces
+    """
+    return Employee.objects.filter(employee_id__in=root_ids, manager__isnull=False).exists()
+
+
+def move_org_node(employee_id, manager_id):
+    """
+    Place an employee and everyone below them under manager_id, or at the top
+    of a tree of their own when manager_id is None. Employees without a node
+    yet are added. A move that closes a reporting cycle, or touches a tree
+    whose stored reporting lines hold one, rebuilds the table.
+    """
+    with transaction.atomic():
+        node = OrgChartNode.objects.filter(employee_id=employee_id).first()
+        parent = None
+        if manager_id is not None:
+            parent = OrgChartNode.objects.filter(employee_id=manager_id).first()
+            # The manager is missing from the table or reports to this employee
+            closes_cycle = parent is None or (
+                node is not None and parent.root_id == node.root_id and node.lft <= parent.lft <= node.rgt
+            )
+            if closes_cycle:
+                rebuild_org_chart()
+                return
+        if _has_broken_cycle({tree.root_id for tree in (node, parent) if tree is not None} - {employee_id}):
+            rebuild_org_chart()
+            return
+
+        if node is None:
+            node = OrgChartNode.objects.create(employee_id=employee_id, root_id=employee_id, lft=-2, rgt=-1, depth=0)
+            size = 2
+            old_ancestors = []
+        else:
+            old_ancestors = _ancestors(node.root_id, node.lft, node.rgt)
+            size = _detach(node)
+            old_parent = [ancestor for ancestor, depth in old_ancestors if depth == node.depth - 1]
+            OrgChartNode.objects.filter(employee_id__in=old_parent).update(direct_reports=F('direct_reports') - 1)
+            if parent is not None:
+                # Detaching shifted the boundaries after the subtree
+                parent.refresh_from_db()
+
+        position = _insertion_point(employee_id, parent)
+        _shift(position, size)
+        offset = position + size
+        root_id = parent.root_id if parent else employee_id
+        OrgChartNode.objects.filter(lft__lt=0).update(
+            lft=F('lft') + offset,
+            rgt=F('rgt') + offset,
+            depth=F('depth') + (parent.depth + 1 if parent else 0) - node.depth,
+            root_id=root_id
+        )
+        if parent is not None:
+            OrgChartNode.objects.filter(employee_id=parent.employee_id).update(direct_reports=F('direct_reports') + 1)
+
+        new_ancestors = _ancestors(root_id, position, position + size - 1)
+        _refresh_heights({ancestor for ancestor, _ in old_ancestors + new_ancestors})
+        invalidate_on_commit(OrgChartNode)
+
+
+def remove_org_node(employee_id):
+    """
+    Take an employee out of the hierarchy before they are deleted. Their direct
+    reports head trees of their own, as Employee.manager's SET_NULL leaves them;
+    with more than INCREMENTAL_LIMIT of them, or in a tree holding a reporting
+    cycle, the table is rebuilt on commit.
+    """
+    node = OrgChartNode.objects.filter(employee_id=employee_id).first()
+    if node is None:
+        return
+    reports = list(OrgChartNode.objects.filter(
+        root_id=node.root_id, lft__gt=node.lft, lft__lt=node.rgt, depth=node.depth + 1
+    ).values_list('employee_id', flat=True))
+    if len(reports) > INCREMENTAL_LIMIT or _has_broken_cycle([node.root_id]):
+        rebuild_org_chart_on_commit()
+        return
+
+    with transaction.atomic():
+        for report_id in reports:
+            move_org_node(report_id, None)
+        node.refresh_from_db()
+        old_ancestors = _ancestors(node.root_id, node.lft, node.rgt)
+        _detach(node)
+        OrgChartNode.objects.filter(lft__lt=0).delete()
+        old_parent = [ancestor for ancestor, depth in old_ancestors if depth == node.depth - 1]
+        OrgChartNode.objects.filter(employee_id__in=old_parent).update(direct_reports=F('direct_reports') - 1)
+        _refresh_heights([ancestor for ancestor, _ in old_ancestors])
+        invalidate_on_commit(OrgChartNode)
+
+
+def sync_org_chart(placements):
+    """
+    Apply (employee_id, manager_id) reporting lines written without signals
+    (api/bulk.py): one move_org_node() each, or a single rebuild when there
+    are more than INCREMENTAL_LIMIT
+    """
+    placements = list(placements)
+    if len(placements) > INCREMENTAL_LIMIT:
+        rebuild_org_chart()
+        return
+    for employee_id, manager_id in placements:
+        move_org_node(employee_id, manager_id)
+
+
+def find_reporting_cycles(assignments, batch_size=500):
+    """
+    Employees of `assignments` ({employee_id: new manager_id}) whose reporting
+    line would lead back to themselves, the assignments combined with everyone
+    else's stored manager. Stored managers are read one level at a time, so
+    this runs one query per level of the hierarchy above the new managers
+    (per batch_size of them).
+    """
+    managers = dict(assignments)
+    pending = {manager_id for manager_id in managers.values() if manager_id is not None} - managers.keys()
+    while pending:
+        pending_ids = sorted(pending)
+        stored = {}
+        for start in range(0, len(pending_ids), batch_size):
+            stored.update(Employee.objects.filter(
+                employee_id__in=pending_ids[start:start + batch_size]
+            ).values_list('employee_id', 'manager_id'))
+        managers.update(dict.fromkeys(pending))
+        managers.update(stored)
+        pending = {manager_id for manager_id in stored.values() if manager_id is not None} - managers.keys()
+
+    cycles = set()
+    for employee_id in assignments:
+        seen = set()
+        current = employee_id
+        while current is not None and current not in seen:
+            seen.add(current)
+            current = managers.get(current)
+        # The walk starts on the cycle only if the first employee it revisits is the starting one
+        if current == employee_id:
+            cycles.add(employee_id)
+    return cycles
+
+
+def subtree_queryset(node, max_depth=None):
+    """Employees below `node`, optionally at most `max_depth` levels down"""
+    reports = Employee.objects.filter(org_node__lft__gt=node.lft, org_node__rgt__lt=node.rgt)
+    if max_depth is not None:
+        reports = reports.filter(org_node__depth__lte=node.depth + max_depth)
+    return reports
+
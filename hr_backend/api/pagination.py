@@ -0,0 +1,157 @@
+import base64
+import binascii
+import json
+from datetime import date
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination over a unique composite ordering.
+
+    The cursor encodes the ordering values of the last row on the page, so
+    every page is an index range scan and page N costs the same as page 1.
+    Pass `?paginate=false` to get the full unpaginated list instead.
+    """
+    ordering = None
+    page_size_setting = 'API_PAGE_SIZE'
+    default_page_size = 50
+    max_page_size = 500
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    opt_out_query_param = 'paginate'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get(self.opt_out_query_param, '').lower() in ('false', '0', 'no'):
+            return None
+
+        self.request = request
+        self.page_ordering = self.get_ordering(request, queryset, view)
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        if reverse:
+            queryset = queryset.order_by(*[f'-{field}' for field in self.page_ordering])
+        else:
+            queryset = queryset.order_by(*self.page_ordering)
+        if position is not None:
+            queryset = queryset.filter(self.keyset_filter(position, reverse))
+
+        # Fetch one extra row to find out whether there is another page
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        if reverse:
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data
+        })
+
+    def get_ordering(self, request, queryset, view):
+        """Ordering used for this page; the last field must be unique"""
+        return self.ordering
+
+    def get_page_size(self, request):
+        page_size = getattr(settings, self.page_size_setting, self.default_page_size)
+        requested = request.query_params.get(self.page_size_query_param)
+        if requested:
+            try:
+                page_size = int(requested)
+            except ValueError:
+                pass
+        return max(1, min(page_size, self.max_page_size))
+
+    def keyset_filter(self, position, reverse):
+        """Rows strictly after (or before, when paging backwards) the cursor position"""
+        operator = 'lt' if reverse else 'gt'
+        condition = Q()
+        for index, field in enumerate(self.page_ordering):
+            equal_prefix = {prefix: position[i] for i, prefix in enumerate(self.page_ordering[:index])}
+            condition |= Q(**equal_prefix, **{f'{field}__{operator}': position[index]})
+
+        # The redundant bound on the leading column lets the database seek into the index
+        leading_bound = Q(**{f'{self.page_ordering[0]}__{operator}e': position[0]})
+        return leading_bound & condition
+
+    def get_position(self, obj):
+        position = []
+        for field in self.page_ordering:
+            # Rows of a values() queryset (api/rows.py) are dicts
+            value = obj[field] if isinstance(obj, dict) else getattr(obj, field)
+            position.append(value.isoformat() if isinstance(value, date) else value)
+        return position
+
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps({'p': position, 'r': int(reverse)}, separators=(',', ':'))
+        cursor = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            position = payload['p']
+            reverse = bool(payload.get('r', 0))
+        except (TypeError, ValueError, KeyError, UnicodeError, binascii.Error):
+            raise ValidationError({self.cursor_query_param: self.invalid_cursor_message})
+        if (
+            not isinstance(position, list) or len(position) != len(self.page_ordering)
+            or not all(value is None or isinstance(value, (str, int, float)) for value in position)
+        ):
+            raise ValidationError({self.cursor_query_param: self.invalid_cursor_message})
+        return position, reverse
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.get_position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.get_position(self.page[0]), reverse=True)
+
+
+class OrgChartPagination(KeysetPagination):
+    """Keyset pagination for reporting lines, in org chart (depth-first) order"""
+    ordering = ('tree_position',)
+    page_size_setting = 'EMPLOYEE_PAGE_SIZE'
+
+
+class EmployeeCursorPagination(KeysetPagination):
+    """Keyset pagination for employee listings, ordered by name"""
+    ordering = ('last_name', 'first_name', 'employee_id')
+    page_size_setting = 'EMPLOYEE_PAGE_SIZE'
+
+    def get_ordering(self, request, queryset, view):
+        # Name searches (api/search.py) are paged in relevance order
+        if 'search_rank' in queryset.query.annotations:
+            return ('search_rank',) + self.ordering
+        return self.ordering
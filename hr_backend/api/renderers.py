@@ -0,0 +1,31 @@
+"""
+JSON renderer built on orjson, selected in REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].
+
+A drop-in replacement for DRF's JSONRenderer: same media type, `indent`
+parameter and compact UTF-8 output. Serializer output (dicts, lists, strings,
+numbers, dates) is encoded natively by orjson; datetimes, times and anything
+else orjson does not know go through DRF's JSONEncoder, so they are written
+exactly as before. Unlike the json module, orjson writes NaN and infinity as
+null instead of failing.
+"""
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+
+class ORJSONRenderer(JSONRenderer):
+    """Renders JSON with orjson (see the module docstring)"""
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        options = self.options
+        if self.get_indent(accepted_media_type, renderer_context):
+            # orjson only indents by two spaces
+            options |= orjson.OPT_INDENT_2
+
+        content = orjson.dumps(data, default=self.encoder_class().default, option=options)
+        # Like JSONRenderer: escape U+2028 / U+2029 so the output stays a JavaScript subset
+        return content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
@@ -0,0 +1,142 @@
+"""
+Read replica for the heavy analytics endpoints.
+
+When settings.DATABASES has an ANALYTICS_DATABASE_ALIAS entry ('analytics'),
+viewset actions decorated with `analytics_replica` run their queries against
+it through AnalyticsReplicaRouter, so long aggregations do not compete with
+the writes of the management commands. Everything else, and every write,
+stays on 'default'.
+
+The simplest replica is a SQLite snapshot of the default database
+(HR_ANALYTICS_DB in settings.py), kept current by
+`manage.py refresh_analytics_replica`. A refresh replaces the file as a whole;
+its modification time is the snapshot token that cached analytics responses
+are keyed on (see api/cache.py), so a response computed from an old snapshot
+is never served once a newer one is in place.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_replica_state = threading.local()
+
+
+def replica_alias():
+    """The analytics database alias, or None when no replica is configured"""
+    alias = getattr(settings, 'ANALYTICS_DATABASE_ALIAS', 'analytics')
+    return alias if alias in settings.DATABASES else None
+
+
+def snapshot_path(alias):
+    """File of a SQLite snapshot replica, None for other replicas"""
+    if alias is None or connections[alias].vendor != 'sqlite':
+        return None
+    name = str(connections[alias].settings_dict['NAME'])
+    if name.startswith('file:'):
+        name = name[len('file:'):].split('?', 1)[0]
+    return Path(name)
+
+
+def snapshot_token(alias):
+    """
+    Identifies the replica's current content: the snapshot file's modification
+    time, or the alias for replicas kept current by the database itself.
+    None while a snapshot replica has not been created yet.
+    """
+    path = snapshot_path(alias)
+    if path is None:
+        return alias
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def routed_snapshot_token():
+    """Snapshot token of the replica the current thread reads from, or None when reading from default"""
+    return getattr(_replica_state, 'token', None)
+
+
+@contextmanager
+def use_analytics_replica():
+    """Route this thread's reads to the analytics replica, if one is configured and populated"""
+    alias = replica_alias()
+    token = snapshot_token(alias) if alias else None
+    if token is None or getattr(_replica_state, 'alias', None):
+        yield
+        return
+
+    # A refresh replaces the snapshot file; a persistent connection would keep reading the old one
+    connection = connections[alias]
+    if connection.connection is not None and getattr(_replica_state, 'connected_token', None) != token:
+        connection.close()
+    _replica_state.connected_token = token
+
+    _replica_state.alias, _replica_state.token = alias, token
+    try:
+        yield
+    finally:
+        _replica_state.alias = _replica_state.token = None
+
+
+def analytics_replica(view_method):
+    """Run a read-only viewset action against the analytics replica"""
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        with use_analytics_replica():
+            return view_method(self, request, *args, **kwargs)
+    return wrapper
+
+
+class AnalyticsReplicaRouter:
+    """Sends reads inside use_analytics_replica() to the replica; leaves everything else to default"""
+
+    def db_for_read(self, model, **hints):
+        return getattr(_replica_state, 'alias', None)
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as default
+        aliases = {DEFAULT_DB_ALIAS, replica_alias()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Snapshots are copies of a migrated database; other replicas follow their primary
+        if db == replica_alias():
+            return False
+        return None
+
+
+def refresh_snapshot(alias, source=DEFAULT_DB_ALIAS):
+    """
+    Copy the source database into the replica's snapshot file with SQLite's
+    online backup (a consistent copy, taken without blocking writers for long)
+    and swap it in atomically. Returns the snapshot path.
+    """
+    path = snapshot_path(alias)
+    source_connection = connections[source]
+    if path is None or source_connection.vendor != 'sqlite':
+        raise ValueError(f"'{alias}' is not a SQLite snapshot of a SQLite database")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = path.with_name(f'.{path.name}.tmp')
+    source_connection.ensure_connection()
+    target = sqlite3.connect(temporary_path)
+    try:
+        source_connection.connection.backup(target)
+        # Read-only connections cannot open a write-ahead log database without its -shm file
+        target.execute('PRAGMA journal_mode = DELETE')
+    finally:
+        target.close()
+    os.replace(temporary_path, path)
+    return path
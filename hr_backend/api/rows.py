@@ -0,0 +1,147 @@
+"""
+Fast-path rendering for the long list endpoints.
+
+Once the queries are batched, building a DRF serializer per row (plus one per
+nested object) is most of the CPU time of a list response. A RowRenderer is
+compiled once per serializer class and fieldset (see api/fieldsets.py), reads
+the rows with values() and builds the same JSON shape straight from them
+through precomputed keys and converters, with no per-row serializer object.
+
+Used by EmployeeViewSet.list, DepartmentViewSet.list and
+DepartmentViewSet.employees while settings.FAST_LIST_RENDERING is on. The
+serializer stays the only description of the output:
+
+- model fields are read from the column of their source and converted with the
+  serializer field's own to_representation() (skipped for string, integer,
+  choice and primary key fields, whose column values are already its output);
+- nested serializers become nested dicts, or None when the relation is empty;
+- method fields take the queryset annotation of the same name, or call the
+  serializer's `row_<name>` function with the values of their
+  Meta.field_sources.
+
+Serializers using anything else are rejected with ImproperlyConfigured.
+FastListRenderingTests (api/tests.py) checks the output against the
+serializers; benchmarks/list_rendering.py times both paths.
+"""
+from functools import lru_cache
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.response import Response
+
+# Serializer fields whose to_representation() returns column values unchanged
+PASSTHROUGH_FIELDS = (
+    serializers.CharField, serializers.IntegerField, serializers.ChoiceField, serializers.PrimaryKeyRelatedField
+)
+
+
+def fast_list_rendering():
+    return getattr(settings, 'FAST_LIST_RENDERING', True)
+
+
+def _converted(get, convert):
+    def value(row):
+        raw = get(row)
+        return None if raw is None else convert(raw)
+    return value
+
+
+def _computed(function, getters):
+    def value(row):
+        return function(*[get(row) for get in getters])
+    return value
+
+
+def _nested(is_empty, build):
+    def value(row):
+        return None if is_empty(row) is None else build(row)
+    return value
+
+
+def _builder(plan):
+    def build(row):
+        return {key: get(row) for key, get in plan}
+    return build
+
+
+class RowRenderer:
+    """Renders values() rows of a queryset the way `serializer` renders its instances"""
+
+    def __init__(self, serializer, annotations=()):
+        self.columns = []
+        self.annotations = set(annotations)
+        self.build = self.compile(serializer)
+
+    def column(self, lookup):
+        if lookup not in self.columns:
+            self.columns.append(lookup)
+        return itemgetter(lookup)
+
+    def compile(self, serializer, prefix=''):
+        """Row -> dict function with the keys and values of serializer.data"""
+        field_sources = getattr(serializer.Meta, 'field_sources', {})
+        plan = []
+
+        for name, field in serializer.fields.items():
+            if isinstance(field, serializers.ListSerializer):
+                raise ImproperlyConfigured(f'{type(serializer).__name__}.{name}: nested lists have no row rendering')
+
+            if isinstance(field, serializers.BaseSerializer):
+                relation = f"{prefix}{field.source.replace('.', '__')}"
+                primary_key = field.Meta.model._meta.pk.name
+                get = _nested(self.column(f'{relation}__{primary_key}'), self.compile(field, f'{relation}__'))
+            elif isinstance(field, serializers.SerializerMethodField):
+                row_function = getattr(serializer, f'row_{name}', None)
+                if not prefix and name in self.annotations:
+                    get = self.column(name)
+                elif row_function is not None and name in field_sources:
+                    getters = [self.column(f'{prefix}{source}') for source in field_sources[name]]
+                    get = _computed(row_function, getters)
+                else:
+                    raise ImproperlyConfigured(
+                        f'{type(serializer).__name__}.{name} needs a queryset annotation or a row_{name} function'
+                    )
+            else:
+                get = self.column(f"{prefix}{field.source.replace('.', '__')}")
+                if not isinstance(field, PASSTHROUGH_FIELDS):
+                    get = _converted(get, field.to_representation)
+            plan.append((name, get))
+
+        return _builder(plan)
+
+    def values(self, queryset, extra_columns=()):
+        """The queryset as values() rows holding every column the renderer reads, plus `extra_columns`"""
+        columns = self.columns + [column for column in extra_columns if column not in self.columns]
+        return queryset.values(*columns)
+
+    def render(self, rows):
+        build = self.build
+        return [build(row) for row in rows]
+
+
+@lru_cache(maxsize=64)
+def row_renderer(serializer_class, fields=None, annotations=()):
+    """Compiled renderer for a serializer class, sparse fieldset (a tuple) and queryset annotations"""
+    serializer = serializer_class(fields=list(fields)) if fields is not None else serializer_class()
+    return RowRenderer(serializer, annotations)
+
+
+def row_response(queryset, serializer_class, fields=None, paginator=None, request=None, view=None):
+    """
+    List response for `queryset` rendered on the fast path; paginated by
+    `paginator` unless the request opts out.
+    """
+    renderer = row_renderer(
+        serializer_class, tuple(fields) if fields is not None else None, tuple(sorted(queryset.query.annotations))
+    )
+    if paginator is None:
+        return Response(renderer.render(renderer.values(queryset)))
+
+    # The cursor is built from the ordering columns
+    rows = renderer.values(queryset, paginator.get_ordering(request, queryset, view))
+    page = paginator.paginate_queryset(rows, request, view=view)
+    if page is not None:
+        return paginator.get_paginated_response(renderer.render(page))
+    return Response(renderer.render(rows))
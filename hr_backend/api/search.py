@@ -0,0 +1,113 @@
+"""
+Employee search backed by an SQLite FTS5 index.
+
+`employee_search` is an FTS5 table holding (first_name, last_name,
+employee_code, email) with the employee_id as rowid, mapped read-only by the
+unmanaged EmployeeSearchEntry model. Migrations 0006 and 0010 create it
+together with triggers on the employees table, so every insert, update and
+delete (bulk_create and raw SQL included) keeps the index in sync without any
+Python-side bookkeeping.
+
+Every token of the query must prefix-match a token of the searched columns
+("john sm" finds John Smith, "emp00" finds EMP001), and results are ranked
+with bm25 where whole-token matches score above prefix-only ones. Name
+searches are limited to the name columns with an FTS5 column filter. On other
+database backends search falls back to icontains filtering.
+"""
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, F, Func, Q, Value
+
+SEARCH_TABLE = 'employee_search'
+SEARCH_TOKENIZER = 'unicode61 remove_diacritics 2'
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+NAME_COLUMNS = ('first_name', 'last_name')
+SEARCH_COLUMNS = NAME_COLUMNS + ('employee_code', 'email')
+
+_COLUMN_LIST = ', '.join(SEARCH_COLUMNS)
+_NEW_VALUES = ', '.join(f'new.{column}' for column in SEARCH_COLUMNS)
+
+CREATE_SEARCH_SQL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5({_COLUMN_LIST}, tokenize='{SEARCH_TOKENIZER}')",
+    f"""CREATE TRIGGER IF NOT EXISTS employee_search_insert AFTER INSERT ON employees BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, {_COLUMN_LIST}) VALUES (new.employee_id, {_NEW_VALUES});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS employee_search_delete AFTER DELETE ON employees BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid = old.employee_id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS employee_search_update AFTER UPDATE OF employee_id, {_COLUMN_LIST} ON employees BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid = old.employee_id;
+        INSERT INTO {SEARCH_TABLE}(rowid, {_COLUMN_LIST}) VALUES (new.employee_id, {_NEW_VALUES});
+    END""",
+]
+
+
+class Match(Func):
+    """`<fts5 table column> MATCH <query>` as a filterable expression"""
+    arg_joiner = ' MATCH '
+    template = '%(expressions)s'
+    output_field = BooleanField()
+
+
+def search_index_supported(db_connection=None):
+    return (db_connection or connection).vendor == 'sqlite'
+
+
+def rebuild_search_index(db_connection=None):
+    """(Re)create the index and its triggers and reindex every employee; returns the row count"""
+    db_connection = db_connection or connection
+    with db_connection.cursor() as cursor:
+        for statement in CREATE_SEARCH_SQL:
+            cursor.execute(statement)
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE}(rowid, {_COLUMN_LIST}) '
+            f'SELECT employee_id, {_COLUMN_LIST} FROM employees'
+        )
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')")
+        cursor.execute(f'SELECT COUNT(*) FROM {SEARCH_TABLE}')
+        return cursor.fetchone()[0]
+
+
+def build_match_expression(text, columns=SEARCH_COLUMNS):
+    """
+    Turn free text into an FTS5 query over `columns`: every token must match,
+    whole or as a prefix. Only word characters reach the query, so FTS5
+    syntax in the text (quotes, *, -, parentheses, NEAR, column:) is inert.
+    """
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    if not tokens:
+        return ''
+    # Each token appears as a phrase and as a prefix, so whole-token hits count twice in bm25
+    expression = ' AND '.join(f'("{token}" OR "{token}"*)' for token in tokens)
+    if tuple(columns) == SEARCH_COLUMNS:
+        return expression
+    return f'{{{" ".join(columns)}}} : ({expression})'
+
+
+def search_employees(queryset, text, columns=NAME_COLUMNS):
+    """
+    Filter an Employee queryset by the text searched in `columns`
+    (names by default, or any of SEARCH_COLUMNS).
+    On SQLite the result is annotated with `search_rank` (lower is better).
+    """
+    if not search_index_supported():
+        words = text.split() or [text]
+        condition = Q()
+        for column in columns:
+            condition |= Q(**{f'{column}__icontains': text})
+            condition |= Q(**{f'{column}__icontains': words[0]}) | Q(**{f'{column}__icontains': words[-1]})
+        return queryset.filter(condition)
+
+    expression = build_match_expression(text, columns)
+    if not expression:
+        return queryset if not text.strip() else queryset.none()
+
+    # An inner join on the index lets FTS5 find the matches and score them in a single pass
+    return queryset.filter(
+        Match(F('search_entry__document'), Value(expression)), search_entry__isnull=False
+    ).annotate(
+        search_rank=F('search_entry__rank')
+    )
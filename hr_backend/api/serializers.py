@@ -1,17 +1,28 @@
+from datetime import datetime, timedelta
+
 from rest_framework import serializers
+from django.db.models import F, OuterRef, Prefetch, Subquery
 from .models import Department, Employee, Position, Payroll, PerformanceReview, Attendance
+from .fieldsets import SparseFieldsetSerializer
+from .orgchart import find_reporting_cycles
 
 
-class EmployeeBasicSerializer(serializers.ModelSerializer):
+class EmployeeBasicSerializer(SparseFieldsetSerializer, serializers.ModelSerializer):
     """Basic serializer for Employee (used in nested relationships)"""
     full_name = serializers.SerializerMethodField()
     
     class Meta:
         model = Employee
         fields = ['employee_id', 'first_name', 'last_name', 'full_name', 'email']
+        field_sources = {'full_name': ['first_name', 'last_name']}
     
     def get_full_name(self, obj):
-        return f"{obj.first_name} {obj.last_name}"
+        return self.row_full_name(obj.first_name, obj.last_name)
+    
+    @staticmethod
+    def row_full_name(first_name, last_name):
+        """full_name from the row values (api/rows.py)"""
+        return f"{first_name} {last_name}"
 
 
 class PositionBasicSerializer(serializers.ModelSerializer):
@@ -22,7 +33,7 @@ class PositionBasicSerializer(serializers.ModelSerializer):
         fields = ['position_id', 'position_title', 'position_code', 'min_salary', 'max_salary']
 
 
-class DepartmentListSerializer(serializers.ModelSerializer):
+class DepartmentListSerializer(SparseFieldsetSerializer, serializers.ModelSerializer):
     """Lightweight serializer for Department list view - no nested employees"""
     manager_details = EmployeeBasicSerializer(source='manager', read_only=True)
     employee_count = serializers.SerializerMethodField()
@@ -43,15 +54,22 @@ class DepartmentListSerializer(serializers.ModelSerializer):
             'position_count'
         ]
         read_only_fields = ['department_id', 'created_date']
+        # Counts are annotated by the views' querysets
+        field_sources = {'employee_count': [], 'position_count': []}
     
     def get_employee_count(self, obj):
+        # Use the count annotated by the view's queryset when available
+        if hasattr(obj, 'employee_count'):
+            return obj.employee_count
         return obj.employees.count()
     
     def get_position_count(self, obj):
+        if hasattr(obj, 'position_count'):
+            return obj.position_count
         return obj.positions.count()
 
 
-class DepartmentSerializer(serializers.ModelSerializer):
+class DepartmentSerializer(SparseFieldsetSerializer, serializers.ModelSerializer):
     """Full serializer for Department detail view with nested relationships"""
     manager_details = EmployeeBasicSerializer(source='manager', read_only=True)
     employee_count = serializers.SerializerMethodField()
@@ -76,11 +94,17 @@ class DepartmentSerializer(serializers.ModelSerializer):
             'positions'
         ]
         read_only_fields = ['department_id', 'created_date']
+        field_sources = {'employee_count': [], 'position_count': []}
     
     def get_employee_count(self, obj):
+        # Use the count annotated by the view's queryset when available
+        if hasattr(obj, 'employee_count'):
+            return obj.employee_count
         return obj.employees.count()
     
     def get_position_count(self, obj):
+        if hasattr(obj, 'position_count'):
+            return obj.position_count
         return obj.positions.count()
     
     def validate_department_code(self, value):
@@ -178,7 +202,7 @@ class PositionDetailSerializer(serializers.ModelSerializer):
         ]
 
 
-class EmployeeListSerializer(serializers.ModelSerializer):
+class EmployeeListSerializer(SparseFieldsetSerializer, serializers.ModelSerializer):
     """Lightweight serializer for Employee list view"""
     full_name = serializers.SerializerMethodField()
     department_info = DepartmentBasicSerializer(source='department', read_only=True)
@@ -190,9 +214,25 @@ class EmployeeListSerializer(serializers.ModelSerializer):
             'employee_id', 'employee_code', 'first_name', 'last_name', 'full_name',
             'email', 'phone', 'department_info', 'position_info', 'employment_status'
         ]
+        field_sources = {'full_name': ['first_name', 'last_name']}
     
     def get_full_name(self, obj):
-        return f"{obj.first_name} {obj.last_name}"
+        return self.row_full_name(obj.first_name, obj.last_name)
+    
+    @staticmethod
+    def row_full_name(first_name, last_name):
+        """full_name from the row values (api/rows.py)"""
+        return f"{first_name} {last_name}"
+
+
+class OrgChartReportSerializer(EmployeeListSerializer):
+    """Employee in a reporting line, with their place in the org chart"""
+    reporting_level = serializers.IntegerField(read_only=True)
+    direct_reports = serializers.IntegerField(source='org_node.direct_reports', read_only=True)
+    total_reports = serializers.IntegerField(source='org_node.total_reports', read_only=True)
+    
+    class Meta(EmployeeListSerializer.Meta):
+        fields = EmployeeListSerializer.Meta.fields + ['manager', 'reporting_level', 'direct_reports', 'total_reports']
 
 
 class PayrollBasicSerializer(serializers.ModelSerializer):
@@ -235,7 +275,7 @@ class AttendanceBasicSerializer(serializers.ModelSerializer):
         ]
 
 
-class EmployeeDetailSerializer(serializers.ModelSerializer):
+class EmployeeDetailSerializer(SparseFieldsetSerializer, serializers.ModelSerializer):
     """Detailed serializer for Employee with all related data"""
     full_name = serializers.SerializerMethodField()
     department_info = DepartmentBasicSerializer(source='department', read_only=True)
@@ -253,23 +293,87 @@ class EmployeeDetailSerializer(serializers.ModelSerializer):
             'department_info', 'position_info', 'manager_info', 'employment_status',
             'created_date', 'updated_date', 'recent_payrolls', 'recent_reviews', 'recent_attendance'
         ]
+        # The recent_* rows are prefetched by setup_eager_loading
+        field_sources = {
+            'full_name': ['first_name', 'last_name'],
+            'recent_payrolls': [],
+            'recent_reviews': [],
+            'recent_attendance': []
+        }
+    
+    # How many of the most recent history rows each recent_* field renders
+    RECENT_PAYROLLS = 3
+    RECENT_REVIEWS = 2
+    RECENT_ATTENDANCE = 10
+    # The analytics block's salary growth compares against the salary this long ago
+    SALARY_GROWTH_WINDOW = timedelta(days=180)
+    
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None):
+        """
+        Load everything the detail view needs up front: only the most recent rows of
+        each history table are prefetched (newest first) into a recent_* attribute.
+        With a sparse fieldset (`fields`, see api/fieldsets.py) only what the
+        requested fields render is loaded; the joins are left to sparse_queryset().
+        """
+        recent_prefetches = {
+            'recent_payrolls': Prefetch(
+                'payroll_records',
+                queryset=Payroll.objects.order_by('-pay_period_end')[:cls.RECENT_PAYROLLS],
+                to_attr='recent_payroll_records'
+            ),
+            'recent_reviews': Prefetch(
+                'performance_reviews',
+                queryset=PerformanceReview.objects.select_related('reviewer').order_by('-review_date')[:cls.RECENT_REVIEWS],
+                to_attr='recent_review_records'
+            ),
+            'recent_attendance': Prefetch(
+                'attendance_records',
+                queryset=Attendance.objects.order_by('-date')[:cls.RECENT_ATTENDANCE],
+                to_attr='recent_attendance_records'
+            )
+        }
+        if fields is None:
+            queryset = queryset.select_related('position__department')
+        # direct_reports_count and salary_before_window feed the view's analytics block
+        if fields is None or 'analytics' in fields:
+            window_start = (datetime.now() - cls.SALARY_GROWTH_WINDOW).date()
+            salary_before_window = Payroll.objects.filter(
+                employee=OuterRef('pk'), pay_period_start__lte=window_start
+            ).order_by('-pay_period_end').values('net_salary')[:1]
+            queryset = queryset.annotate(
+                direct_reports_count=F('org_node__direct_reports'),
+                salary_before_window=Subquery(salary_before_window)
+            )
+        return queryset.prefetch_related(*[
+            prefetch for name, prefetch in recent_prefetches.items() if fields is None or name in fields
+        ])
     
     def get_full_name(self, obj):
         return f"{obj.first_name} {obj.last_name}"
     
     def get_recent_payrolls(self, obj):
         """Get last 3 payroll records"""
-        recent_payrolls = Payroll.objects.filter(employee=obj).order_by('-pay_period_end')[:3]
+        if hasattr(obj, 'recent_payroll_records'):
+            recent_payrolls = obj.recent_payroll_records
+        else:
+            recent_payrolls = Payroll.objects.filter(employee=obj).order_by('-pay_period_end')[:self.RECENT_PAYROLLS]
         return PayrollBasicSerializer(recent_payrolls, many=True).data
     
     def get_recent_reviews(self, obj):
         """Get last 2 performance reviews"""
-        recent_reviews = PerformanceReview.objects.filter(employee=obj).order_by('-review_date')[:2]
+        if hasattr(obj, 'recent_review_records'):
+            recent_reviews = obj.recent_review_records
+        else:
+            recent_reviews = PerformanceReview.objects.filter(employee=obj).select_related('reviewer').order_by('-review_date')[:self.RECENT_REVIEWS]
         return PerformanceReviewBasicSerializer(recent_reviews, many=True).data
     
     def get_recent_attendance(self, obj):
         """Get last 10 attendance records"""
-        recent_attendance = Attendance.objects.filter(employee=obj).order_by('-date')[:10]
+        if hasattr(obj, 'recent_attendance_records'):
+            recent_attendance = obj.recent_attendance_records
+        else:
+            recent_attendance = Attendance.objects.filter(employee=obj).order_by('-date')[:self.RECENT_ATTENDANCE]
         return AttendanceBasicSerializer(recent_attendance, many=True).data
 
 
@@ -284,6 +388,15 @@ class EmployeeCreateUpdateSerializer(serializers.ModelSerializer):
             'position', 'manager', 'employment_status'
         ]
     
+    def validate(self, attrs):
+        """Ensure the new manager does not close a reporting cycle"""
+        manager = attrs.get('manager')
+        if self.instance is not None and manager is not None and find_reporting_cycles({self.instance.pk: manager.pk}):
+            raise serializers.ValidationError({
+                'manager': "An employee cannot report to themselves or to someone who reports to them."
+            })
+        return attrs
+    
     def validate_email(self, value):
         """Ensure email is unique"""
         if self.instance:
@@ -302,4 +415,32 @@ class EmployeeCreateUpdateSerializer(serializers.ModelSerializer):
         else:
             if Employee.objects.filter(employee_code=value).exists():
                 raise serializers.ValidationError("An employee with this code already exists.")
-        return value 
\ No newline at end of file
+        return value
+
+
+class EmployeeBulkRowSerializer(EmployeeCreateUpdateSerializer):
+    """
+    Field-level validation of one row of a bulk write.
+    Uniqueness and related-record checks run once for the whole batch (api/bulk.py),
+    so this serializer issues no queries.
+    """
+    employee_id = serializers.IntegerField(required=False, min_value=1)
+    department = serializers.IntegerField(required=False, allow_null=True)
+    position = serializers.IntegerField(required=False, allow_null=True)
+    manager = serializers.IntegerField(required=False, allow_null=True)
+    
+    class Meta(EmployeeCreateUpdateSerializer.Meta):
+        fields = ['employee_id'] + EmployeeCreateUpdateSerializer.Meta.fields
+        extra_kwargs = {
+            'email': {'validators': []},
+            'employee_code': {'validators': []}
+        }
+    
+    def validate_email(self, value):
+        return value
+    
+    def validate_employee_code(self, value):
+        return value
+    
+    def validate(self, attrs):
+        return attrs
@@ -0,0 +1,94 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import invalidate_on_commit
+from .kpis import refresh_department_kpis
+from .orgchart import move_org_node, remove_org_node
+from .models import Attendance, Department, Employee, EmploymentStatusChange, Payroll, PerformanceReview, Position
+from .snapshots import refresh_latest_payroll, snapshot_sync_deferred
+
+
+@receiver(post_save, sender=Payroll)
+@receiver(post_delete, sender=Payroll)
+def sync_latest_payroll(sender, instance, **kwargs):
+    """Keep the LatestPayroll snapshot in step with single-row payroll writes"""
+    if snapshot_sync_deferred():
+        return
+    refresh_latest_payroll(instance.employee_id)
+
+
+@receiver(pre_save, sender=Employee)
+def remember_previous_employment(sender, instance, **kwargs):
+    """Capture the stored status, department and manager so post_save can see what changed"""
+    instance._previous_employment = None
+    if instance._state.adding or instance.pk is None:
+        return
+    instance._previous_employment = Employee.objects.filter(pk=instance.pk).values(
+        'employment_status', 'department_id', 'hire_date', 'manager_id'
+    ).first()
+
+
+@receiver(post_save, sender=Employee)
+def track_employment_change(sender, instance, created, **kwargs):
+    """Log status transitions and refresh the affected departments' KPIs"""
+    previous = getattr(instance, '_previous_employment', None)
+    if previous and previous['employment_status'] != instance.employment_status:
+        EmploymentStatusChange.objects.create(
+            employee=instance,
+            old_status=previous['employment_status'],
+            new_status=instance.employment_status,
+            changed_date=timezone.now()
+        )
+
+    if snapshot_sync_deferred():
+        return
+    if created or previous is None:
+        refresh_department_kpis(instance.department_id)
+        return
+    if any(previous[field] != getattr(instance, field) for field in ('employment_status', 'department_id', 'hire_date')):
+        refresh_department_kpis(instance.department_id)
+        if previous['department_id'] != instance.department_id:
+            refresh_department_kpis(previous['department_id'])
+
+
+@receiver(post_delete, sender=Employee)
+def refresh_kpis_after_employee_delete(sender, instance, **kwargs):
+    if snapshot_sync_deferred():
+        return
+    refresh_department_kpis(instance.department_id)
+
+
+@receiver(post_save, sender=Employee)
+def sync_org_chart(sender, instance, created, **kwargs):
+    """Place an employee in the hierarchy when they join or change manager"""
+    if snapshot_sync_deferred():
+        return
+    previous = getattr(instance, '_previous_employment', None)
+    if created or previous is None or previous['manager_id'] != instance.manager_id:
+        move_org_node(instance.pk, instance.manager_id)
+
+
+@receiver(pre_delete, sender=Employee)
+def sync_org_chart_before_delete(sender, instance, **kwargs):
+    """Take the employee out of the hierarchy while their node and reports' nodes still exist"""
+    if snapshot_sync_deferred():
+        return
+    remove_org_node(instance.pk)
+
+
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+@receiver(post_save, sender=Position)
+@receiver(post_delete, sender=Position)
+@receiver(post_save, sender=Payroll)
+@receiver(post_delete, sender=Payroll)
+@receiver(post_save, sender=PerformanceReview)
+@receiver(post_delete, sender=PerformanceReview)
+@receiver(post_save, sender=Attendance)
+@receiver(post_delete, sender=Attendance)
+def invalidate_cached_responses(sender, instance, **kwargs):
+    """Expire cached responses and HTTP validators that depend on the written model"""
+    invalidate_on_commit(sender)
@@ -0,0 +1,118 @@
+"""
+Maintenance of denormalized snapshot tables.
+
+LatestPayroll holds one row per employee pointing at their most recent
+payroll record; DepartmentMonthlyKPI (api/kpis.py) holds monthly headcount
+figures per department and OrgChartNode (api/orgchart.py) the management
+hierarchy. All are kept current incrementally by the signals in
+api/signals.py; bulk writers (bulk_create, mass deletes) should wrap their work
+in `deferred_snapshot_sync()` so the snapshots are rebuilt once at the end
+instead of row by row. Writers that know what they touched pass rebuild=False
+and call `sync_snapshots()` for just those departments and reporting lines.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from .cache import invalidate_on_commit
+from .kpis import rebuild_department_kpis, refresh_department_kpis
+from .orgchart import rebuild_org_chart, sync_org_chart
+from .models import LatestPayroll, Payroll
+
+# Newest pay period first; payroll_id breaks ties between records of the same period
+LATEST_PAYROLL_ORDERING = ('-pay_period_end', '-payroll_id')
+
+_sync_state = threading.local()
+
+
+def snapshot_sync_deferred():
+    """True while inside a deferred_snapshot_sync() block on this thread"""
+    return getattr(_sync_state, 'depth', 0) > 0
+
+
+@contextmanager
+def deferred_snapshot_sync(rebuild=True):
+    """
+    Suspend per-row snapshot maintenance and rebuild everything once on exit;
+    with rebuild=False the caller brings them up to date with sync_snapshots()
+    """
+    _sync_state.depth = getattr(_sync_state, 'depth', 0) + 1
+    try:
+        yield
+    finally:
+        _sync_state.depth -= 1
+    if rebuild and not snapshot_sync_deferred():
+        rebuild_latest_payrolls()
+        rebuild_department_kpis()
+        rebuild_org_chart()
+
+
+def sync_snapshots(department_ids=(), placements=()):
+    """
+    Refresh the KPIs of `department_ids` and apply the (employee_id, manager_id)
+    `placements` to the org chart after a deferred_snapshot_sync(rebuild=False)
+    block. Does nothing inside an enclosing block, which rebuilds everything.
+    """
+    if snapshot_sync_deferred():
+        return
+    for department_id in sorted(set(department_ids) - {None}):
+        refresh_department_kpis(department_id)
+    sync_org_chart(placements)
+
+
+def refresh_latest_payroll(employee_id):
+    """Recompute the LatestPayroll row for a single employee"""
+    latest = (
+        Payroll.objects.filter(employee_id=employee_id)
+        .order_by(*LATEST_PAYROLL_ORDERING)
+        .values('payroll_id', 'pay_period_end', 'net_salary')
+        .first()
+    )
+    if latest is None:
+        LatestPayroll.objects.filter(employee_id=employee_id).delete()
+        return None
+
+    snapshot, _ = LatestPayroll.objects.update_or_create(
+        employee_id=employee_id,
+        defaults={
+            'payroll_id': latest['payroll_id'],
+            'pay_period_end': latest['pay_period_end'],
+            'net_salary': latest['net_salary'],
+            'updated_date': timezone.now(),
+        }
+    )
+    return snapshot
+
+
+def rebuild_latest_payrolls(batch_size=1000):
+    """Rebuild the whole LatestPayroll table from the payroll history"""
+    ranked = Payroll.objects.annotate(
+        row_number=Window(
+            expression=RowNumber(),
+            partition_by=[F('employee_id')],
+            order_by=[F('pay_period_end').desc(), F('payroll_id').desc()],
+        )
+    ).filter(row_number=1).values_list('employee_id', 'payroll_id', 'pay_period_end', 'net_salary')
+
+    now = timezone.now()
+    with transaction.atomic():
+        LatestPayroll.objects.all().delete()
+        snapshots = [
+            LatestPayroll(
+                employee_id=employee_id,
+                payroll_id=payroll_id,
+                pay_period_end=pay_period_end,
+                net_salary=net_salary,
+                updated_date=now
+            )
+            for employee_id, payroll_id, pay_period_end, net_salary in ranked.iterator(chunk_size=batch_size)
+        ]
+        LatestPayroll.objects.bulk_create(snapshots, batch_size=batch_size)
+        # bulk_create sends no signals; expire analytics computed from the old snapshot
+        invalidate_on_commit(Payroll)
+
+    return len(snapshots)
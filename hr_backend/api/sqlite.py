@@ -0,0 +1,29 @@
+"""
+SQLite connection tuning.
+
+settings.SQLITE_PRAGMAS (filled in by the HR_DB_PROFILE=production database
+profile) holds PRAGMA settings that SQLite keeps per connection, so they are
+applied from the connection_created signal every time Django opens one.
+"""
+from django.conf import settings
+
+# PRAGMAs that write to the database file, skipped on read-only (mode=ro) connections
+FILE_PRAGMAS = {'journal_mode'}
+
+
+def is_read_only(settings_dict):
+    """True for a database opened through a read-only SQLite URI (the analytics replica)"""
+    name = str(settings_dict['NAME'])
+    return settings_dict.get('OPTIONS', {}).get('uri', False) and name.startswith('file:') and 'mode=ro' in name
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """connection_created handler: run settings.SQLITE_PRAGMAS on a new SQLite connection"""
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', None)
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+    read_only = is_read_only(connection.settings_dict)
+    # On the raw connection: connection setup is not one of the request's queries
+    for name, value in pragmas.items():
+        if not (read_only and name in FILE_PRAGMAS):
+            connection.connection.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,47 @@
+"""
+Test helpers for the per-action query budgets (settings.QUERY_BUDGETS).
+
+RequestMetricsMiddleware attaches its measurements to every response, so a
+test only has to make the request and pass the response on:
+
+    from django.test import TestCase
+    from api.testing import QueryBudgetMixin
+
+    class DepartmentApiTests(QueryBudgetMixin, TestCase):
+        def test_retrieve_stays_within_budget(self):
+            response = self.client.get('/api/departments/1/')
+            self.assertWithinQueryBudget(response)
+
+The failure message lists the SQL the action ran.
+"""
+from .instrumentation import query_budget
+
+
+def assert_within_query_budget(response, budget=None):
+    """
+    Fail if the request behind `response` ran more SQL queries than `budget`,
+    by default the budget settings.QUERY_BUDGETS gives its action.
+    """
+    metrics = getattr(response, 'metrics', None)
+    if metrics is None:
+        raise AssertionError('The response was not measured; is RequestMetricsMiddleware in MIDDLEWARE?')
+    if budget is None:
+        budget = query_budget(metrics.action)
+        if budget is None:
+            raise AssertionError(f'{metrics.action} has no query budget in settings.QUERY_BUDGETS')
+    if metrics.queries > budget:
+        statements = '\n'.join(f'  {number}. {sql}' for number, sql in enumerate(metrics.statements, start=1))
+        raise AssertionError(
+            f'{metrics.action} ran {metrics.queries} SQL queries, over its budget of {budget}:\n{statements}'
+        )
+    return metrics
+
+
+class QueryBudgetMixin:
+    """TestCase mixin providing assertWithinQueryBudget()"""
+
+    def assertWithinQueryBudget(self, response, budget=None):
+        try:
+            return assert_within_query_budget(response, budget)
+        except AssertionError as exc:
+            raise self.failureException(str(exc)) from None
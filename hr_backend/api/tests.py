@@ -1,3 +1,1202 @@
-from django.test import TestCase
+import base64
+import csv
+import json
+import random
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .analytics import annotated_departments
+from .cache import get_cache, invalidate_on_commit, model_versions, reset_cache_stats
+from .kpis import KPI_COLUMNS, add_months, compute_department_series, department_series, month_start
+from .orgchart import compute_org_chart, find_reporting_cycles
+from .models import (
+    Attendance, Department, DepartmentMonthlyKPI, Employee, EmployeeSearchEntry, EmploymentStatusChange, LatestPayroll,
+    OrgChartNode, Payroll, PerformanceReview, Position
+)
+from .renderers import ORJSONRenderer
+from .rows import row_response
+from .serializers import (
+    DepartmentListSerializer, EmployeeBasicSerializer, EmployeeCreateUpdateSerializer, EmployeeListSerializer
+)
+from .snapshots import rebuild_latest_payrolls
+from .testing import QueryBudgetMixin
+
+# Keeps test runs out of the shared file-based analytics cache
+TEST_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-default'},
+    'analytics': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests-analytics'},
+}
+
+
+def create_department(code, **fields):
+    fields.setdefault('department_name', f'{code} Department')
+    return Department.objects.create(department_code=code, **fields)
+
+
+def create_employee(code, **fields):
+    fields.setdefault('first_name', code.title())
+    fields.setdefault('last_name', 'Tester')
+    fields.setdefault('email', f'{code.lower()}@company.com')
+    fields.setdefault('hire_date', date(2020, 1, 1))
+    fields.setdefault('employment_status', 'ACTIVE')
+    return Employee.objects.create(employee_code=code, **fields)
+
+
+def create_payroll(employee, pay_period_end, net_salary, **fields):
+    return Payroll.objects.create(
+        employee=employee,
+        pay_period_start=pay_period_end.replace(day=1),
+        pay_period_end=pay_period_end,
+        basic_salary=fields.pop('basic_salary', net_salary),
+        net_salary=net_salary,
+        **fields
+    )
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ApiTestCase(QueryBudgetMixin, TestCase):
+    """TestCase with an in-memory analytics cache, emptied before every test"""
+
+    def setUp(self):
+        super().setUp()
+        get_cache().clear()
+        reset_cache_stats()
+
+
+class LatestPayrollSnapshotTests(ApiTestCase):
+    """Single-row payroll writes keep LatestPayroll equal to a full rebuild (api/snapshots.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = create_employee('PAY1')
+        cls.other = create_employee('PAY2')
+        cls.march = create_payroll(cls.employee, date(2025, 3, 31), 1000)
+        cls.april = create_payroll(cls.employee, date(2025, 4, 30), 1100)
+        create_payroll(cls.other, date(2025, 4, 30), 900)
+
+    def snapshot(self):
+        return sorted(LatestPayroll.objects.values_list('employee_id', 'payroll_id', 'pay_period_end', 'net_salary'))
+
+    def assertMatchesRebuild(self):
+        maintained = self.snapshot()
+        rebuild_latest_payrolls()
+        self.assertEqual(maintained, self.snapshot())
+
+    def latest(self, employee):
+        return LatestPayroll.objects.get(employee=employee)
+
+    def test_fixture_snapshot(self):
+        self.assertEqual(self.latest(self.employee).payroll_id, self.april.pk)
+        self.assertMatchesRebuild()
+
+    def test_newer_payroll_becomes_latest(self):
+        may = create_payroll(self.employee, date(2025, 5, 31), 1200)
+        self.assertEqual(self.latest(self.employee).payroll_id, may.pk)
+        self.assertEqual(self.latest(self.employee).net_salary, 1200)
+        self.assertMatchesRebuild()
+
+    def test_older_payroll_leaves_latest_alone(self):
+        create_payroll(self.employee, date(2025, 1, 31), 800)
+        self.assertEqual(self.latest(self.employee).payroll_id, self.april.pk)
+        self.assertMatchesRebuild()
+
+    def test_updating_latest_payroll(self):
+        self.april.net_salary = 1150
+        self.april.save()
+        self.assertEqual(self.latest(self.employee).net_salary, 1150)
+        self.assertMatchesRebuild()
+
+    def test_moving_a_payroll_to_a_later_period(self):
+        self.march.pay_period_end = date(2025, 6, 30)
+        self.march.save()
+        self.assertEqual(self.latest(self.employee).payroll_id, self.march.pk)
+        self.assertMatchesRebuild()
+
+    def test_deleting_latest_payroll_falls_back(self):
+        self.april.delete()
+        self.assertEqual(self.latest(self.employee).payroll_id, self.march.pk)
+        self.assertMatchesRebuild()
+
+    def test_deleting_only_payroll_removes_snapshot(self):
+        Payroll.objects.get(employee=self.other).delete()
+        self.assertFalse(LatestPayroll.objects.filter(employee=self.other).exists())
+        self.assertMatchesRebuild()
+
+    def test_tie_on_pay_period_end_goes_to_highest_id(self):
+        correction = create_payroll(self.employee, date(2025, 4, 30), 1125)
+        self.assertEqual(self.latest(self.employee).payroll_id, correction.pk)
+        self.assertMatchesRebuild()
+
+        correction.delete()
+        self.assertEqual(self.latest(self.employee).payroll_id, self.april.pk)
+        self.assertMatchesRebuild()
+
+
+class KeysetPaginationTests(ApiTestCase):
+    """Walking the cursor links visits every employee once (api/pagination.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = create_department('PAG')
+        # Ties on last name, and on last and first name, around every page boundary
+        names = [('Le', 'An'), ('Le', 'An'), ('Le', 'An'), ('Le', 'Binh'), ('Nguyen', 'An'),
+                 ('Nguyen', 'Chi'), ('Nguyen', 'Chi'), ('Pham', 'Dung'), ('Tran', 'An'), ('Tran', 'An')]
+        cls.employees = [
+            create_employee(f'PAG{number}', first_name=first_name, last_name=last_name, department=cls.department)
+            for number, (first_name, last_name) in enumerate(names)
+        ]
+        cls.expected_order = [
+            employee.pk for employee in sorted(cls.employees, key=lambda e: (e.last_name, e.first_name, e.pk))
+        ]
+
+    def walk(self, url, link='next'):
+        """Follow `link` from url; returns the employee ids of every page, in page order"""
+        pages = []
+        while url:
+            response = self.client.get(url, HTTP_ACCEPT='application/json')
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            pages.append([row['employee_id'] for row in body['results']])
+            url = body[link]
+        return pages
+
+    def test_forward_walk_returns_every_employee_once(self):
+        for page_size in (1, 2, 3, 4, 10):
+            with self.subTest(page_size=page_size):
+                pages = self.walk(f'/api/employees/?page_size={page_size}')
+                visited = [employee_id for page in pages for employee_id in page]
+                self.assertEqual(visited, self.expected_order)
+                self.assertTrue(all(len(page) <= page_size for page in pages))
+
+    def test_backward_walk_mirrors_forward_walk(self):
+        forward = self.walk('/api/employees/?page_size=3')
+        last_page = self.client.get('/api/employees/?page_size=3', HTTP_ACCEPT='application/json').json()
+        while last_page['next']:
+            last_page = self.client.get(last_page['next'], HTTP_ACCEPT='application/json').json()
+        backward = self.walk(last_page['previous'], link='previous')
+        visited = [employee_id for page in reversed(backward) for employee_id in page]
+        self.assertEqual(visited, [employee_id for page in forward[:-1] for employee_id in page])
+
+    def test_department_employees_walk(self):
+        pages = self.walk(f'/api/departments/{self.department.pk}/employees/?page_size=2')
+        self.assertEqual([employee_id for page in pages for employee_id in page], self.expected_order)
+
+    def test_serializer_path_walk(self):
+        with override_settings(FAST_LIST_RENDERING=False):
+            pages = self.walk('/api/employees/?page_size=4')
+        self.assertEqual([employee_id for page in pages for employee_id in page], self.expected_order)
+
+    def test_malformed_cursor_is_a_bad_request(self):
+        def encoded(payload):
+            return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+
+        cursors = [
+            'not a cursor',
+            '%%%',
+            base64.urlsafe_b64encode(b'\xff\xfe').decode('ascii'),
+            encoded(None),
+            encoded([1, 2, 3]),
+            encoded({'r': 0}),
+            encoded({'p': 'Le'}),
+            encoded({'p': ['Le', 'An']}),
+            encoded({'p': [{'name': 'Le'}, 'An', 1]}),
+            encoded({'p': [['Le'], 'An', 1]}),
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/api/employees/', {'cursor': cursor}, HTTP_ACCEPT='application/json')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('cursor', response.json())
+
+
+class FastListRenderingTests(ApiTestCase):
+    """The values() row rendering (api/rows.py) must produce exactly what the serializers produce"""
+
+    @classmethod
+    def setUpTestData(cls):
+        manager = Employee.objects.create(
+            employee_code='EMP0001', first_name='Mai', last_name='Nguyen', email='mai.nguyen@company.com',
+            phone='0901234567', hire_date=date(2019, 3, 1), employment_status='ACTIVE'
+        )
+        finance = Department.objects.create(
+            department_name='Finance', department_code='FIN', manager=manager,
+            budget=Decimal('800000.00'), location='Floor 2'
+        )
+        Department.objects.create(department_name='Risk', department_code='RM')
+        analyst = Position.objects.create(
+            position_title='Analyst', position_code='FIN-AN', department=finance,
+            min_salary=Decimal('1200.50'), max_salary=Decimal('2500.00')
+        )
+        manager.department = finance
+        manager.position = analyst
+        manager.save()
+
+        Employee.objects.create(
+            employee_code='EMP0002', first_name='An', last_name='Le', email='an.le@company.com',
+            hire_date=date(2021, 6, 15), department=finance, position=analyst, manager=manager,
+            employment_status='ON_LEAVE'
+        )
+        # No position
+        Employee.objects.create(
+            employee_code='EMP0003', first_name='Binh', last_name='Tran', email='binh.tran@company.com',
+            hire_date=date(2022, 1, 10), department=finance, manager=manager, employment_status='ACTIVE'
+        )
+        # No department, position, manager, phone or status
+        Employee.objects.create(
+            employee_code='EMP0004', first_name='Chi', last_name='Pham', email='chi.pham@company.com',
+            hire_date=date(2023, 9, 4)
+        )
+
+    def assertSameJson(self, fast, serialized):
+        render = ORJSONRenderer().render
+        self.assertEqual(render(fast), render(serialized))
+
+    def assertRowsMatchSerializer(self, queryset, serializer_class, fields=None):
+        fast = row_response(queryset, serializer_class, fields).data
+        serialized = serializer_class(queryset, many=True, fields=fields).data
+        self.assertEqual(len(fast), queryset.count())
+        self.assertSameJson(fast, serialized)
+
+    def test_employee_list_rows(self):
+        employees = Employee.objects.select_related('department', 'position').order_by('employee_id')
+        self.assertRowsMatchSerializer(employees, EmployeeListSerializer)
+        self.assertRowsMatchSerializer(employees, EmployeeListSerializer, ['full_name', 'department_info'])
+        self.assertRowsMatchSerializer(employees, EmployeeListSerializer, ['employee_id', 'position_info', 'phone'])
+
+    def test_employee_basic_rows(self):
+        employees = Employee.objects.order_by('last_name', 'first_name')
+        self.assertRowsMatchSerializer(employees, EmployeeBasicSerializer)
+        self.assertRowsMatchSerializer(employees, EmployeeBasicSerializer, ['employee_id', 'full_name'])
+
+    def test_department_list_rows(self):
+        departments = annotated_departments().select_related('manager').order_by('department_name')
+        self.assertRowsMatchSerializer(departments, DepartmentListSerializer)
+        self.assertRowsMatchSerializer(departments, DepartmentListSerializer, ['department_name', 'manager_details'])
+        self.assertRowsMatchSerializer(departments, DepartmentListSerializer, ['budget', 'employee_count'])
+
+    def test_endpoints_match_serializer_path(self):
+        finance = Department.objects.get(department_code='FIN')
+        urls = [
+            '/api/employees/',
+            '/api/employees/?fields=employee_id,full_name,department_info',
+            '/api/employees/?omit=position_info&page_size=2',
+            '/api/employees/?paginate=false',
+            '/api/departments/',
+            '/api/departments/?fields=department_code,manager_details,position_count',
+            f'/api/departments/{finance.pk}/employees/',
+            f'/api/departments/{finance.pk}/employees/?fields=full_name,email',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                with override_settings(FAST_LIST_RENDERING=False):
+                    serialized = self.client.get(url, HTTP_ACCEPT='application/json')
+                fast = self.client.get(url, HTTP_ACCEPT='application/json')
+                self.assertEqual(fast.status_code, 200)
+                self.assertEqual(serialized.status_code, 200)
+                self.assertEqual(fast.content, serialized.content)
+
+
+class EmployeeDetailTests(ApiTestCase):
+    """GET /api/employees/{id}/ reads the payroll figures from the history it loads with the employee"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = create_employee('DET1')
+        today = date.today()
+        # Only the oldest period starts before the 180-day salary growth window
+        create_payroll(cls.employee, today - timedelta(days=400), 4000)
+        create_payroll(cls.employee, today - timedelta(days=60), 4500)
+        create_payroll(cls.employee, today - timedelta(days=20), 5000)
+        cls.unpaid = create_employee('DET2')
+        PerformanceReview.objects.create(
+            employee=cls.employee, reviewer=cls.unpaid, review_period_start=date(2025, 1, 1),
+            review_period_end=date(2025, 12, 31), review_date=date(2026, 1, 15), overall_score=4.0
+        )
+
+    def get(self, employee, **params):
+        return self.client.get(f'/api/employees/{employee.pk}/', params, HTTP_ACCEPT='application/json')
+
+    def test_payroll_analytics(self):
+        with self.assertNumQueries(8):
+            response = self.get(self.employee)
+        self.assertWithinQueryBudget(response)
+        payroll = response.json()['analytics']['payroll']
+        self.assertEqual(payroll['current_salary'], 5000)
+        self.assertEqual(payroll['salary_growth_percent'], 25.0)
+        self.assertEqual(payroll['highest_salary'], 5000)
+        self.assertEqual(payroll['lowest_salary'], 4000)
+        self.assertEqual(payroll['payroll_records_count'], 3)
+
+    def test_sparse_analytics_match_full_response(self):
+        full = self.get(self.employee).json()['analytics']
+        sparse = self.get(self.employee, fields='analytics').json()['analytics']
+        self.assertEqual(sparse, full)
+
+    def test_employee_without_payrolls(self):
+        response = self.get(self.unpaid)
+        self.assertWithinQueryBudget(response)
+        self.assertEqual(response.json()['analytics']['payroll']['current_salary'], 0)
+
+
+class ResponseCacheTests(ApiTestCase):
+    """Analytics responses are cached until a write to a model they read commits (api/cache.py)"""
+
+    CACHED_URLS = ['/api/departments/analytics_all/', '/api/departments/stats/', '/api/employees/analytics_summary/']
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = create_department('CCH')
+        cls.position = Position.objects.create(position_title='Analyst', position_code='CCH-AN', department=cls.department)
+        cls.employee = create_employee('CCH1', department=cls.department, position=cls.position)
+        create_employee('CCH2', department=cls.department, employment_status='INACTIVE')
+        create_payroll(cls.employee, date(2025, 6, 30), 3000)
+
+    def get(self, url):
+        """(response, number of SQL queries it ran)"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def assertRecomputed(self, url):
+        response, queries = self.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertGreater(queries, 0)
+
+    def assertServedFromCache(self, url):
+        response, queries = self.get(url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(queries, 0)
+
+    def test_second_get_is_served_from_cache(self):
+        for url in self.CACHED_URLS:
+            with self.subTest(url=url):
+                first, first_queries = self.get(url)
+                second, second_queries = self.get(url)
+                self.assertEqual((first['X-Cache'], second['X-Cache']), ('MISS', 'HIT'))
+                self.assertGreater(first_queries, 0)
+                self.assertEqual(second_queries, 0)
+                self.assertEqual(first.content, second.content)
+
+    def test_writes_invalidate_dependent_responses(self):
+        writes = {
+            'department': lambda: Department.objects.get(pk=self.department.pk).save(),
+            'employee': lambda: Employee.objects.get(pk=self.employee.pk).save(),
+            'payroll': lambda: create_payroll(self.employee, date(2025, 7, 31), 3100),
+        }
+        urls = {
+            'department': self.CACHED_URLS,
+            'employee': self.CACHED_URLS,
+            'payroll': ['/api/departments/analytics_all/'],
+        }
+        for name, write in writes.items():
+            for url in urls[name]:
+                with self.subTest(write=name, url=url):
+                    self.get(url)
+                    self.assertServedFromCache(url)
+                    with self.captureOnCommitCallbacks(execute=True):
+                        write()
+                    self.assertRecomputed(url)
+                    self.assertServedFromCache(url)
+
+    def test_unrelated_writes_keep_cached_responses(self):
+        url = '/api/employees/analytics_summary/'
+        self.get(url)
+        for model, write in [
+            (Payroll, lambda: create_payroll(self.employee, date(2025, 8, 31), 3200)),
+            (PerformanceReview, lambda: PerformanceReview.objects.create(
+                employee=self.employee, reviewer=self.employee, review_period_start=date(2025, 1, 1),
+                review_period_end=date(2025, 6, 30), review_date=date(2025, 7, 1), overall_score=3.5
+            )),
+            (Attendance, lambda: Attendance.objects.create(employee=self.employee, date=date(2025, 7, 1), status='PRESENT')),
+        ]:
+            with self.subTest(model=model.__name__):
+                before = model_versions([model])
+                with self.captureOnCommitCallbacks(execute=True):
+                    write()
+                # The write expires what depends on its model (the employee detail view for reviews
+                # and attendance), but not the summary, which reads departments and employees only
+                self.assertNotEqual(model_versions([model]), before)
+                self.assertServedFromCache(url)
+
+    def test_invalidate_on_commit_waits_for_the_commit(self):
+        url = '/api/departments/stats/'
+        self.get(url)
+        with self.captureOnCommitCallbacks() as callbacks:
+            invalidate_on_commit(Position)
+        self.assertServedFromCache(url)
+        for callback in callbacks:
+            callback()
+        self.assertRecomputed(url)
+
+
+class DepartmentKPITests(ApiTestCase):
+    """Monthly headcount, growth and turnover figures, and their upkeep on employee writes (api/kpis.py)"""
+
+    def setUp(self):
+        super().setUp()
+        self.department = create_department('KPI')
+        self.this_month = month_start(date.today())
+        self.first_month = add_months(self.this_month, -20)
+        self.employee = create_employee('KPI1', department=self.department, hire_date=self.first_month)
+        create_employee('KPI2', department=self.department, hire_date=self.first_month)
+
+    def test_growth_and_turnover(self):
+        hires = Counter({date(2024, 1, 1): 10, date(2024, 7, 1): 2, date(2025, 1, 1): 3})
+        leavers = Counter({date(2024, 3, 1): 1, date(2025, 2, 1): 2})
+        rows = {row['month']: row for row in department_series(hires, leavers, today=date(2025, 3, 15))}
+
+        self.assertEqual(len(rows), 15)
+        self.assertEqual(
+            [rows[month]['headcount'] for month in sorted(rows)],
+            [10, 10, 9, 9, 9, 9, 11, 11, 11, 11, 11, 11, 14, 12, 12]
+        )
+        # Growth against the same month a year earlier, or the first month before that
+        self.assertEqual(rows[date(2024, 1, 1)]['headcount_growth_percent'], 0)
+        self.assertEqual(rows[date(2024, 3, 1)]['headcount_growth_percent'], -10.0)    # 9 vs 10 (Jan 2024)
+        self.assertEqual(rows[date(2024, 7, 1)]['headcount_growth_percent'], 10.0)     # 11 vs 10 (Jan 2024)
+        self.assertEqual(rows[date(2025, 1, 1)]['headcount_growth_percent'], 40.0)     # 14 vs 10 (Jan 2024)
+        self.assertEqual(rows[date(2025, 3, 1)]['headcount_growth_percent'], 33.33)    # 12 vs 9 (Mar 2024)
+        # Leavers over the trailing 12 months / average headcount over those months
+        self.assertEqual(rows[date(2024, 1, 1)]['turnover_rate_percent'], 0)
+        self.assertEqual(rows[date(2024, 3, 1)]['turnover_rate_percent'], 10.34)       # 1 / (29 / 3)
+        self.assertEqual(rows[date(2025, 3, 1)]['turnover_rate_percent'], 18.32)       # 2 / (131 / 12)
+
+    def stored(self):
+        """{month: (updated_date, figures)} of the department's KPI rows"""
+        return {
+            kpi.month: (kpi.updated_date, tuple(getattr(kpi, column) for column in KPI_COLUMNS))
+            for kpi in DepartmentMonthlyKPI.objects.filter(department=self.department)
+        }
+
+    def assertMatchesRecompute(self):
+        expected = {row['month']: tuple(row[column] for column in KPI_COLUMNS)
+                    for row in compute_department_series(self.department.pk)}
+        self.assertEqual({month: figures for month, (_, figures) in self.stored().items()}, expected)
+
+    def rewritten_months(self, before):
+        return sorted(month for month, (updated_date, _) in self.stored().items()
+                      if month not in before or before[month][0] != updated_date)
+
+    def test_series_is_maintained_on_hire(self):
+        self.assertMatchesRecompute()
+        before = self.stored()
+        hire_month = add_months(self.this_month, -3)
+        create_employee('KPI3', department=self.department, hire_date=hire_month)
+        self.assertMatchesRecompute()
+        # Earlier months keep their rows untouched
+        self.assertEqual(self.rewritten_months(before), [add_months(hire_month, offset) for offset in range(4)])
+
+    def test_departure_rewrites_only_the_current_month(self):
+        before = self.stored()
+        self.employee.employment_status = 'TERMINATED'
+        self.employee.save()
+        self.assertMatchesRecompute()
+        self.assertEqual(self.rewritten_months(before), [self.this_month])
+        self.assertEqual(DepartmentMonthlyKPI.objects.get(department=self.department, month=self.this_month).leavers, 1)
+
+    def test_unrelated_update_writes_nothing(self):
+        before = self.stored()
+        with self.assertNumQueries(2):
+            self.employee.phone = '555-0100'
+            self.employee.save()
+        self.assertEqual(self.stored(), before)
+
+    def test_moving_department_updates_both(self):
+        other = create_department('KPX')
+        self.employee.department = other
+        self.employee.save()
+        self.assertMatchesRecompute()
+        self.assertEqual(
+            list(DepartmentMonthlyKPI.objects.filter(department=other).values_list('month', 'headcount')[:1]),
+            [(self.first_month, 1)]
+        )
+
+
+class ConditionalGetTests(ApiTestCase):
+    """ETag / Last-Modified validators of the department and employee endpoints (api/conditional.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = create_department('CND')
+        cls.manager = create_employee('CND1', department=cls.department)
+        cls.employee = create_employee('CND2', department=cls.department, manager=cls.manager)
+        create_payroll(cls.employee, date(2025, 6, 30), 3000)
+
+    def urls(self):
+        return [
+            '/api/departments/',
+            f'/api/departments/{self.department.pk}/',
+            f'/api/employees/{self.employee.pk}/',
+            f'/api/employees/{self.manager.pk}/reports/',
+        ]
+
+    def get(self, url, **headers):
+        return self.client.get(url, HTTP_ACCEPT='application/json', **headers)
+
+    def test_validators_are_set(self):
+        for url in self.urls():
+            with self.subTest(url=url):
+                response = self.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response['ETag'].startswith('W/"'))
+                self.assertIn('Last-Modified', response)
+                self.assertEqual(response['Cache-Control'], 'no-cache')
+
+    def test_if_none_match_returns_304(self):
+        for url in self.urls():
+            with self.subTest(url=url):
+                etag = self.get(url)['ETag']
+                # Answered from the version tokens, before any query runs
+                with self.assertNumQueries(0):
+                    response = self.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+                self.assertEqual(response['ETag'], etag)
+
+    def test_if_modified_since_returns_304(self):
+        for url in self.urls():
+            with self.subTest(url=url):
+                last_modified = self.get(url)['Last-Modified']
+                response = self.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+
+    def test_other_representations_have_other_etags(self):
+        url = f'/api/employees/{self.employee.pk}/'
+        self.assertNotEqual(self.get(url)['ETag'], self.get(url + '?fields=employee_id')['ETag'])
+        response = self.get(url + '?fields=employee_id', HTTP_IF_NONE_MATCH=self.get(url)['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+    def test_writes_change_the_etag(self):
+        writes = [
+            ('department', lambda: Department.objects.get(pk=self.department.pk).save(), self.urls()[:2]),
+            ('employee', lambda: Employee.objects.get(pk=self.employee.pk).save(), self.urls()),
+            ('payroll', lambda: create_payroll(self.employee, date(2025, 7, 31), 3100), self.urls()[1:3]),
+        ]
+        for name, write, urls in writes:
+            etags = {url: self.get(url)['ETag'] for url in urls}
+            with self.captureOnCommitCallbacks(execute=True):
+                write()
+            for url in urls:
+                with self.subTest(write=name, url=url):
+                    response = self.get(url, HTTP_IF_NONE_MATCH=etags[url])
+                    self.assertEqual(response.status_code, 200)
+                    self.assertNotEqual(response['ETag'], etags[url])
+                    self.assertTrue(response.content)
+                    self.assertEqual(self.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_unrelated_write_keeps_the_etag(self):
+        url = '/api/departments/'
+        etag = self.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            create_payroll(self.employee, date(2025, 8, 31), 3200)
+        self.assertEqual(self.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+class EmployeeSearchTests(ApiTestCase):
+    """?name= and ?search= through the FTS5 index kept in sync by triggers (api/search.py, migrations 0006/0010)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.john = create_employee('EMP101', first_name='John', last_name='Smith', email='john.smith@company.com')
+        cls.johnny = create_employee('EMP102', first_name='Johnny', last_name='Walker', email='jw@company.com')
+        cls.anna = create_employee('EMP203', first_name='Anna', last_name='Johnson', email='anna.j@company.com')
+        cls.jose = create_employee('EMP204', first_name='José', last_name='Núñez', email='jnunez@company.com')
+
+    def search(self, **params):
+        """Employee ids of the first page of results, in result order"""
+        response = self.client.get('/api/employees/', params, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        return [row['employee_id'] for row in response.json()['results']]
+
+    def test_name_search(self):
+        self.assertEqual(self.search(name='smith'), [self.john.pk])
+        self.assertEqual(self.search(name='Nunez'), [self.jose.pk])
+        self.assertEqual(self.search(name='john smith'), [self.john.pk])
+        # Codes and emails are not names
+        self.assertEqual(self.search(name='EMP101'), [])
+
+    def test_search_by_name_code_and_email(self):
+        self.assertEqual(self.search(search='walker'), [self.johnny.pk])
+        self.assertEqual(self.search(search='emp101'), [self.john.pk])
+        self.assertCountEqual(self.search(search='EMP20'), [self.anna.pk, self.jose.pk])
+        self.assertEqual(self.search(search='jnunez@company.com'), [self.jose.pk])
+        self.assertEqual(self.search(search='anna.j'), [self.anna.pk])
+
+    def test_whole_word_matches_rank_first(self):
+        # John matches "john" whole; Johnny and Johnson only as a prefix
+        ranked = self.search(name='john')
+        self.assertEqual(ranked[0], self.john.pk)
+        self.assertCountEqual(ranked, [self.john.pk, self.johnny.pk, self.anna.pk])
+
+    def test_every_term_must_match(self):
+        self.assertEqual(self.search(name='john sm'), [self.john.pk])
+        self.assertEqual(self.search(name='sm john'), [self.john.pk])
+        self.assertEqual(self.search(name='jo wal'), [self.johnny.pk])
+        self.assertEqual(self.search(name='john nunez'), [])
+
+    def test_index_follows_inserts_updates_and_deletes(self):
+        created = create_employee('EMP305', first_name='Linh', last_name='Tran')
+        self.assertEqual(self.search(name='linh'), [created.pk])
+
+        created.last_name = 'Pham'
+        created.save()
+        self.assertEqual(self.search(name='linh pham'), [created.pk])
+        self.assertEqual(self.search(name='tran'), [])
+
+        Employee.objects.filter(pk=created.pk).update(email='linh.pham@company.com')
+        self.assertEqual(self.search(search='linh.pham'), [created.pk])
+
+        bulk = Employee.objects.bulk_create([Employee(
+            employee_code='EMP306', first_name='Minh', last_name='Vo', email='minh.vo@company.com', hire_date=date(2024, 1, 1)
+        )])
+        self.assertEqual(self.search(name='minh'), [bulk[0].pk])
+
+        created.delete()
+        self.assertEqual(self.search(name='linh'), [])
+        self.assertEqual(
+            sorted(EmployeeSearchEntry.objects.values_list('employee_id', 'first_name', 'last_name', 'employee_code', 'email')),
+            sorted(Employee.objects.values_list('employee_id', 'first_name', 'last_name', 'employee_code', 'email'))
+        )
+
+    def test_fts_syntax_is_inert(self):
+        queries = ['"', 'john"', '*', 'jo*', '-john', 'john -smith', '(john', 'john)', 'NEAR(john smith)',
+                   'first_name:john', '{first_name}: john', 'john AND', 'OR', 'NOT', '^john', "o'brien", ':', '', ' ']
+        for query in queries:
+            for param in ('name', 'search'):
+                with self.subTest(param=param, query=query):
+                    self.search(**{param: query})
+        self.assertEqual(self.search(name='"john" smith*'), [self.john.pk])
+
+
+ORG_NODE_FIELDS = ('employee_id', 'root_id', 'lft', 'rgt', 'depth', 'direct_reports', 'height')
+
+
+def create_hierarchy(target):
+    """ceo -> a -> (a1, a2 -> a21) and ceo -> b -> b1, set as attributes of target"""
+    target.ceo = create_employee('ORG0')
+    target.a = create_employee('ORG1', manager=target.ceo)
+    target.b = create_employee('ORG2', manager=target.ceo)
+    target.a1 = create_employee('ORG3', manager=target.a)
+    target.a2 = create_employee('ORG4', manager=target.a)
+    target.b1 = create_employee('ORG5', manager=target.b)
+    target.a21 = create_employee('ORG6', manager=target.a2)
+
+
+# Deleting a manager can leave the table to a rebuild on commit, so these tests commit
+@override_settings(CACHES=TEST_CACHES)
+class OrgChartTests(TransactionTestCase):
+    """Nested-set maintenance on single-employee writes matches a rebuild (api/orgchart.py)"""
+
+    def setUp(self):
+        super().setUp()
+        get_cache().clear()
+        create_hierarchy(self)
+
+    def assertMatchesRebuild(self):
+        expected = compute_org_chart(Employee.objects.values_list('employee_id', 'manager_id'))
+        self.assertEqual(
+            sorted(OrgChartNode.objects.values_list(*ORG_NODE_FIELDS)),
+            sorted(tuple(node[field] for field in ORG_NODE_FIELDS) for node in expected)
+        )
+
+    def node(self, employee):
+        return OrgChartNode.objects.get(employee=employee)
+
+    def set_manager(self, employee, manager):
+        employee = Employee.objects.get(pk=employee.pk)
+        employee.manager = manager
+        employee.save()
+
+    def delete(self, employee):
+        Employee.objects.get(pk=employee.pk).delete()
+
+    def test_counts_and_heights(self):
+        self.assertMatchesRebuild()
+        ceo = self.node(self.ceo)
+        self.assertEqual((ceo.depth, ceo.direct_reports, ceo.total_reports, ceo.height), (0, 2, 6, 3))
+        a = self.node(self.a)
+        self.assertEqual((a.depth, a.direct_reports, a.total_reports, a.height, a.root_id), (1, 2, 3, 2, self.ceo.pk))
+        a21 = self.node(self.a21)
+        self.assertEqual((a21.depth, a21.direct_reports, a21.height), (3, 0, 0))
+
+    def test_new_employee(self):
+        hire = create_employee('ORG7', manager=self.b1)
+        self.assertMatchesRebuild()
+        self.assertEqual(self.node(self.b).height, 2)
+        self.assertEqual(self.node(self.b1).direct_reports, 1)
+        create_employee('ORG8')
+        self.assertMatchesRebuild()
+        self.assertEqual(self.node(hire).depth, 3)
+
+    def test_move_subtree(self):
+        self.set_manager(self.a2, self.b1)
+        self.assertMatchesRebuild()
+        self.assertEqual((self.node(self.a).direct_reports, self.node(self.a).height), (1, 1))
+        self.assertEqual((self.node(self.b).height, self.node(self.a21).depth), (3, 4))
+
+        self.set_manager(self.a, None)
+        self.assertMatchesRebuild()
+        self.assertEqual(self.node(self.a1).root_id, self.a.pk)
+        self.assertEqual(self.node(self.ceo).total_reports, 4)
+
+    def test_remove(self):
+        self.delete(self.a21)
+        self.assertMatchesRebuild()
+        self.assertEqual(self.node(self.a).height, 1)
+        # Reports of a removed manager head trees of their own
+        self.delete(self.a)
+        self.assertMatchesRebuild()
+        self.assertEqual(self.node(self.a1).depth, 0)
+        self.assertEqual(self.node(self.ceo).direct_reports, 1)
+
+    def test_cycle_stored_outside_the_api_keeps_matching(self):
+        # Saved through the ORM, so nothing stops the cycle: ceo -> a -> a2 -> ceo
+        self.set_manager(self.ceo, self.a2)
+        self.assertMatchesRebuild()
+        for employee, manager in [(self.b1, self.a21), (self.a21, None), (self.a, self.b1), (self.ceo, None), (self.a2, self.b)]:
+            self.set_manager(employee, manager)
+            self.assertMatchesRebuild()
+        self.delete(self.b)
+        self.assertMatchesRebuild()
+
+    def test_random_changes_match_rebuild(self):
+        rng = random.Random(12)
+        employees = list(Employee.objects.all())
+        for number in range(60):
+            with self.subTest(step=number):
+                choice = rng.random()
+                if choice < 0.7:
+                    # Plain ORM saves, reporting cycles included
+                    self.set_manager(rng.choice(employees), rng.choice(employees + [None]))
+                elif choice < 0.85 or len(employees) < 4:
+                    employees.append(create_employee(f'RND{number}', manager=rng.choice(employees + [None])))
+                else:
+                    self.delete(employees.pop(rng.randrange(len(employees))))
+                self.assertMatchesRebuild()
+
+    def test_serializer_rejects_reporting_cycles(self):
+        for employee, manager in [(self.a, self.a), (self.a, self.a21), (self.ceo, self.b1)]:
+            with self.subTest(employee=employee.employee_code, manager=manager.employee_code):
+                serializer = EmployeeCreateUpdateSerializer(employee, data={'manager': manager.pk}, partial=True)
+                self.assertFalse(serializer.is_valid())
+                self.assertIn('manager', serializer.errors)
+        serializer = EmployeeCreateUpdateSerializer(self.a21, data={'manager': self.b1.pk}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+    def test_find_reporting_cycles(self):
+        self.assertEqual(find_reporting_cycles({self.a.pk: self.b.pk}), set())
+        self.assertEqual(find_reporting_cycles({self.a.pk: self.a.pk}), {self.a.pk})
+        self.assertEqual(find_reporting_cycles({self.ceo.pk: self.a21.pk}), {self.ceo.pk})
+        # Together the assignments close a loop that neither closes alone
+        self.assertEqual(find_reporting_cycles({self.a1.pk: self.b1.pk, self.b.pk: self.a1.pk}), {self.a1.pk, self.b.pk})
+
+
+class ReportsEndpointTests(ApiTestCase):
+    """GET /api/employees/{id}/reports/"""
+
+    @classmethod
+    def setUpTestData(cls):
+        create_hierarchy(cls)
+
+    def get(self, employee, **params):
+        return self.client.get(f'/api/employees/{employee.pk}/reports/', params, HTTP_ACCEPT='application/json')
+
+    def test_direct_reports(self):
+        response = self.get(self.ceo)
+        self.assertWithinQueryBudget(response)
+        body = response.json()
+        self.assertEqual(body['employee']['employee_id'], self.ceo.pk)
+        self.assertEqual(body['org_metrics'], {
+            'level': 0, 'span_of_control': 2, 'total_reports': 6, 'levels_below': 3, 'top_manager_id': self.ceo.pk
+        })
+        self.assertEqual([row['employee_id'] for row in body['results']], [self.a.pk, self.b.pk])
+
+    def test_depth(self):
+        rows = self.get(self.ceo, depth='all').json()['results']
+        self.assertEqual(
+            [(row['employee_id'], row['reporting_level'], row['direct_reports'], row['total_reports']) for row in rows],
+            [(self.a.pk, 1, 2, 3), (self.a1.pk, 2, 0, 0), (self.a2.pk, 2, 1, 1), (self.a21.pk, 3, 0, 0),
+             (self.b.pk, 1, 1, 1), (self.b1.pk, 2, 0, 0)]
+        )
+        rows = self.get(self.a, depth=2).json()['results']
+        self.assertEqual([row['employee_id'] for row in rows], [self.a1.pk, self.a2.pk, self.a21.pk])
+        self.assertEqual(self.get(self.a21).json()['results'], [])
+
+    def test_pages_follow_the_chart(self):
+        visited = []
+        url = f'/api/employees/{self.ceo.pk}/reports/?depth=all&page_size=4'
+        while url:
+            body = self.client.get(url, HTTP_ACCEPT='application/json').json()
+            visited += [row['employee_id'] for row in body['results']]
+            url = body['next']
+        self.assertEqual(visited, [self.a.pk, self.a1.pk, self.a2.pk, self.a21.pk, self.b.pk, self.b1.pk])
+
+    def test_follows_moves(self):
+        employee = Employee.objects.get(pk=self.a2.pk)
+        employee.manager = self.b
+        employee.save()
+        rows = self.get(self.b, depth='all').json()['results']
+        # Reports are kept in employee_id order
+        self.assertEqual([row['employee_id'] for row in rows], [self.a2.pk, self.a21.pk, self.b1.pk])
+
+    def test_invalid_requests(self):
+        for depth in ('0', '-1', 'two'):
+            with self.subTest(depth=depth):
+                self.assertEqual(self.get(self.ceo, depth=depth).status_code, 400)
+        self.assertEqual(self.client.get('/api/employees/999999/reports/').status_code, 404)
+
+
+class BulkWriteTests(ApiTestCase):
+    """POST /api/employees/bulk/ (api/bulk.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user('bulk-admin', password='secret', is_staff=True)
+        cls.department = create_department('BLK')
+        cls.other_department = create_department('BLX')
+        cls.manager = create_employee('BLK0', department=cls.department)
+        cls.employee = create_employee('BLK1', department=cls.department, manager=cls.manager)
+        cls.peer = create_employee('BLK2', department=cls.department, manager=cls.manager)
+        create_payroll(cls.employee, date(2025, 4, 30), 1000)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.staff)
+
+    def post(self, rows):
+        return self.client.post('/api/employees/bulk/', rows, content_type='application/json')
+
+    def new_row(self, code, **fields):
+        row = {
+            'employee_code': code, 'first_name': 'New', 'last_name': 'Hire',
+            'email': f'{code.lower()}@company.com', 'hire_date': '2024-06-01'
+        }
+        row.update(fields)
+        return row
+
+    def row_errors(self, response):
+        return {error['row']: error['errors'] for error in response.json()['errors']}
+
+    def test_requires_staff(self):
+        self.client.logout()
+        self.assertEqual(self.post([self.new_row('BLK9')]).status_code, 403)
+        self.client.force_login(User.objects.create_user('bulk-user', password='secret'))
+        self.assertEqual(self.post([self.new_row('BLK9')]).status_code, 403)
+        self.assertFalse(Employee.objects.filter(employee_code='BLK9').exists())
+
+    def test_mixed_create_and_update(self):
+        response = self.post([
+            self.new_row('BLK3', department=self.department.pk, manager=self.employee.pk),
+            {'employee_id': self.peer.pk, 'phone': '555-0101'},
+        ])
+        self.assertEqual(response.status_code, 201)
+        body = response.json()
+        self.assertEqual((body['created'], body['updated'], body['updated_ids']), (1, 1, [self.peer.pk]))
+        hire = Employee.objects.get(pk=body['created_ids'][0])
+        self.assertEqual((hire.employee_code, hire.manager_id, hire.department_id), ('BLK3', self.employee.pk, self.department.pk))
+        self.peer.refresh_from_db()
+        self.assertEqual((self.peer.phone, self.peer.first_name), ('555-0101', 'Blk2'))
+
+        # A batch of updates only is 200 OK
+        self.assertEqual(self.post([{'employee_id': self.peer.pk, 'phone': '555-0102'}]).status_code, 200)
+
+    def test_row_errors(self):
+        response = self.post([
+            self.new_row('BLK3'),
+            {'employee_code': 'BLK4', 'first_name': 'No', 'email': 'not-an-email'},
+            {'employee_id': 999999, 'phone': '555-0101'},
+            self.new_row('BLK5', department=999999, email=self.employee.email),
+            {'employee_id': self.peer.pk, 'employment_status': 'RETIRED'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['invalid_rows'], 4)
+        errors = self.row_errors(response)
+        self.assertEqual(sorted(errors), [1, 2, 3, 4])
+        self.assertEqual(set(errors[1]), {'last_name', 'email', 'hire_date'})
+        self.assertEqual(set(errors[2]), {'employee_id'})
+        self.assertEqual(set(errors[3]), {'department', 'email'})
+        self.assertEqual(set(errors[4]), {'employment_status'})
+
+    def test_duplicates_within_the_batch(self):
+        response = self.post([
+            self.new_row('BLK3'),
+            self.new_row('BLK3', email='other@company.com'),
+            self.new_row('BLK4', email='blk3@company.com'),
+            {'employee_id': self.peer.pk, 'phone': '555-0101'},
+            {'employee_id': self.peer.pk, 'phone': '555-0102'},
+            {'employee_id': self.peer.pk, 'employee_code': 'BLK1'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        errors = self.row_errors(response)
+        self.assertEqual(errors[1], {'employee_code': ['Row 0 already uses this value.']})
+        self.assertEqual(errors[2], {'email': ['Row 0 already uses this value.']})
+        self.assertEqual(set(errors[4]), {'employee_id'})
+        self.assertEqual(set(errors[5]), {'employee_id', 'employee_code'})
+        self.assertNotIn(0, errors)
+
+    def test_reporting_cycles_are_rejected(self):
+        response = self.post([
+            {'employee_id': self.employee.pk, 'manager': self.employee.pk},
+            # Neither assignment closes a loop on its own
+            {'employee_id': self.manager.pk, 'manager': self.peer.pk},
+            {'employee_id': self.peer.pk, 'manager': self.manager.pk},
+        ])
+        self.assertEqual(response.status_code, 400)
+        errors = self.row_errors(response)
+        self.assertEqual(sorted(errors), [0, 1, 2])
+        for index in errors:
+            self.assertEqual(set(errors[index]), {'manager'})
+
+        # Against the stored hierarchy: manager -> employee, who reports to manager
+        response = self.post([{'employee_id': self.manager.pk, 'manager': self.employee.pk}])
+        self.assertEqual(set(self.row_errors(response)[0]), {'manager'})
+        self.assertIsNone(Employee.objects.get(pk=self.manager.pk).manager_id)
+
+    def test_invalid_batch_writes_nothing(self):
+        before = sorted(Employee.objects.values_list('employee_id', 'employment_status', 'manager_id', 'updated_date'))
+        response = self.post([
+            self.new_row('BLK3'),
+            {'employee_id': self.peer.pk, 'employment_status': 'TERMINATED', 'manager': self.employee.pk},
+            self.new_row('BLK4', position=999999),
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(self.row_errors(response)), [2])
+        self.assertEqual(
+            sorted(Employee.objects.values_list('employee_id', 'employment_status', 'manager_id', 'updated_date')), before
+        )
+        self.assertFalse(EmploymentStatusChange.objects.exists())
+
+    def test_status_changes_are_logged(self):
+        response = self.post([
+            {'employee_id': self.employee.pk, 'employment_status': 'TERMINATED'},
+            {'employee_id': self.peer.pk, 'employment_status': 'ACTIVE', 'phone': '555-0101'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(EmploymentStatusChange.objects.values_list('employee_id', 'old_status', 'new_status')),
+            [(self.employee.pk, 'ACTIVE', 'TERMINATED')]
+        )
+
+    def test_snapshots_match_a_rebuild(self):
+        payrolls = sorted(LatestPayroll.objects.values_list('employee_id', 'payroll_id', 'net_salary'))
+        response = self.post([
+            self.new_row('BLK3', department=self.other_department.pk, manager=self.peer.pk, hire_date='2025-01-15'),
+            {'employee_id': self.employee.pk, 'department': self.other_department.pk, 'manager': self.peer.pk},
+            {'employee_id': self.peer.pk, 'employment_status': 'TERMINATED', 'manager': None},
+        ])
+        self.assertEqual(response.status_code, 201)
+
+        rebuild_latest_payrolls()
+        self.assertEqual(sorted(LatestPayroll.objects.values_list('employee_id', 'payroll_id', 'net_salary')), payrolls)
+        for department in (self.department, self.other_department):
+            with self.subTest(department=department.department_code):
+                self.assertEqual(
+                    list(DepartmentMonthlyKPI.objects.filter(department=department).order_by('month').values_list(*KPI_COLUMNS)),
+                    [tuple(row[column] for column in KPI_COLUMNS) for row in compute_department_series(department.pk)]
+                )
+        expected = compute_org_chart(Employee.objects.values_list('employee_id', 'manager_id'))
+        self.assertEqual(
+            sorted(OrgChartNode.objects.values_list(*ORG_NODE_FIELDS)),
+            sorted(tuple(node[field] for field in ORG_NODE_FIELDS) for node in expected)
+        )
+        self.assertEqual(OrgChartNode.objects.get(employee=self.peer).total_reports, 2)
+
+
+@override_settings(EXPORT_CHUNK_SIZE=2)
+class ExportTests(ApiTestCase):
+    """GET /api/export/{dataset}.{format} (api/exports.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.department = create_department('EXP')
+        cls.employee = create_employee('EXP1', department=cls.department)
+        cls.other = create_employee('EXP2')
+        for month in range(1, 6):
+            create_payroll(cls.employee, date(2025, month, 28), 1000 + month)
+        create_payroll(cls.other, date(2025, 3, 28), 900)
+        cls.check_in = datetime(2025, 3, 3, 8, 30, tzinfo=timezone.utc)
+        Attendance.objects.create(
+            employee=cls.employee, date=date(2025, 3, 3), check_in_time=cls.check_in, status='PRESENT'
+        )
+        Attendance.objects.create(employee=cls.other, date=date(2025, 3, 3), status='ABSENT')
+
+    def get(self, path, **params):
+        response = self.client.get(f'/api/export/{path}', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson(self):
+        # Six payrolls at two lines per chunk: three chunks, one object per line, in primary key order
+        lines = self.get('payroll.ndjson').splitlines()
+        self.assertEqual(len(lines), 6)
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(list(rows[0]), [
+            'payroll_id', 'employee_id', 'employee_code', 'pay_period_start', 'pay_period_end', 'basic_salary',
+            'overtime_hours', 'overtime_rate', 'allowances', 'deductions', 'tax_deduction', 'net_salary', 'pay_date'
+        ])
+        self.assertEqual([row['payroll_id'] for row in rows], sorted(Payroll.objects.values_list('pk', flat=True)))
+        self.assertEqual((rows[0]['employee_code'], rows[0]['pay_period_end']), ('EXP1', '2025-01-28'))
+
+    def test_csv(self):
+        rows = list(csv.reader(self.get('employees.csv').splitlines()))
+        self.assertEqual(rows[0], [
+            'employee_id', 'employee_code', 'first_name', 'last_name', 'email', 'phone', 'gender', 'hire_date',
+            'department_id', 'position_id', 'manager_id', 'employment_status'
+        ])
+        self.assertEqual([row[1] for row in rows[1:]], ['EXP1', 'EXP2'])
+        self.assertEqual(rows[1][7], '2020-01-01')
+
+    def test_datetimes_are_iso_8601(self):
+        row = json.loads(self.get('attendance.ndjson', employee=self.employee.pk))
+        self.assertEqual(row['check_in_time'], self.check_in.isoformat())
+        rows = list(csv.DictReader(self.get('attendance.csv').splitlines()))
+        self.assertEqual([row['check_in_time'] for row in rows], [self.check_in.isoformat(), ''])
+
+    def test_filters(self):
+        lines = self.get('payroll.ndjson', **{'from': '2025-03-01', 'to': '2025-04-30'}).splitlines()
+        self.assertEqual([json.loads(line)['pay_period_end'] for line in lines], ['2025-03-28', '2025-04-28', '2025-03-28'])
+        lines = self.get('payroll.ndjson', department=self.department.pk).splitlines()
+        self.assertEqual({json.loads(line)['employee_id'] for line in lines}, {self.employee.pk})
+        self.assertEqual(self.get('employees.ndjson', **{'from': '2030-01-01'}), '')
+
+    def test_invalid_requests(self):
+        for params in ({'from': '2025-13-01'}, {'to': 'yesterday'}, {'employee': 'EXP1'}, {'department': '-1'}):
+            with self.subTest(params=params):
+                response = self.client.get('/api/export/payroll.ndjson', params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
+        self.assertEqual(self.client.get('/api/export/positions.csv').status_code, 404)
+        self.assertEqual(self.client.get('/api/export/payroll.xml').status_code, 404)
+
+
+class QueryBudgetTests(ApiTestCase):
+    """Every budgeted action stays within settings.QUERY_BUDGETS however many rows it reads (api/testing.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.departments = [create_department('QB1'), create_department('QB2')]
+        cls.head = create_employee('QB0', department=cls.departments[0])
+        cls.add_rows(5)
+
+    @classmethod
+    def add_rows(cls, count):
+        """`count` more employees in every department, each with a position, manager, payrolls, review and attendance"""
+        for department in cls.departments:
+            start = Employee.objects.filter(department=department).count()
+            for number in range(start, start + count):
+                code = f'{department.department_code}-{number}'
+                position = Position.objects.create(position_title='Analyst', position_code=code, department=department)
+                employee = create_employee(
+                    code, department=department, position=position, manager=cls.head,
+                    hire_date=date(2022, 1, 1) + timedelta(days=30 * number)
+                )
+                create_payroll(employee, date(2025, 3, 31), 1000 + number)
+                create_payroll(employee, date(2025, 4, 30), 1100 + number)
+                PerformanceReview.objects.create(
+                    employee=employee, reviewer=cls.head, review_period_start=date(2025, 1, 1),
+                    review_period_end=date(2025, 6, 30), review_date=date(2025, 7, 15), overall_score=3.5
+                )
+                Attendance.objects.create(employee=employee, date=date(2025, 4, 1), status='PRESENT', total_hours=8)
+
+    def budgeted_requests(self):
+        department = self.departments[0].pk
+        employee = Employee.objects.filter(department=department).order_by('-pk').values_list('pk', flat=True)[0]
+        return {
+            'DepartmentViewSet.list': '/api/departments/',
+            'DepartmentViewSet.retrieve': f'/api/departments/{department}/',
+            'DepartmentViewSet.employees': f'/api/departments/{department}/employees/',
+            'DepartmentViewSet.positions': f'/api/departments/{department}/positions/',
+            'DepartmentViewSet.analytics_all': '/api/departments/analytics_all/',
+            'DepartmentViewSet.stats': '/api/departments/stats/',
+            'EmployeeViewSet.list': '/api/employees/',
+            'EmployeeViewSet.retrieve': f'/api/employees/{employee}/',
+            'EmployeeViewSet.reports': f'/api/employees/{self.head.pk}/reports/',
+            'EmployeeViewSet.analytics_summary': '/api/employees/analytics_summary/',
+            'DashboardViewSet.list': '/api/dashboard/',
+            'headcount-history': '/api/headcount/history/',
+        }
+
+    def query_counts(self):
+        counts = {}
+        for action, url in self.budgeted_requests().items():
+            with self.subTest(action=action):
+                # Measure the uncached work
+                get_cache().clear()
+                response = self.client.get(url, HTTP_ACCEPT='application/json')
+                self.assertEqual(response.status_code, 200)
+                metrics = self.assertWithinQueryBudget(response)
+                self.assertEqual(metrics.action, action)
+                counts[action] = metrics.queries
+        return counts
+
+    def test_every_budgeted_action(self):
+        self.assertEqual(set(self.budgeted_requests()), set(settings.QUERY_BUDGETS))
+        self.query_counts()
+
+    def test_query_counts_do_not_grow_with_rows(self):
+        before = self.query_counts()
+        self.add_rows(10)
+        self.assertEqual(self.query_counts(), before)
+
+
+class DashboardTests(ApiTestCase):
+    """GET /api/dashboard/ builds the same blocks as the standalone endpoints (api/dashboard.py)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        sales = create_department('DSA', department_name='Sales')
+        ops = create_department('DOP', department_name='Operations')
+        create_department('DEM', department_name='Empty')
+        manager = create_employee('DSH0', department=sales)
+        sales.manager = manager
+        sales.save()
+        Position.objects.create(position_title='Rep', position_code='DSA-REP', department=sales)
+        statuses = ['ACTIVE', None, 'ON_LEAVE', 'TERMINATED', None, 'ACTIVE']
+        for number, status in enumerate(statuses, start=1):
+            employee = create_employee(
+                f'DSH{number}', department=(sales, ops, None)[number % 3], employment_status=status,
+                hire_date=date(2021, number, 1)
+            )
+            create_payroll(employee, date(2025, 4, 30), 1000 * number)
+
+    def get(self, url):
+        response = self.client.get(url, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_blocks_match_the_endpoints(self):
+        response = self.client.get('/api/dashboard/', HTTP_ACCEPT='application/json')
+        self.assertWithinQueryBudget(response)
+        dashboard = response.json()
+        self.assertEqual(dashboard['departments'], self.get('/api/departments/'))
+        self.assertEqual(dashboard['department_stats'], self.get('/api/departments/stats/'))
+        self.assertEqual(dashboard['department_analytics'], self.get('/api/departments/analytics_all/'))
+        self.assertEqual(dashboard['employee_summary'], self.get('/api/employees/analytics_summary/'))
+
+    def test_employee_summary(self):
+        summary = self.get('/api/dashboard/')['employee_summary']
+        self.assertEqual(summary['summary']['total_employees'], 7)
+        self.assertEqual(summary['summary']['active_employees'], 3)
+        # Employees without a status sort first, as SQLite sorts NULL
+        self.assertEqual(summary['employment_status_breakdown'], [
+            {'employment_status': None, 'count': 2},
+            {'employment_status': 'ACTIVE', 'count': 3},
+            {'employment_status': 'ON_LEAVE', 'count': 1},
+            {'employment_status': 'TERMINATED', 'count': 1},
+        ])
+        self.assertEqual(summary['department_distribution'], [
+            {'department__department_name': 'Sales', 'count': 3},
+            {'department__department_name': None, 'count': 2},
+            {'department__department_name': 'Operations', 'count': 2},
+        ])
@@ -6,6 +6,7 @@ from . import views
 router = DefaultRouter()
 router.register(r'departments', views.DepartmentViewSet, basename='department')
 router.register(r'employees', views.EmployeeViewSet, basename='employee')
+router.register(r'dashboard', views.DashboardViewSet, basename='dashboard')
 
 
 urlpatterns = [
@@ -13,4 +14,8 @@ urlpatterns = [
     path('', include(router.urls)),
     
     # Additional API endpoints
+    path('cache/stats/', views.cache_statistics, name='cache-stats'),
+    path('headcount/history/', views.headcount_history, name='headcount-history'),
+    path('_metrics', views.request_metrics, name='metrics'),
+    path('export/<slug:dataset>.<slug:export_format>', views.export_data, name='export'),
 ] 
\ No newline at end of file
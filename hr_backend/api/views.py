@@ -1,14 +1,33 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.generics import ListAPIView, RetrieveAPIView
 from django.shortcuts import get_object_or_404
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
 from django.db import IntegrityError
-from django.db.models import Count, Sum, Avg, Q
-from .models import Department, Employee, Payroll, PerformanceReview, Attendance
-import random
-from datetime import datetime, timedelta
+from django.db.models import Count, Sum, Avg, Max, Min, Q, F, Prefetch
+from .models import Department, DepartmentMonthlyKPI, Employee, OrgChartNode, Position, Payroll, PerformanceReview, Attendance
+from .analytics import (
+    annotated_departments, build_department_analytics, company_analytics, department_kpis, department_salary_stats,
+    department_stats, employee_summary
+)
+from .pagination import EmployeeCursorPagination, OrgChartPagination
+from .cache import cached_response, cache_stats
+from .dashboard import build_dashboard
+from .fieldsets import SparseFieldsetViewMixin
+from .headcount import cached_headcount_history
+from .rows import fast_list_rendering, row_response
+from .instrumentation import render_prometheus
+from .replica import analytics_replica
+from .conditional import conditional_get
+from .orgchart import subtree_queryset
+from .search import SEARCH_COLUMNS, search_employees
+from .bulk import EmployeeBatch
+from .exports import EXPORT_DATASETS, EXPORT_FORMATS, EXPORT_STREAMS, ExportError, export_rows
+from datetime import datetime
 from .serializers import (
     DepartmentSerializer, 
     DepartmentListSerializer,
@@ -17,6 +36,7 @@ from .serializers import (
     EmployeeBasicSerializer,
     EmployeeListSerializer,
     EmployeeDetailSerializer,
+    OrgChartReportSerializer,
     EmployeeCreateUpdateSerializer,
     PayrollBasicSerializer,
     PerformanceReviewBasicSerializer,
@@ -24,18 +44,28 @@ from .serializers import (
 )
 
 
-class DepartmentViewSet(viewsets.ReadOnlyModelViewSet):
+class DepartmentViewSet(SparseFieldsetViewMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for Department read-only operations
-    Provides: list, retrieve
+    Provides: list, retrieve (both accept ?fields= / ?omit=, see api/fieldsets.py)
     """
     queryset = Department.objects.select_related('manager').prefetch_related('positions', 'employees')
+    sparse_extra_fields = {'retrieve': {'analytics': ['budget']}}
     
     def get_serializer_class(self):
         if self.action == 'list':
             return DepartmentListSerializer
         return DepartmentSerializer
     
+    @conditional_get(Department, Employee, Position)
+    def list(self, request, *args, **kwargs):
+        """List departments; answers conditional GETs with 304 when nothing changed"""
+        if not fast_list_rendering():
+            return super().list(request, *args, **kwargs)
+        # Rendered straight from values() rows (api/rows.py)
+        return row_response(self.filter_queryset(self.get_queryset()), self.get_serializer_class(), self.serializer_fieldset())
+    
+    @conditional_get(Department, Employee, Position, Payroll, DepartmentMonthlyKPI, daily=True)
     def retrieve(self, request, *args, **kwargs):
         """Get department details with analytics data"""
         department = self.get_object()
@@ -44,65 +74,15 @@ class DepartmentViewSet(viewsets.ReadOnlyModelViewSet):
         serializer = self.get_serializer(department)
         response_data = serializer.data
         
-        # Get all employees in the department
-        employees = Employee.objects.filter(department=department)
-        employee_count = employees.count()
+        if not self.renders('analytics'):
+            return Response(response_data)
         
-        if employee_count > 0:
-            # Get salary data from payroll records (latest records for each employee)
-            latest_payrolls = []
-            total_salary = 0
-            salary_count = 0
-            
-            for employee in employees:
-                # Get the most recent payroll record for each employee
-                latest_payroll = Payroll.objects.filter(employee=employee).order_by('-pay_period_end').first()
-                if latest_payroll:
-                    latest_payrolls.append(latest_payroll)
-                    total_salary += latest_payroll.net_salary
-                    salary_count += 1
-            
-            # Calculate metrics
-            avg_salary = round(total_salary / salary_count, 2) if salary_count > 0 else 0
-            total_cost = round(total_salary * 1.5, 2)  # Total cost = all salaries * 1.5
-            cost_per_employee = round(total_cost / employee_count, 2) if employee_count > 0 else 0
-            
-            # Generate random KPIs (as requested)
-            headcount_growth = round(random.uniform(-5.0, 15.0), 2)  # -5% to +15% growth
-            turnover_rate = round(random.uniform(2.0, 20.0), 2)  # 2% to 20% turnover
-            
-            # Additional calculated metrics
-            salary_coverage = round((salary_count / employee_count) * 100, 2) if employee_count > 0 else 0
-            budget_utilization = round((total_cost / department.budget) * 100, 2) if department.budget else 0
-            
-            # Add analytics data to response
-            response_data['analytics'] = {
-                'financial_metrics': {
-                    'average_salary': avg_salary,
-                    'total_salary_cost': round(total_salary, 2),
-                    'total_cost': total_cost,
-                    'cost_per_employee': cost_per_employee,
-                    'budget_utilization_percent': budget_utilization
-                },
-                'workforce_metrics': {
-                    'total_employees': employee_count,
-                    'employees_with_salary_data': salary_count,
-                    'salary_data_coverage_percent': salary_coverage,
-                    'headcount_growth_percent': headcount_growth,
-                    'turnover_rate_percent': turnover_rate
-                },
-                'cost_breakdown': {
-                    'base_salary_cost': round(total_salary, 2),
-                    'overhead_multiplier': 1.5,
-                    'overhead_cost': round(total_salary * 0.5, 2),
-                    'cost_formula': 'Total Cost = (Sum of all salaries) × 1.5'
-                },
-                'salary_statistics': {
-                    'highest_salary': round(max([p.net_salary for p in latest_payrolls]), 2) if latest_payrolls else 0,
-                    'lowest_salary': round(min([p.net_salary for p in latest_payrolls]), 2) if latest_payrolls else 0,
-                    'median_salary': round(sorted([p.net_salary for p in latest_payrolls])[len(latest_payrolls)//2], 2) if latest_payrolls else 0
-                }
-            }
+        # Get headcount and latest payroll figures in a single query
+        stats = department_salary_stats([department.pk])[department.pk]
+        kpis = department_kpis([department.pk]).get(department.pk)
+        
+        if stats['employee_count'] > 0:
+            response_data['analytics'] = build_department_analytics(department, stats, kpis)
         else:
             response_data['analytics'] = {
                 'error': 'No employees found in this department',
@@ -121,13 +101,20 @@ class DepartmentViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(response_data)
     
     def get_queryset(self):
-        # Optimize queryset based on action
-        if self.action == 'list':
-            # For list view, we don't need to prefetch employees - just count them
-            queryset = Department.objects.select_related('manager').prefetch_related('positions')
-        else:
-            # For detail view, prefetch employees for full data
-            queryset = Department.objects.select_related('manager').prefetch_related('positions', 'employees')
+        # Counts are annotated so serializers don't issue a COUNT query per department
+        queryset = annotated_departments()
+        
+        # Only the detail view renders nested employees and positions
+        if self.action == 'retrieve':
+            if self.renders('positions'):
+                queryset = queryset.prefetch_related('positions')
+            if self.renders('employees'):
+                queryset = queryset.prefetch_related(
+                    Prefetch('employees', queryset=Employee.objects.order_by('employee_id'))
+                )
+        
+        # Just the columns and joins a ?fields= / ?omit= request renders
+        queryset = self.sparse_queryset(queryset)
         
         # Optional filtering
         department_name = self.request.query_params.get('name', None)
@@ -142,10 +129,23 @@ class DepartmentViewSet(viewsets.ReadOnlyModelViewSet):
     
     @action(detail=True, methods=['get'])
     def employees(self, request, pk=None):
-        """Get all employees in this department"""
+        """Get employees in this department, paginated by name (?paginate=false for all; ?fields= / ?omit=)"""
         department = self.get_object()
         employees = Employee.objects.filter(department=department).order_by('last_name', 'first_name')
-        serializer = EmployeeBasicSerializer(employees, many=True)
+        # The cursor is built from the ordering columns
+        employees = self.sparse_queryset(employees, EmployeeBasicSerializer, EmployeeCursorPagination.ordering)
+        fields = self.serializer_fieldset(EmployeeBasicSerializer)
+        
+        paginator = EmployeeCursorPagination()
+        if fast_list_rendering():
+            return row_response(employees, EmployeeBasicSerializer, fields, paginator=paginator, request=request, view=self)
+        
+        page = paginator.paginate_queryset(employees, request, view=self)
+        if page is not None:
+            serializer = EmployeeBasicSerializer(page, many=True, fields=fields)
+            return paginator.get_paginated_response(serializer.data)
+        
+        serializer = EmployeeBasicSerializer(employees, many=True, fields=fields)
         return Response(serializer.data)
     
     @action(detail=True, methods=['get'])
@@ -161,189 +161,54 @@ class DepartmentViewSet(viewsets.ReadOnlyModelViewSet):
     def analytics(self, request):
         """Get detailed analytics for a specific department"""
         department = self.get_object()
+        stats = department_salary_stats([department.pk])[department.pk]
+        kpis = department_kpis([department.pk]).get(department.pk)
         
-        # Get all employees in the department
-        employees = Employee.objects.filter(department=department)
-        employee_count = employees.count()
-        
-        if employee_count == 0:
+        if stats['employee_count'] == 0:
             return Response({
                 'error': 'No employees found in this department',
                 'department': DepartmentListSerializer(department).data
             }, status=status.HTTP_404_NOT_FOUND)
         
-        # Get salary data from payroll records (latest records for each employee)
-        latest_payrolls = []
-        total_salary = 0
-        salary_count = 0
-        
-        for employee in employees:
-            # Get the most recent payroll record for each employee
-            latest_payroll = Payroll.objects.filter(employee=employee).order_by('-pay_period_end').first()
-            if latest_payroll:
-                latest_payrolls.append(latest_payroll)
-                total_salary += latest_payroll.net_salary
-                salary_count += 1
-        
-        # Calculate metrics
-        avg_salary = round(total_salary / salary_count, 2) if salary_count > 0 else 0
-        total_cost = round(total_salary * 1.5, 2)  # Total cost = all salaries * 1.5
-        cost_per_employee = round(total_cost / employee_count, 2) if employee_count > 0 else 0
-        
-        # Generate random KPIs (as requested)
-        headcount_growth = round(random.uniform(-5.0, 15.0), 2)  # -5% to +15% growth
-        turnover_rate = round(random.uniform(2.0, 20.0), 2)  # 2% to 20% turnover
-        
-        # Additional calculated metrics
-        salary_coverage = round((salary_count / employee_count) * 100, 2) if employee_count > 0 else 0
-        budget_utilization = round((total_cost / department.budget) * 100, 2) if department.budget else 0
-        
         return Response({
             'department': DepartmentListSerializer(department).data,
-            'financial_metrics': {
-                'average_salary': avg_salary,
-                'total_salary_cost': round(total_salary, 2),
-                'total_cost': total_cost,
-                'cost_per_employee': cost_per_employee,
-                'budget_utilization_percent': budget_utilization
-            },
-            'workforce_metrics': {
-                'total_employees': employee_count,
-                'employees_with_salary_data': salary_count,
-                'salary_data_coverage_percent': salary_coverage,
-                'headcount_growth_percent': headcount_growth,
-                'turnover_rate_percent': turnover_rate
-            },
-            'cost_breakdown': {
-                'base_salary_cost': round(total_salary, 2),
-                'overhead_multiplier': 1.5,
-                'overhead_cost': round(total_salary * 0.5, 2),
-                'cost_formula': 'Total Cost = (Sum of all salaries) × 1.5'
-            },
-            'salary_statistics': {
-                'highest_salary': round(max([p.net_salary for p in latest_payrolls]), 2) if latest_payrolls else 0,
-                'lowest_salary': round(min([p.net_salary for p in latest_payrolls]), 2) if latest_payrolls else 0,
-                'median_salary': round(sorted([p.net_salary for p in latest_payrolls])[len(latest_payrolls)//2], 2) if latest_payrolls else 0
-            }
+            **build_department_analytics(department, stats, kpis)
         })
     
     @action(detail=False, methods=['get'])
+    @analytics_replica
+    @cached_response(Department, Employee, Position, Payroll, DepartmentMonthlyKPI)
     def analytics_all(self, request):
         """Get detailed analytics for all departments"""
-        departments = self.get_queryset()
-        
-        analytics_data = []
-        total_company_cost = 0
-        total_company_employees = 0
+        departments = list(self.get_queryset())
         
-        for dept in departments:
-            # Get all employees in the department
-            employees = Employee.objects.filter(department=dept)
-            employee_count = employees.count()
-            
-            if employee_count == 0:
-                continue
-            
-            # Get salary data from payroll records (latest records for each employee)
-            latest_payrolls = []
-            total_salary = 0
-            salary_count = 0
-            
-            for employee in employees:
-                latest_payroll = Payroll.objects.filter(employee=employee).order_by('-pay_period_end').first()
-                if latest_payroll:
-                    latest_payrolls.append(latest_payroll)
-                    total_salary += latest_payroll.net_salary
-                    salary_count += 1
-            
-            # Calculate metrics
-            avg_salary = round(total_salary / salary_count, 2) if salary_count > 0 else 0
-            total_cost = round(total_salary * 1.5, 2)
-            cost_per_employee = round(total_cost / employee_count, 2) if employee_count > 0 else 0
-            
-            # Random KPIs
-            headcount_growth = round(random.uniform(-5.0, 15.0), 2)
-            turnover_rate = round(random.uniform(2.0, 20.0), 2)
-            
-            total_company_cost += total_cost
-            total_company_employees += employee_count
-            
-            analytics_data.append({
-                'department': DepartmentListSerializer(dept).data,
-                'financial_metrics': {
-                    'average_salary': avg_salary,
-                    'total_cost': total_cost,
-                    'cost_per_employee': cost_per_employee
-                },
-                'workforce_metrics': {
-                    'total_employees': employee_count,
-                    'headcount_growth_percent': headcount_growth,
-                    'turnover_rate_percent': turnover_rate
-                }
-            })
+        # Headcount and latest payroll figures for every department in one query
+        salary_stats = department_salary_stats(dept.pk for dept in departments)
+        latest_kpis = department_kpis(salary_stats)
+        department_data = {dept.pk: DepartmentListSerializer(dept).data for dept in departments}
         
-        return Response({
-            'departments_analytics': analytics_data,
-            'company_summary': {
-                'total_departments_analyzed': len(analytics_data),
-                'total_company_cost': round(total_company_cost, 2),
-                'total_employees': total_company_employees,
-                'average_cost_per_employee': round(total_company_cost / total_company_employees, 2) if total_company_employees > 0 else 0,
-                'cost_breakdown_by_department': [
-                    {
-                        'department': dept['department']['department_name'],
-                        'cost': dept['financial_metrics']['total_cost'],
-                        'percentage_of_total': round((dept['financial_metrics']['total_cost'] / total_company_cost) * 100, 2) if total_company_cost > 0 else 0
-                    }
-                    for dept in analytics_data
-                ]
-            }
-        })
+        return Response(company_analytics(departments, department_data, salary_stats, latest_kpis))
     
     @action(detail=False, methods=['get'])
+    @analytics_replica
+    @cached_response(Department, Employee, Position)
     def stats(self, request):
         """Get statistics for all departments"""
-        departments = self.get_queryset()
-        
-        stats_data = []
-        total_employees = 0
-        total_budget = 0
-        
-        for dept in departments:
-            employee_count = Employee.objects.filter(department=dept).count()
-            position_count = dept.positions.count()
-            avg_budget_per_employee = dept.budget / employee_count if dept.budget and employee_count > 0 else 0
-            
-            stats_data.append({
-                'department': DepartmentListSerializer(dept).data,
-                'employee_count': employee_count,
-                'position_count': position_count,
-                'avg_budget_per_employee': round(avg_budget_per_employee, 2)
-            })
-            
-            total_employees += employee_count
-            if dept.budget:
-                total_budget += dept.budget
-        
-        return Response({
-            'department_stats': stats_data,
-            'summary': {
-                'total_departments': len(stats_data),
-                'total_employees': total_employees,
-                'total_budget': round(total_budget, 2),
-                'avg_employees_per_department': round(total_employees / len(stats_data), 2) if stats_data else 0
-            }
-        })
+        departments = list(self.get_queryset())
+        department_data = {dept.pk: DepartmentListSerializer(dept).data for dept in departments}
+        return Response(department_stats(departments, department_data))
 
 
 # Employee Views
 
-class EmployeeViewSet(viewsets.ReadOnlyModelViewSet):
+class EmployeeViewSet(SparseFieldsetViewMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for Employee read-only operations
-    Provides: list, retrieve
+    Provides: list, retrieve (both accept ?fields= / ?omit=, see api/fieldsets.py)
     """
     queryset = Employee.objects.select_related('department', 'position', 'manager').all()
+    pagination_class = EmployeeCursorPagination
+    sparse_extra_fields = {'retrieve': {'analytics': ['hire_date', 'employment_status']}}
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -353,23 +218,45 @@ class EmployeeViewSet(viewsets.ReadOnlyModelViewSet):
     def get_queryset(self):
         queryset = Employee.objects.select_related('department', 'position', 'manager')
         
-        # Search by name (searches both first_name and last_name)
+        # Search by name through the full-text index (prefix matches on first_name and last_name)
         name = self.request.query_params.get('name', None)
         if name is not None:
-            queryset = queryset.filter(
-                Q(first_name__icontains=name) | 
-                Q(last_name__icontains=name) |
-                Q(first_name__icontains=name.split()[0] if ' ' in name else name) |
-                Q(last_name__icontains=name.split()[-1] if ' ' in name else name)
-            )
+            queryset = search_employees(queryset, name)
+        
+        # Search names, employee codes and emails through the same index
+        search = self.request.query_params.get('search', None)
+        if search is not None:
+            queryset = search_employees(queryset, search, SEARCH_COLUMNS)
         
         # Filter by department ID
         department_id = self.request.query_params.get('department', None)
         if department_id is not None:
             queryset = queryset.filter(department_id=department_id)
-            
+        
+        # Just the columns and joins a ?fields= / ?omit= request renders; the cursor is built from the ordering columns
+        queryset = self.sparse_queryset(
+            queryset, extra_columns=EmployeeCursorPagination.ordering if self.action == 'list' else ()
+        )
+        
+        # Detail view: prefetch the recent payroll, review and attendance rows in one pass
+        if self.action == 'retrieve':
+            queryset = EmployeeDetailSerializer.setup_eager_loading(queryset, self.get_fieldset())
+        
+        # Best matches first when searching
+        if 'search_rank' in queryset.query.annotations:
+            return queryset.order_by('search_rank', 'last_name', 'first_name', 'employee_id')
         return queryset.order_by('last_name', 'first_name')
     
+    def list(self, request, *args, **kwargs):
+        """List employees, rendered straight from values() rows unless FAST_LIST_RENDERING is off (api/rows.py)"""
+        if not fast_list_rendering():
+            return super().list(request, *args, **kwargs)
+        return row_response(
+            self.filter_queryset(self.get_queryset()), self.get_serializer_class(), self.serializer_fieldset(),
+            paginator=self.paginator, request=request, view=self
+        )
+    
+    @conditional_get(Employee, Department, Position, Payroll, PerformanceReview, Attendance, daily=True)
     def retrieve(self, request, *args, **kwargs):
         """Get employee details with comprehensive analytics"""
         employee = self.get_object()
@@ -379,17 +266,20 @@ class EmployeeViewSet(viewsets.ReadOnlyModelViewSet):
         response_data = serializer.data
         
         # Calculate analytics
-        analytics = self.calculate_employee_analytics(employee)
-        response_data['analytics'] = analytics
+        if self.renders('analytics'):
+            analytics = self.calculate_employee_analytics(employee)
+            response_data['analytics'] = analytics
         
         return Response(response_data)
     
     def calculate_employee_analytics(self, employee):
         """Calculate comprehensive analytics for an employee"""
         
+        # History grows without bound, so each block is aggregated in the database
+        
         # Payroll Analytics
         payrolls = Payroll.objects.filter(employee=employee).order_by('-pay_period_end')
-        payroll_analytics = self.get_payroll_analytics(payrolls)
+        payroll_analytics = self.get_payroll_analytics(payrolls, employee)
         
         # Performance Analytics
         reviews = PerformanceReview.objects.filter(employee=employee).order_by('-review_date')
@@ -400,7 +290,7 @@ class EmployeeViewSet(viewsets.ReadOnlyModelViewSet):
         attendance_analytics = self.get_attendance_analytics(attendance_records)
         
         # Career Analytics
-        career_analytics = self.get_career_analytics(employee)
+        career_analytics = self.get_career_analytics(employee, performance_analytics)
         
         return {
             'payroll': payroll_analytics,
@@ -409,9 +299,22 @@ class EmployeeViewSet(viewsets.ReadOnlyModelViewSet):
             'career': career_analytics
         }
     
-    def get_payroll_analytics(self, payrolls):
-        """Calculate payroll-related analytics"""
-        if not payrolls:
+    def get_payroll_analytics(self, payrolls, employee=None):
+        """
+        Calculate payroll-related analytics (payrolls: queryset ordered newest first).
+        The current and earlier salary are read from what get_queryset loaded with
+        the employee, when it did.
+        """
+        current_year = datetime.now().year
+        summary = payrolls.aggregate(
+            records_count=Count('payroll_id'),
+            average_salary=Avg('net_salary'),
+            highest_salary=Max('net_salary'),
+            lowest_salary=Min('net_salary'),
+            total_earnings_ytd=Sum('net_salary', filter=Q(pay_period_start__year=current_year))
+        )
+        
+        if summary['records_count'] == 0:
             return {
                 'current_salary': 0,
                 'average_salary': 0,
@@ -421,36 +324,53 @@ class EmployeeViewSet(viewsets.ReadOnlyModelViewSet):
                 'lowest_salary': 0
             }
         
-        current_salary = payrolls[0].net_salary if payrolls else 0
-        salaries = [p.net_salary for p in payrolls]
-        
-        # Calculate year-to-date earnings (current year)
-        current_year = datetime.now().year
-        ytd_payrolls = [p for p in payrolls if p.pay_period_start.year == current_year]
-        total_earnings_ytd = sum([p.net_salary for p in ytd_payrolls])
+        # Prefetched newest first by EmployeeDetailSerializer.setup_eager_loading
+        recent_payrolls = getattr(employee, 'recent_payroll_records', None)
+        if recent_payrolls:
+            current_salary = recent_payrolls[0].net_salary
+        else:
+            current_salary = payrolls.values_list('net_salary', flat=True).first()
         
         # Calculate salary growth (compare latest vs 6 months ago)
-        six_months_ago = datetime.now() - timedelta(days=180)
-        older_payrolls = [p for p in payrolls if p.pay_period_start <= six_months_ago.date()]
+        if hasattr(employee, 'salary_before_window'):
+            old_salary = employee.salary_before_window
+        else:
+            six_months_ago = datetime.now() - EmployeeDetailSerializer.SALARY_GROWTH_WINDOW
+            old_salary = payrolls.filter(
+                pay_period_start__lte=six_months_ago.date()
+            ).values_list('net_salary', flat=True).first()
         
         salary_growth = 0
-        if older_payrolls and payrolls:
-            old_salary = older_payrolls[0].net_salary
+        if old_salary is not None:
             salary_growth = round(((current_salary - old_salary) / old_salary) * 100, 2) if old_salary > 0 else 0
         
         return {
             'current_salary': round(current_salary, 2),
-            'average_salary': round(sum(salaries) / len(salaries), 2) if salaries else 0,
+            'average_salary': round(summary['average_salary'], 2),
             'salary_growth_percent': salary_growth,
-            'total_earnings_ytd': round(total_earnings_ytd, 2),
-            'highest_salary': round(max(salaries), 2) if salaries else 0,
-            'lowest_salary': round(min(salaries), 2) if salaries else 0,
-            'payroll_records_count': len(payrolls)
+            'total_earnings_ytd': round(summary['total_earnings_ytd'] or 0, 2),
+            'highest_salary': round(summary['highest_salary'], 2),
+            'lowest_salary': round(summary['lowest_salary'], 2),
+            'payroll_records_count': summary['records_count']
         }
     
     def get_performance_analytics(self, reviews):
-        """Calculate performance-related analytics"""
-        if not reviews:
+        """Calculate performance-related analytics (reviews: queryset ordered newest first)"""
+        # Unset and zero scores are treated as "not scored"
+        overall_scored = Q(overall_score__isnull=False) & ~Q(overall_score=0)
+        goals_scored = Q(goals_score__isnull=False) & ~Q(goals_score=0)
+        competency_scored = Q(competency_score__isnull=False) & ~Q(competency_score=0)
+        
+        summary = reviews.aggregate(
+            reviews_count=Count('review_id'),
+            average_overall_score=Avg('overall_score', filter=overall_scored),
+            average_goals_score=Avg('goals_score', filter=goals_scored),
+            average_competency_score=Avg('competency_score', filter=competency_scored),
+            highest_score=Max('overall_score', filter=overall_scored),
+            lowest_score=Min('overall_score', filter=overall_scored)
+        )
+        
+        if summary['reviews_count'] == 0:
             return {
                 'latest_overall_score': 0,
                 'average_overall_score': 0,
@@ -458,34 +378,49 @@ class EmployeeViewSet(viewsets.ReadOnlyModelViewSet):
                 'reviews_count': 0
             }
         
-        overall_scores = [r.overall_score for r in reviews if r.overall_score]
-        goals_scores = [r.goals_score for r in reviews if r.goals_score]
-        competency_scores = [r.competency_score for r in reviews if r.competency_score]
+        # Only the two most recent scores are needed for the trend
+        latest_scores = list(reviews.filter(overall_scored).values_list('overall_score', flat=True)[:2])
         
         # Calculate trend
         trend = 'Stable'
-        if len(overall_scores) >= 2:
-            latest_score = overall_scores[0]
-            previous_score = overall_scores[1]
+        if len(latest_scores) >= 2:
+            latest_score, previous_score = latest_scores
             if latest_score > previous_score:
                 trend = 'Improving'
             elif latest_score < previous_score:
                 trend = 'Declining'
         
+        def rounded(value):
+            return round(value, 2) if value is not None else 0
+        
         return {
-            'latest_overall_score': overall_scores[0] if overall_scores else 0,
-            'average_overall_score': round(sum(overall_scores) / len(overall_scores), 2) if overall_scores else 0,
-            'average_goals_score': round(sum(goals_scores) / len(goals_scores), 2) if goals_scores else 0,
-            'average_competency_score': round(sum(competency_scores) / len(competency_scores), 2) if competency_scores else 0,
+            'latest_overall_score': latest_scores[0] if latest_scores else 0,
+            'average_overall_score': rounded(summary['average_overall_score']),
+            'average_goals_score': rounded(summary['average_goals_score']),
+            'average_competency_score': rounded(summary['average_competency_score']),
             'performance_trend': trend,
-            'reviews_count': len(reviews),
-            'highest_score': round(max(overall_scores), 2) if overall_scores else 0,
-            'lowest_score': round(min(overall_scores), 2) if overall_scores else 0
+            'reviews_count': summary['reviews_count'],
+            'highest_score': rounded(summary['highest_score']),
+            'lowest_score': rounded(summary['lowest_score'])
         }
     
     def get_attendance_analytics(self, attendance_records):
         """Calculate attendance-related analytics"""
-        if not attendance_records:
+        # Current year records only; records without hours don't count towards hours
+        current_year = Q(date__year=datetime.now().year)
+        has_hours = Q(total_hours__isnull=False) & ~Q(total_hours=0)
+        
+        summary = attendance_records.aggregate(
+            all_records=Count('attendance_id'),
+            total_records=Count('attendance_id', filter=current_year),
+            present_days=Count('attendance_id', filter=current_year & Q(status='PRESENT')),
+            late_days=Count('attendance_id', filter=current_year & Q(status='LATE')),
+            absent_days=Count('attendance_id', filter=current_year & Q(status='ABSENT')),
+            hours_records=Count('attendance_id', filter=current_year & has_hours),
+            total_hours_ytd=Sum('total_hours', filter=current_year & has_hours)
+        )
+        
+        if summary['all_records'] == 0:
             return {
                 'attendance_rate': 0,
                 'average_hours_per_day': 0,
@@ -494,42 +429,47 @@ class EmployeeViewSet(viewsets.ReadOnlyModelViewSet):
                 'absent_days_count': 0
             }
         
-        # Filter current year records
-        current_year = datetime.now().year
-        current_year_records = [a for a in attendance_records if a.date.year == current_year]
+        total_records = summary['total_records']
+        present_days = summary['present_days']
+        late_days = summary['late_days']
+        absent_days = summary['absent_days']
+        total_hours_ytd = summary['total_hours_ytd'] or 0
         
-        # Calculate metrics
-        total_records = len(current_year_records)
-        present_records = [a for a in current_year_records if a.status == 'PRESENT']
-        late_records = [a for a in current_year_records if a.status == 'LATE']
-        absent_records = [a for a in current_year_records if a.status == 'ABSENT']
-        
-        attendance_rate = (len(present_records) + len(late_records)) / total_records * 100 if total_records > 0 else 0
-        
-        # Calculate average hours
-        hours_records = [a for a in current_year_records if a.total_hours]
-        avg_hours = sum([a.total_hours for a in hours_records]) / len(hours_records) if hours_records else 0
-        total_hours_ytd = sum([a.total_hours for a in hours_records])
+        attendance_rate = (present_days + late_days) / total_records * 100 if total_records > 0 else 0
+        avg_hours = total_hours_ytd / summary['hours_records'] if summary['hours_records'] else 0
         
         return {
             'attendance_rate_percent': round(attendance_rate, 2),
             'average_hours_per_day': round(avg_hours, 2),
             'total_hours_ytd': round(total_hours_ytd, 2),
             'total_days_recorded': total_records,
-            'present_days': len(present_records),
-            'late_days': len(late_records),
-            'absent_days': len(absent_records)
+            'present_days': present_days,
+            'late_days': late_days,
+            'absent_days': absent_days
         }
     
-    def get_career_analytics(self, employee):
+    def get_career_analytics(self, employee, performance_analytics=None):
         """Calculate career-related analytics"""
         # Calculate tenure
         tenure_days = (datetime.now().date() - employee.hire_date).days
         tenure_years = round(tenure_days / 365.25, 1)
         
-        # Generate some random but realistic career metrics
-        promotion_potential = round(random.uniform(60, 95), 2)  # 60-95% potential
-        skill_rating = round(random.uniform(3.0, 5.0), 1)  # 3-5 rating
+        if performance_analytics is None:
+            reviews = PerformanceReview.objects.filter(employee=employee).order_by('-review_date')
+            performance_analytics = self.get_performance_analytics(reviews)
+        
+        # Promotion potential: 60-95%, weighted 70% on review scores and 30% on tenure (capped at 5 years)
+        score_component = performance_analytics['average_overall_score'] / 5
+        tenure_component = min(tenure_years / 5, 1)
+        promotion_potential = round(60 + 35 * (0.7 * score_component + 0.3 * tenure_component), 2)
+        
+        # Skill rating: average competency score on the 0-5 review scale
+        skill_rating = round(performance_analytics.get('average_competency_score', 0), 1)
+        
+        # Annotated by get_queryset for the detail view
+        direct_reports_count = getattr(employee, 'direct_reports_count', None)
+        if direct_reports_count is None:
+            direct_reports_count = Employee.objects.filter(manager=employee).count()
         
         return {
             'tenure_years': tenure_years,
@@ -537,37 +477,130 @@ class EmployeeViewSet(viewsets.ReadOnlyModelViewSet):
             'promotion_potential_percent': promotion_potential,
             'skill_rating': skill_rating,
             'employment_status': employee.employment_status,
-            'has_direct_reports': Employee.objects.filter(manager=employee).exists(),
-            'direct_reports_count': Employee.objects.filter(manager=employee).count()
+            'has_direct_reports': direct_reports_count > 0,
+            'direct_reports_count': direct_reports_count
         }
     
-    @action(detail=False, methods=['get'])
-    def analytics_summary(self, request):
-        """Get analytics summary for all employees"""
-        employees = self.get_queryset()
-        
-        # Basic counts
-        total_employees = employees.count()
-        active_employees = employees.filter(employment_status='ACTIVE').count()
+    @action(detail=True, methods=['get'])
+    @conditional_get(Employee, Department, Position, OrgChartNode)
+    def reports(self, request, pk=None):
+        """Get the employee's reporting line (?depth=N levels down, default 1, or ?depth=all)"""
+        node = get_object_or_404(OrgChartNode.objects.select_related('employee'), employee_id=pk)
+        
+        depth = request.query_params.get('depth', '1')
+        if depth == 'all':
+            max_depth = None
+        elif depth.isdigit() and int(depth) > 0:
+            max_depth = int(depth)
+        else:
+            return Response({
+                'error': "depth must be a positive integer or 'all'"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # One index range scan over the nested-set interval, in org chart order
+        reports = subtree_queryset(node, max_depth).select_related(
+            'department', 'position', 'org_node'
+        ).annotate(
+            tree_position=F('org_node__lft'),
+            reporting_level=F('org_node__depth') - node.depth
+        )
+        
+        response_data = {
+            'employee': EmployeeBasicSerializer(node.employee).data,
+            'org_metrics': {
+                'level': node.depth,
+                'span_of_control': node.direct_reports,
+                'total_reports': node.total_reports,
+                'levels_below': node.height,
+                'top_manager_id': node.root_id
+            }
+        }
         
-        # Department distribution
-        dept_distribution = employees.values('department__department_name').annotate(
-            count=Count('employee_id')
-        ).order_by('-count')
+        paginator = OrgChartPagination()
+        page = paginator.paginate_queryset(reports, request, view=self)
+        if page is not None:
+            response_data['next'] = paginator.get_next_link()
+            response_data['previous'] = paginator.get_previous_link()
+            response_data['results'] = OrgChartReportSerializer(page, many=True).data
+        else:
+            response_data['results'] = OrgChartReportSerializer(reports.order_by('tree_position'), many=True).data
         
-        # Average tenure
-        tenures = [(datetime.now().date() - emp.hire_date).days / 365.25 for emp in employees]
-        avg_tenure = round(sum(tenures) / len(tenures), 1) if tenures else 0
+        return Response(response_data)
+    
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def bulk(self, request):
+        """Create and update employees in one transaction (rows with an employee_id are updates)"""
+        batch = EmployeeBatch(request.data)
+        if not batch.is_valid():
+            return Response({
+                'error': 'Validation failed; no employees were saved',
+                'invalid_rows': len([index for index in batch.errors if index is not None]),
+                'errors': batch.get_errors()
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        return Response({
-            'summary': {
-                'total_employees': total_employees,
-                'active_employees': active_employees,
-                'inactive_employees': total_employees - active_employees,
-                'average_tenure_years': avg_tenure
-            },
-            'department_distribution': dept_distribution,
-            'employment_status_breakdown': employees.values('employment_status').annotate(
-                count=Count('employee_id')
-            )
-        })
+        result = batch.save()
+        return Response(result, status=status.HTTP_201_CREATED if result['created'] else status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['get'])
+    @analytics_replica
+    @cached_response(Department, Employee)
+    def analytics_summary(self, request):
+        """Get analytics summary for all employees"""
+        # One pass over the employees; order_by() keeps the list ordering out of any GROUP BY
+        rows = self.get_queryset().order_by().values_list(
+            'department__department_name', 'employment_status', 'hire_date'
+        )
+        return Response(employee_summary(rows))
+
+
+class DashboardViewSet(viewsets.ViewSet):
+    """
+    The HR dashboard in one request: department list, department stats,
+    company-wide analytics and employee summary
+    """
+    
+    @analytics_replica
+    @cached_response(Department, Employee, Position, Payroll, DepartmentMonthlyKPI)
+    def list(self, request):
+        """Build every dashboard block from one shared pass over the data"""
+        return Response(build_dashboard(request))
+
+
+@api_view(['GET'])
+def cache_statistics(request):
+    """Hit/miss counters of the analytics response cache (this process)"""
+    return Response(cache_stats())
+
+
+@api_view(['GET'])
+def headcount_history(request):
+    """Per-department headcount history from the sample/*.csv files, with trends and monthly totals"""
+    return Response(cached_headcount_history())
+
+
+@require_GET
+def request_metrics(request):
+    """Per-action query counts and latency percentiles (this process), Prometheus text format"""
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# Plain Django view: DRF content negotiation would reject Accept: text/csv
+@require_GET
+def export_data(request, dataset, export_format):
+    """Stream a whole table as NDJSON or CSV (?from=&to=, ?employee=, ?department=)"""
+    if dataset not in EXPORT_DATASETS or export_format not in EXPORT_FORMATS:
+        return JsonResponse({
+            'error': f'Unknown export. Available: {", ".join(EXPORT_DATASETS)} as {" or ".join(EXPORT_FORMATS)}'
+        }, status=404)
+    
+    try:
+        rows = export_rows(dataset, request.GET)
+    except ExportError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    
+    response = StreamingHttpResponse(
+        EXPORT_STREAMS[export_format](dataset, rows),
+        content_type=EXPORT_FORMATS[export_format]
+    )
+    response['Content-Disposition'] = f'attachment; filename="{dataset}.{export_format}"'
+    return response
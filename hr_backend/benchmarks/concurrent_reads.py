@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the SQLite database profiles (HR_DB_PROFILE in settings.py)
+
+Copies a seeded SQLite database to a temporary file and, for each profile,
+runs reader processes issuing API requests (employee list and department
+detail, neither of them cached) while `rebuild_hr_data` rewrites the
+database in another process. Prints the read throughput, latency and failed
+requests measured during the write, next to a baseline without a writer.
+
+Usage:
+    python benchmarks/concurrent_reads.py [--db hr_database.db] [--readers 4] [--scale 5]
+"""
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import django
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+PROFILES = ('development', 'production')
+
+
+def setup_django(db_path, profile, cache_dir):
+    """Point Django at the benchmark copy of the database, with the given profile"""
+    sys.path.insert(0, str(PROJECT_DIR))
+    os.environ['HR_DB_PROFILE'] = profile
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hr_backend.settings')
+
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = str(db_path)
+    settings.CACHES['analytics']['LOCATION'] = str(cache_dir)
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ['testserver']
+    django.setup()
+
+
+def read_loop(db_path, profile, cache_dir, ready, stop, results):
+    """Reader process: request uncached endpoints until `stop` is set, then report"""
+    setup_django(db_path, profile, cache_dir)
+    from django.test import Client
+    from api.models import Department
+
+    department_ids = list(Department.objects.values_list('department_id', flat=True))
+    urls = ['/api/employees/?page_size=50'] + [f'/api/departments/{pk}/' for pk in department_ids]
+    client = Client(raise_request_exception=False)
+    ready.wait()
+
+    latencies = []
+    errors = 0
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = client.get(urls[len(latencies) % len(urls)])
+        latencies.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            errors += 1
+    results.put((latencies, errors))
+
+
+def run_readers(db_path, profile, cache_dir, readers, workload):
+    """
+    Run `readers` reader processes while `workload()` runs in this process;
+    returns the sorted request latencies, failed requests and elapsed seconds.
+    """
+    ready = multiprocessing.Barrier(readers + 1)
+    stop = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=read_loop, args=(db_path, profile, cache_dir, ready, stop, results))
+        for _ in range(readers)
+    ]
+    for process in processes:
+        process.start()
+    ready.wait()
+    started = time.perf_counter()
+    workload()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    latencies = sorted(latency for reader_latencies, _ in collected for latency in reader_latencies)
+    errors = sum(reader_errors for _, reader_errors in collected)
+    return latencies, errors, elapsed
+
+
+def run_command(db_path, profile, cache_dir, command, scale):
+    """Run `migrate` or `rebuild_hr_data` against the copy in a separate process; returns its exit code"""
+    return subprocess.run(
+        [sys.executable, __file__, '--command', command, '--db', str(db_path), '--profile', profile,
+         '--cache-dir', str(cache_dir), '--scale', str(scale)],
+        stdout=subprocess.DEVNULL
+    ).returncode
+
+
+def command_process(db_path, profile, cache_dir, command, scale):
+    setup_django(db_path, profile, cache_dir)
+    from django.core.management import call_command
+    if command == 'migrate':
+        call_command('migrate', verbosity=0)
+    else:
+        call_command('rebuild_hr_data', skip_confirmation=True, scale=scale, seed=1, workers=1)
+
+
+def report(label, latencies, errors, elapsed):
+    if not latencies:
+        print(f"  {label:<14} no requests completed, {errors} failed")
+        return
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(
+        f"  {label:<14} {len(latencies) / elapsed:8.1f} req/s   p50 {p50:7.1f} ms   "
+        f"p99 {p99:8.1f} ms   max {latencies[-1] * 1000:8.1f} ms   failed {errors}   ({elapsed:.1f}s)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default=str(PROJECT_DIR / 'hr_database.db'), help='Seeded SQLite database to copy')
+    parser.add_argument('--readers', type=int, default=4, help='Reader processes')
+    parser.add_argument('--scale', type=float, default=5, help='rebuild_hr_data --scale for the concurrent write')
+    parser.add_argument('--idle-seconds', type=float, default=5, help='Duration of the baseline without a writer')
+    parser.add_argument('--command', choices=('migrate', 'rebuild_hr_data'), help=argparse.SUPPRESS)
+    parser.add_argument('--profile', choices=PROFILES, help=argparse.SUPPRESS)
+    parser.add_argument('--cache-dir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.command:
+        command_process(args.db, args.profile, args.cache_dir, args.command, args.scale)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for profile in PROFILES:
+            db_copy = Path(tmp_dir) / f'{profile}.db'
+            cache_dir = Path(tmp_dir) / f'{profile}-cache'
+            shutil.copyfile(args.db, db_copy)
+            run_command(db_copy, profile, cache_dir, 'migrate', args.scale)
+            print(f"\n📊 HR_DB_PROFILE={profile} ({args.readers} readers)")
+
+            report('idle', *run_readers(
+                db_copy, profile, cache_dir, args.readers, lambda: time.sleep(args.idle_seconds)
+            ))
+
+            exit_codes = []
+            report('during write', *run_readers(
+                db_copy, profile, cache_dir, args.readers,
+                lambda: exit_codes.append(run_command(db_copy, profile, cache_dir, 'rebuild_hr_data', args.scale))
+            ))
+            print(f"  rebuild_hr_data --scale {args.scale:g} exit code: {exit_codes[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the hot-path composite indexes (api migration 0003)
+
+Copies a seeded SQLite database to a temporary file, runs the hot queries with
+the indexes removed and again with them in place, and prints the
+EXPLAIN QUERY PLAN output and the average query time for each.
+
+Usage:
+    python benchmarks/explain_indexes.py [--db hr_database.db] [--repeat 200]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import django
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+INDEX_MIGRATION = '0003_hot_path_indexes'
+PREVIOUS_MIGRATION = '0002_latestpayroll'
+
+
+def setup_django(db_path):
+    """Point Django at the benchmark copy of the database"""
+    sys.path.insert(0, str(PROJECT_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hr_backend.settings')
+
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = str(db_path)
+    django.setup()
+
+
+def hot_queries():
+    """The queries the API issues on every detail and analytics request"""
+    from api.models import Attendance, Employee, Payroll, PerformanceReview
+
+    employee = Employee.objects.order_by('employee_id').values('employee_id', 'department_id').first()
+    employee_id = employee['employee_id']
+    department_id = employee['department_id']
+
+    # external_id (migration 0009) does not exist at the migrations compared here
+    return {
+        'recent payrolls': Payroll.objects.filter(employee_id=employee_id).defer('external_id').order_by('-pay_period_end')[:3],
+        'recent attendance': Attendance.objects.filter(employee_id=employee_id).defer('external_id').order_by('-date')[:10],
+        'recent reviews': PerformanceReview.objects.filter(employee_id=employee_id).order_by('-review_date')[:2],
+        'department employees': Employee.objects.filter(department_id=department_id).order_by('last_name', 'first_name'),
+        'active employees': Employee.objects.filter(employment_status='ACTIVE'),
+    }
+
+
+def measure(queries, repeat):
+    """Collect the query plan and mean execution time for each query"""
+    results = {}
+    for label, queryset in queries.items():
+        plan = queryset.explain()
+        started = time.perf_counter()
+        for _ in range(repeat):
+            list(queryset.all())
+        elapsed_ms = (time.perf_counter() - started) / repeat * 1000
+        results[label] = (plan, elapsed_ms)
+    return results
+
+
+def migrate_to(migration):
+    from django.core.management import call_command
+    call_command('migrate', 'api', migration, verbosity=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default=str(PROJECT_DIR / 'hr_database.db'), help='Seeded SQLite database to copy')
+    parser.add_argument('--repeat', type=int, default=200, help='Executions per query when timing')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_copy = Path(tmp_dir) / 'benchmark.db'
+        shutil.copyfile(args.db, db_copy)
+        setup_django(db_copy)
+
+        migrate_to(PREVIOUS_MIGRATION)
+        before = measure(hot_queries(), args.repeat)
+
+        migrate_to(INDEX_MIGRATION)
+        after = measure(hot_queries(), args.repeat)
+
+    for label in before:
+        plan_before, ms_before = before[label]
+        plan_after, ms_after = after[label]
+        print(f"\n📊 {label}")
+        print(f"  before ({ms_before:.3f} ms):")
+        for line in plan_before.splitlines():
+            print(f"    {line}")
+        print(f"  after  ({ms_after:.3f} ms):")
+        for line in plan_after.splitlines():
+            print(f"    {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark and equivalence check for the fast-path list rendering (api/rows.py)
+
+Copies a seeded SQLite database to a temporary file and pads it with copies of
+its employees up to the largest row count. For each row count, renders the
+employee list (EmployeeListSerializer) and the department employee list
+(EmployeeBasicSerializer) both ways, fetch included, and prints the time per
+path. Before timing, checks that both paths produce byte-identical JSON for
+every row count and for the department list, and exits with status 1 if they
+do not.
+
+Usage:
+    python benchmarks/list_rendering.py [--db hr_database.db] [--rows 10000,100000] [--repeat 3]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import django
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django(db_path):
+    """Point Django at the benchmark copy of the database"""
+    sys.path.insert(0, str(PROJECT_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hr_backend.settings')
+
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = str(db_path)
+    settings.DATABASES.pop(settings.ANALYTICS_DATABASE_ALIAS, None)
+    settings.DEBUG = False
+    django.setup()
+
+
+def pad_employees(rows):
+    """Copy existing employees (new codes and emails) until there are at least `rows`"""
+    from api.models import Employee
+
+    existing = list(Employee.objects.order_by('employee_id'))
+    copies = []
+    for number in range(rows - len(existing)):
+        source = existing[number % len(existing)]
+        values = {
+            field.attname: getattr(source, field.attname)
+            for field in Employee._meta.concrete_fields if not field.primary_key
+        }
+        values.update(employee_code=f'B{number:07d}', email=f'bench.{number}@example.com')
+        copies.append(Employee(**values))
+    Employee.objects.bulk_create(copies, batch_size=2000)
+
+
+def paths(rows):
+    """(label, serializer path, fast path) for each benchmarked list, each returning JSON bytes"""
+    from api.renderers import ORJSONRenderer
+    from api.models import Employee
+    from api.rows import row_renderer
+    from api.serializers import EmployeeBasicSerializer, EmployeeListSerializer
+
+    render = ORJSONRenderer().render
+    employees = Employee.objects.select_related('department', 'position', 'manager').order_by(
+        'last_name', 'first_name', 'employee_id'
+    )[:rows]
+    basic_employees = Employee.objects.order_by('last_name', 'first_name', 'employee_id')[:rows]
+
+    def fast(serializer_class, queryset):
+        renderer = row_renderer(serializer_class)
+        return render(renderer.render(renderer.values(queryset)))
+
+    return [
+        ('EmployeeListSerializer',
+         lambda: render(EmployeeListSerializer(employees, many=True).data),
+         lambda: fast(EmployeeListSerializer, employees)),
+        ('EmployeeBasicSerializer',
+         lambda: render(EmployeeBasicSerializer(basic_employees, many=True).data),
+         lambda: fast(EmployeeBasicSerializer, basic_employees)),
+    ]
+
+
+def departments_match():
+    from api.renderers import ORJSONRenderer
+    from api.analytics import annotated_departments
+    from api.rows import row_renderer
+    from api.serializers import DepartmentListSerializer
+
+    render = ORJSONRenderer().render
+    departments = annotated_departments().order_by('department_name')
+    renderer = row_renderer(DepartmentListSerializer, annotations=tuple(sorted(departments.query.annotations)))
+    return render(DepartmentListSerializer(departments, many=True).data) == render(
+        renderer.render(renderer.values(departments))
+    )
+
+
+def best_time(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default=str(PROJECT_DIR / 'hr_database.db'), help='Seeded SQLite database to copy')
+    parser.add_argument('--rows', default='10000,100000', help='Comma-separated row counts')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (the best one is reported)')
+    args = parser.parse_args()
+    row_counts = [int(rows) for rows in args.rows.split(',')]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_copy = Path(tmp_dir) / 'list_rendering.db'
+        shutil.copyfile(args.db, db_copy)
+        setup_django(db_copy)
+        from django.core.management import call_command
+        call_command('migrate', verbosity=0)
+        pad_employees(max(row_counts))
+
+        matches = departments_match()
+        print(f"\n📊 DepartmentListSerializer: output {'identical' if matches else 'DIFFERS'}")
+
+        for rows in row_counts:
+            print(f"\n📊 {rows} rows")
+            for label, serialized, fast in paths(rows):
+                identical = serialized() == fast()
+                matches = matches and identical
+                serializer_time = best_time(serialized, args.repeat)
+                fast_time = best_time(fast, args.repeat)
+                print(
+                    f"  {label:<24} serializer {serializer_time * 1000:8.1f} ms   fast path {fast_time * 1000:8.1f} ms   "
+                    f"{serializer_time / fast_time:5.1f}x   output {'identical' if identical else 'DIFFERS'}"
+                )
+
+    if not matches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
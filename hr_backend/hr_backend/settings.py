@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -42,6 +45,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.instrumentation.RequestMetricsMiddleware',
+    'api.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -81,6 +86,118 @@ DATABASES = {
     }
 }
 
+# HR_DB_PROFILE selects the SQLite tuning: 'development' keeps SQLite's defaults,
+# 'production' switches to the write-ahead log so API reads are not blocked by
+# bulk writes (rebuild_hr_data, load_hr_data) and keeps connections open between
+# requests. SQLITE_PRAGMAS run on every new connection (api/sqlite.py).
+
+DATABASE_PROFILE = os.environ.get('HR_DB_PROFILE', 'development')
+SQLITE_PRAGMAS = {}
+
+if DATABASE_PROFILE == 'production':
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',        # fsync at checkpoints only; safe with WAL
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,       # negative: KiB, i.e. 64 MiB of page cache
+        'busy_timeout': 20000,          # ms a writer waits for the lock before failing
+        'temp_store': 'MEMORY',
+    }
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': int(os.environ.get('HR_DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        # Writers take the lock when the transaction starts, so they queue on
+        # busy_timeout instead of failing when a read upgrades to a write
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
+    })
+elif DATABASE_PROFILE != 'development':
+    raise ImproperlyConfigured(f"HR_DB_PROFILE must be 'development' or 'production', not '{DATABASE_PROFILE}'")
+
+# Read replica for the heavy analytics endpoints (api/replica.py). HR_ANALYTICS_DB
+# names a SQLite snapshot of the default database, opened read-only and kept
+# current by `manage.py refresh_analytics_replica`; any other read-only replica can
+# be configured as DATABASES['analytics'] instead. Without it everything reads from
+# 'default'.
+
+ANALYTICS_DATABASE_ALIAS = 'analytics'
+ANALYTICS_REPLICA_PATH = os.environ.get('HR_ANALYTICS_DB')
+
+if ANALYTICS_REPLICA_PATH:
+    DATABASES[ANALYTICS_DATABASE_ALIAS] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': f'file:{Path(ANALYTICS_REPLICA_PATH).resolve()}?mode=ro',
+        'OPTIONS': {'uri': True},
+        'CONN_MAX_AGE': DATABASES['default'].get('CONN_MAX_AGE', 0),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['api.replica.AnalyticsReplicaRouter']
+
+
+# REST API
+# JSON is rendered with orjson (api/renderers.py); responses are compressed by
+# api.compression.CompressionMiddleware
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
+# Page size for keyset-paginated employee listings (?page_size= overrides, up to 500)
+
+EMPLOYEE_PAGE_SIZE = 50
+
+# Render the employee and department lists straight from values() rows instead of a
+# serializer per row (api/rows.py); the output is the same
+FAST_LIST_RENDERING = True
+
+# POST /api/employees/bulk/: largest accepted batch and rows per INSERT/UPDATE statement
+BULK_WRITE_MAX_ROWS = 5000
+BULK_WRITE_BATCH_SIZE = 500
+
+# Rows fetched per query and written per chunk by the streaming /api/export/ endpoints
+EXPORT_CHUNK_SIZE = 2000
+
+# Most SQL queries each action may run per request (api/instrumentation.py). None of
+# them grows with the number of rows; /api/_metrics counts requests over budget and
+# api/testing.py fails tests that exceed them.
+QUERY_BUDGETS = {
+    'DepartmentViewSet.list': 1,
+    'DepartmentViewSet.retrieve': 5,
+    'DepartmentViewSet.employees': 2,
+    'DepartmentViewSet.positions': 2,
+    'DepartmentViewSet.analytics_all': 3,
+    'DepartmentViewSet.stats': 1,
+    'EmployeeViewSet.list': 1,
+    'EmployeeViewSet.retrieve': 8,
+    'EmployeeViewSet.reports': 2,
+    'EmployeeViewSet.analytics_summary': 1,
+    'DashboardViewSet.list': 3,
+    'headcount-history': 0,
+}
+
+
+# Cache
+# Analytics responses are cached in the 'analytics' cache and invalidated by model
+# signals (see api/cache.py). The file-based backend is shared by every process on
+# the host, so writes made by management commands invalidate the server's entries.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'analytics': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache' / 'analytics',
+        'TIMEOUT': 600,
+    },
+}
+
+ANALYTICS_CACHE_ALIAS = 'analytics'
+ANALYTICS_CACHE_TIMEOUT = 600
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators